@@ -1,14 +1,121 @@
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
+from fastapi import FastAPI, HTTPException, Query, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel, Field, ValidationError
+from typing import Optional
 import pandas as pd
-import requests
+import httpx
+import asyncio
+from contextlib import asynccontextmanager
+import io
 import json
-import socket
+import os
+import tempfile
+import time
 import uvicorn
-from createmission import MissionPlanner
+from connection_pool import ConnectionPool
+from createmission import MISSION_FIELDS, MissionPlanner
+from device_registry import DeviceRegistry
+from esp32_client import DeviceClients
+from event_log import EventLog, EventLogger
+from mission_cache import MissionCache, changed_range, mission_hash
+from mission_codec import MISSION_CONTENT_TYPE, VALID_RANGE, decode_mission, encode_columns
+from mission_compiler import compile_columns, compile_dataframe, emit_mission, simplify_mission
+from mission_export import (ARCHIVE_CONTENT_TYPE, ARCHIVE_EXTENSION, items_array, items_mission, iter_archive,
+                            iter_wpl, read_archive)
+from mission_geofence import Geofence
+from mission_import import detect_format, import_mission
+from metrics import MetricsRegistry
+from telemetry import TelemetryHub
+from mission_geometry import mission_stats
+from mission_optimizer import optimize_mission
+from mission_store import MAX_ITEMS
+from upload_jobs import UploadJobQueue
 
 
-app = FastAPI()
+# Dziennik zdarzeń (JSON na stdout z osobnego wątku), poziom z SZTAFETA_LOG_LEVEL lub PUT /log-level
+event_log = EventLog(level=os.environ.get("SZTAFETA_LOG_LEVEL", "INFO"))
+log = EventLogger("backend")
+
+
+# Zamknięcie współdzielonych klientów HTTP i zapis zaległych zdarzeń przy wyłączaniu serwera
+@asynccontextmanager
+async def lifespan(app):
+    event_log.start()
+    device_registry.start()
+    telemetry.start()
+    yield
+    await telemetry.stop()
+    await device_registry.stop()
+    await device_clients.aclose()
+    event_log.stop()
+
+
+app = FastAPI(lifespan=lifespan)
+
+# Pula połączeń MAVLink współdzielona przez kolejne wgrania misji
+connection_pool = ConnectionPool()
+
+# Telemetria obserwowanych pojazdów (pozycja, tryb, bateria) - jeden czytnik na pojazd,
+# zmiany rozsyłane przez WebSocket i SSE najwyżej 4 razy na sekundę
+telemetry = TelemetryHub(connection_pool, rate=4.0)
+
+# Wgrania misji wykonywane w tle, żeby blokujący pymavlink nie zatrzymywał serwera
+upload_jobs = UploadJobQueue(max_workers=8)
+
+# Ostatnie misje potwierdzone przez pojazdy - pomijanie niezmienionych i wysyłanie tylko zmian
+mission_cache = MissionCache()
+
+# Obszar lotu sprawdzany przed wgraniem misji (domyślnie bez ograniczeń, ustawiany przez PUT /geofence)
+geofence = Geofence()
+
+# Import plików misji: do tylu bajtów plik jest w pamięci, większy trafia na dysk
+IMPORT_SPOOL_SIZE = 1024 * 1024
+
+# Klienty HTTP urządzeń ESP32 (keep-alive, limity czasu, zapamiętana osiągalność)
+# ESP32 domyślnie obsługują tylko HTTP; przy SZTAFETA_DEVICE_SCHEME=https certyfikat jest weryfikowany,
+# chyba że SZTAFETA_DEVICE_VERIFY_TLS=0 (np. certyfikat samopodpisany w sieci lokalnej)
+DEVICE_PORT = int(os.environ.get("SZTAFETA_DEVICE_PORT", "80"))
+DEVICE_SCHEME = os.environ.get("SZTAFETA_DEVICE_SCHEME", "http")
+DEVICE_VERIFY_TLS = os.environ.get("SZTAFETA_DEVICE_VERIFY_TLS", "1") != "0"
+device_clients = DeviceClients(port=DEVICE_PORT, scheme=DEVICE_SCHEME, verify=DEVICE_VERIFY_TLS,
+                               timeout=5.0, reachability_ttl=10.0)
+
+# Maksymalna liczba jednoczesnych wysłań w /streamlit-coordinates/batch
+BEACON_FAN_OUT = 16
+
+# Metryki Prometheusa (GET /metrics) - czasy etapów, liczniki i błędy wgrań misji i wysłań do ESP32
+metrics = MetricsRegistry()
+mission_prepare_seconds = metrics.histogram(
+    "mission_prepare_seconds", "Mission parsing and compilation time by stage", ["stage"])
+mission_rejected_total = metrics.counter(
+    "mission_rejected_total", "Missions rejected before upload by reason", ["reason"])
+upload_stage_seconds = metrics.histogram(
+    "upload_stage_seconds", "Upload job time by vehicle and stage", ["vehicle", "stage"])
+uploads_total = metrics.counter("uploads_total", "Finished upload jobs by vehicle and result", ["vehicle", "result"])
+upload_errors_total = metrics.counter("upload_errors_total", "Failed upload jobs by vehicle and cause",
+                                      ["vehicle", "cause"])
+upload_items_total = metrics.counter("upload_items_total", "Mission items sent to vehicles", ["vehicle"])
+upload_resent_items_total = metrics.counter(
+    "upload_resent_items_total", "Mission items sent again after a repeated request", ["vehicle"])
+upload_jobs_queued = metrics.gauge("upload_jobs_queued", "Upload jobs waiting for a worker")
+uploads_in_flight = metrics.gauge("uploads_in_flight", "Upload jobs talking to a vehicle", ["vehicle"])
+mavlink_connections_open = metrics.gauge("mavlink_connections_open", "Open connections in the MAVLink pool")
+beacon_stage_seconds = metrics.histogram(
+    "beacon_stage_seconds", "Beacon send time by device and stage", ["device", "stage"])
+beacon_sends_total = metrics.counter("beacon_sends_total", "Beacon sends by device and result", ["device", "result"])
+beacons_in_flight = metrics.gauge("beacons_in_flight", "Beacon sends in progress", ["device"])
+telemetry_clients = metrics.gauge("telemetry_clients", "Connected telemetry streams by transport", ["transport"])
+
+# Rejestr urządzeń ESP32 sprawdzanych w tle (domyślnie beacony z map 1-4).
+# Adresy beaconów są w beacons.json wspólnym z frontendem (ścieżkę można zmienić przez SZTAFETA_BEACONS_FILE)
+BEACONS_FILE = os.environ.get("SZTAFETA_BEACONS_FILE",
+                              os.path.join(os.path.dirname(os.path.abspath(__file__)), "beacons.json"))
+device_registry = DeviceRegistry(device_clients, interval=5.0)
+with open(BEACONS_FILE) as f:
+    for name, ip in json.load(f).items():
+        device_registry.register(name, ip)
 
 # Model danych do wysyłania współrzędnych (ESP32)
 class Coordinates(BaseModel):
@@ -20,134 +127,660 @@ class Coordinates(BaseModel):
     ip: str
     
 
+# Model danych do rejestracji urządzenia ESP32
+class DeviceConfig(BaseModel):
+    name: str
+    ip: str
+    altitude: float = 0.0
+    delay: float = 300.0
+    servo_value: int = 93
+
+
+# Model danych do konfiguracji wielu beaconów naraz
+class CoordinatesBatch(BaseModel):
+    beacons: list[Coordinates]
+
+
 # Model danych do przetwarzania pliku JSON
 class DataFramePayload(BaseModel):
     data: str
     ip: str
     port: int
     height: int
+    force: bool = False  # wysłanie całej misji nawet gdy pojazd ma już taką samą
+    simplify: Optional[float] = None  # tolerancja (m) przerzedzania punktów trasy, None = wyłączone
 
 
-# Funkcja sprawdzająca połączenie z urządzeniem (ESP32)
-def check_connection(ip: str, port: int = 80, timeout: int = 5) -> bool:
-    try:
-        socket.setdefaulttimeout(timeout)
-        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        sock.connect((ip, port))
-        sock.close()
-        return True
-    except socket.error:
-        return False
+# Model danych do szacowania trasy i czasu lotu misji
+class MissionStatsPayload(BaseModel):
+    data: str
+    height: int
+    speed: float = Field(5.0, gt=0)  # prędkość przelotowa (m/s)
+    climb_rate: float = Field(2.5, gt=0)  # prędkość wznoszenia (m/s)
+    home_lat: Optional[float] = None
+    home_lon: Optional[float] = None
+    per_item: bool = True  # odcinki i ETA każdego wiersza w odpowiedzi
+
+
+# Model danych obszaru lotu: wielokąty [(lat, lon), ...] dozwolone i zakazane, limity wysokości (m)
+class GeofenceConfig(BaseModel):
+    include: list[list[tuple[float, float]]] = []
+    exclude: list[list[tuple[float, float]]] = []
+    min_altitude: Optional[float] = None
+    max_altitude: Optional[float] = None
+
+
+# Model danych do eksportu skompilowanej misji do pliku
+class MissionExportPayload(BaseModel):
+    data: str
+    height: int
+
+
+# Model danych do wgrania misji do kilku pojazdów naraz
+class FleetPayload(BaseModel):
+    vehicles: list[DataFramePayload]
+
+
+# Funkcja do wysłania współrzędnych do jednego urządzenia (ESP32)
+async def send_to_device(coordinates: Coordinates):
+    device = device_clients.get(coordinates.ip)
+    with beacons_in_flight.track(coordinates.ip):
+        # Sprawdzenie połączenia z urządzeniem (wynik zapamiętany na krótko)
+        with beacon_stage_seconds.time(coordinates.ip, "reachability"):
+            reachable = await device.is_reachable()
+        if not reachable:
+            beacon_sends_total.inc(coordinates.ip, "unreachable")
+            log.warning("device_unreachable", ip=coordinates.ip)
+            raise HTTPException(status_code=400, detail=f"Cannot connect to device at {coordinates.ip}")
+
+        data = {
+            "long": coordinates.long,
+            "lat": coordinates.lat,
+            "altitude": coordinates.altitude,
+            "delay": coordinates.delay,
+            "servo_value": coordinates.servo_value
+        }
+        log.debug("beacon_send", ip=coordinates.ip, **data)
+        try:
+            # Wysłanie danych w formacie JSON przez utrzymywane połączenie
+            with beacon_stage_seconds.time(coordinates.ip, "post"):
+                response = await device.post("/set-coordinates", data)
+        except httpx.HTTPError as e:
+            beacon_sends_total.inc(coordinates.ip, "http_error")
+            raise HTTPException(status_code=500, detail=str(e))
+
+    if response.status_code == 200:
+        beacon_sends_total.inc(coordinates.ip, "ok")
+        return {"message": "Data sent successfully"}
+    else:
+        beacon_sends_total.inc(coordinates.ip, "device_error")
+        raise HTTPException(status_code=response.status_code, detail=response.text)
 
 
 # Endpoint do wysyłania współrzędnych (ESP32)
 @app.post("/streamlit-coordinates")
-def send_coordinates(coordinates: Coordinates):
-    url = f"http://{coordinates.ip}/set-coordinates"
-    
-    # Sprawdzenie połączenia z urządzeniem
-    if not check_connection(coordinates.ip):
-        print(f"Cannot connect to device at {coordinates.ip}")
-        raise HTTPException(status_code=400, detail=f"Cannot connect to device at {coordinates.ip}")
-    
-    headers = {
-        "Content-Type": "application/json"
-    }
-
-    data = {
-        "long": coordinates.long,
-        "lat": coordinates.lat,
-        "altitude": coordinates.altitude,
-        "delay": coordinates.delay,
-        "servo_value": coordinates.servo_value
-    }
-    print(data)
+async def send_coordinates(coordinates: Coordinates):
+    return await send_to_device(coordinates)
+
+
+# Endpoint do konfiguracji wielu beaconów naraz - równolegle, najwyżej BEACON_FAN_OUT jednocześnie
+@app.post("/streamlit-coordinates/batch")
+async def send_coordinates_batch(payload: CoordinatesBatch):
+    limit = asyncio.Semaphore(BEACON_FAN_OUT)
+
+    async def send(coordinates):
+        async with limit:
+            start = time.perf_counter()
+            try:
+                result = await send_to_device(coordinates)
+                status_code, message = 200, result["message"]
+            except HTTPException as e:
+                status_code, message = e.status_code, e.detail
+            return {"ip": coordinates.ip, "status_code": status_code, "message": message,
+                    "latency": time.perf_counter() - start}
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(send(coordinates) for coordinates in payload.beacons))
+    return {"wall_time": time.perf_counter() - start, "devices": results}
+
+
+# Lista urządzeń ESP32 ze stanem z ostatniego sprawdzenia w tle
+@app.get("/devices")
+def devices():
+    return device_registry.snapshot()
+
+
+# Dodanie (lub zmiana) urządzenia ESP32 w rejestrze
+@app.post("/devices")
+async def register_device(device: DeviceConfig):
+    previous = device_registry.get(device.name)
+    registered = device_registry.register(device.name, device.ip, altitude=device.altitude,
+                                          delay=device.delay, servo_value=device.servo_value)
+    # Zmiana adresu - klient starego adresu nie jest już potrzebny
+    if previous is not None and previous.ip != device.ip:
+        await device_registry.release(previous.ip)
+    return registered.to_dict()
+
+
+# Usunięcie urządzenia ESP32 z rejestru (razem z jego klientem HTTP)
+@app.delete("/devices/{name}")
+async def remove_device(name: str):
+    if await device_registry.remove(name) is None:
+        raise HTTPException(status_code=404, detail=f"Unknown device {name}")
+    return {"message": f"Device {name} removed"}
+
+
+# Wysłanie współrzędnych do urządzenia z rejestru (pozostałe wartości z jego ustawień)
+@app.post("/send-data/{name}")
+async def send_data(name: str, lat: float, long: float):
+    device = device_registry.get(name)
+    if device is None:
+        raise HTTPException(status_code=404, detail=f"Unknown device {name}")
+    return await send_to_device(Coordinates(long=long, lat=lat, altitude=device.altitude, delay=device.delay,
+                                            servo_value=device.servo_value, ip=device.ip))
+
+
+# Stan puli połączeń MAVLink
+@app.get("/connections")
+def connections_status():
+    return connection_pool.status()
+
+
+# Zamknięcie wszystkich połączeń MAVLink w puli
+@app.post("/connections/drain")
+def drain_connections():
+    return {"closed": connection_pool.drain()}
+
+
+# Funkcja do zbudowania elementów misji w MissionPlannerze ze skompilowanej misji
+def build_mission(planner, mission, height):
+    # Dodanie punktu startowego (takeoff)
+    planner.add_takeoff(altitude=height)
+
+    # Dodanie komend z kolumn skompilowanej misji
+    emit_mission(mission, planner, height)
+
+    # Powrót do punktu startowego (RTL)
+    planner.add_return_to_launch()
+
+    # Usunięcie zbędnych komend (NAV_DELAY 0 s, sąsiednie opóźnienia, powtórzone DO_SET_SERVO)
+    before = planner.mission_items.count()
+    planner.mission_items = optimize_mission(planner.mission_items)
+    optimized = {"before": before, "after": planner.mission_items.count()}
+    log.info("mission_optimized", **optimized)
+    return optimized
+
+
+# Błąd wgrania misji z przyczyną (etykieta cause w upload_errors_total)
+class UploadError(RuntimeError):
+    def __init__(self, message, cause):
+        super().__init__(message)
+        self.cause = cause
+
+
+# Wgranie misji do pojazdu - wykonywane w tle przez kolejkę zadań (z metrykami etapów i błędów).
+# store - gotowe elementy misji (archiwum), wtedy mission i height nie są używane.
+def run_upload(job, mission, height, force=False, store=None):
+    vehicle = job.connection_string
+    upload_jobs_queued.dec()
+    upload_stage_seconds.observe(job.timings["queued"], vehicle, "queued")
+    # Nowe połączenie to głównie oczekiwanie na pierwszy HEARTBEAT
+    pooled = connection_pool.is_open(vehicle)
+    connect_stage = "connect" if pooled else "heartbeat"
+    job.trace.add("connect_start", pooled=pooled)
+    try:
+        with uploads_in_flight.track(vehicle):
+            result = upload_to_vehicle(job, mission, height, force, store)
+    except Exception as e:
+        uploads_total.inc(vehicle, "failed")
+        upload_errors_total.inc(vehicle, getattr(e, "cause", "internal"))
+        raise
+    finally:
+        for stage, name in (("connect", connect_stage), ("build", "build"), ("transfer", "transfer")):
+            if stage in job.timings:
+                upload_stage_seconds.observe(job.timings[stage], vehicle, name)
+
+    uploads_total.inc(vehicle, result["write"])
+    stats = result.get("transfer")
+    if stats is not None:
+        upload_items_total.inc(vehicle, amount=stats["sent"])
+        upload_resent_items_total.inc(vehicle, amount=stats["duplicates"])
+        if stats["first_request"] is not None:
+            upload_stage_seconds.observe(stats["first_request"], vehicle, "first_request")
+        if stats["ack_wait"] is not None:
+            upload_stage_seconds.observe(stats["duration"] - stats["ack_wait"], vehicle, "requests")
+            upload_stage_seconds.observe(stats["ack_wait"], vehicle, "ack")
+    return result
+
+
+# Funkcja do wgrania misji przez połączenie z puli (bez metryk - patrz run_upload)
+def upload_to_vehicle(job, mission, height, force, store):
+    try:
+        # Połączenie z puli - bez czekania na HEARTBEAT, jeśli pojazd jest już połączony
+        with connection_pool.connection(job.connection_string) as vehicle:
+            job.mark("connect")
+            planner = MissionPlanner(job.connection_string, vehicle=vehicle)
+            if store is None:
+                optimized = build_mission(planner, mission, height)
+            else:
+                planner.mission_items = store
+                optimized = None
+            job.mark("build")
+
+            # Porównanie z ostatnią misją potwierdzoną przez pojazd
+            items = planner.mission_fields()
+            # Pominięcie lub zapis częściowy tylko po potwierdzeniu zawartości misji na pojeździe tuż przed
+            # zapisem (opaque_id albo skrót pobranych elementów) - misję mogła zmienić inna stacja
+            cached = None if force else mission_cache.get(job.connection_string, vehicle,
+                                                          planner.read_mission_state, planner.read_current_mission)
+            if cached is None:
+                write = 'full'
+            elif cached[0] == mission_hash(items):
+                write = None
+            else:
+                write = changed_range(cached[1], items)
+            if write is None:
+                job.mark("transfer")
+                return {"message": "Mission unchanged, upload skipped", "write": "skipped",
+                        "optimized": optimized}
+
+            mission_cache.invalidate(job.connection_string)
+            if write == 'full':
+                mission_upload_status = planner.upload_mission(progress=job.report_progress, trace=job.trace)
+            else:
+                mission_upload_status = planner.upload_mission(progress=job.report_progress, trace=job.trace,
+                                                               start_index=write[0], end_index=write[1])
+            job.mark("transfer")
+            if mission_upload_status == True:
+                mission_cache.store(job.connection_string, vehicle, items, planner.opaque_id)
+    except TimeoutError as e:
+        raise UploadError("Cannot communicate with vehicle: " + str(e), "no_heartbeat")
+    except OSError as e:
+        raise UploadError("Cannot communicate with vehicle: " + str(e), "link_error")
+
+    if mission_upload_status != True:
+        # TIMEOUT albo odrzucenie przez pojazd (np. MAV_MISSION_NO_SPACE)
+        raise UploadError(f"Mission upload failed: {planner.upload_result}", planner.upload_result.lower())
+    return {"message": "Data received successfully",
+            "write": "full" if write == 'full' else "partial",
+            "range": None if write == 'full' else list(write),
+            "optimized": optimized,
+            "transfer": planner.transfer_stats}
+
+
+# Funkcja do dodania wgrania misji do kolejki zadań (run_upload w tle)
+def submit_upload(connection_string, *args):
+    upload_jobs_queued.inc()
+    return upload_jobs.submit(connection_string, run_upload, *args)
+
+
+# Funkcja do odrzucenia misji z błędnymi wierszami, współrzędnymi poza zakresem lub za długiej
+# (błąd 400 przed jakimkolwiek ruchem MAVLink)
+def check_mission(mission):
+    if mission.invalid_rows:
+        mission_rejected_total.inc("invalid_rows")
+        raise HTTPException(status_code=400, detail=f"Invalid rows: {mission.invalid_rows}")
+    # Współrzędne poza zakresem przepełniłyby pola int32 x/y elementów misji
+    out_of_range = mission.out_of_range_rows(VALID_RANGE)
+    if out_of_range:
+        mission_rejected_total.inc("out_of_range")
+        raise HTTPException(status_code=400, detail=f"Coordinates out of range in rows: {out_of_range}")
+    # Start (dwie komendy) i RTL dokładane przez build_mission
+    if mission.item_count() + 3 > MAX_ITEMS:
+        mission_rejected_total.inc("too_many_items")
+        raise HTTPException(status_code=400, detail=f"Mission too long: more than {MAX_ITEMS} items")
+    return mission
+
+
+# Funkcja do odrzucenia misji wychodzącej poza obszar lotu (błąd 400 z indeksami wierszy)
+def check_geofence(mission, height):
+    report = geofence.check(mission, height)
+    if any(report.values()):
+        mission_rejected_total.inc("geofence")
+        raise HTTPException(status_code=400, detail={"message": "Mission violates geofence", **report})
+    return mission
+
+
+# Funkcja do wczytania i kompilacji misji z zapytania JSON (DataFrame w orient='split')
+def prepare_mission(payload: DataFramePayload):
+    if not payload.data:
+        raise HTTPException(status_code=400, detail="No data received")
+
+    pd.options.display.float_format = '{:.8f}'.format
+    with mission_prepare_seconds.time("parse"):
+        df = pd.read_json(io.StringIO(payload.data), orient='split')
+    with mission_prepare_seconds.time("compile"):
+        mission = compile_dataframe(df)
+    return check_mission(mission)
+
+
+# Funkcja do odczytania misji z treści zapytania: binarnej (MISSION_CONTENT_TYPE) albo JSON (model).
+# Zwraca (misja, model) - model jest None dla treści binarnej.
+async def read_mission(request: Request, model):
+    if request.headers.get("content-type", "").startswith(MISSION_CONTENT_TYPE):
+        try:
+            with mission_prepare_seconds.time("decode"):
+                columns = decode_mission(await request.body())
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        with mission_prepare_seconds.time("compile"):
+            mission = compile_columns(columns)
+        return check_mission(mission), None
+
     try:
-        # Wysłanie danych w formacie JSON do wskazanego URL
-        response = requests.post(url, headers=headers, data=json.dumps(data))
-
-        if response.status_code == 200:
-            return {"message": "Data sent successfully"}
-        else:
-            raise HTTPException(status_code=response.status_code, detail=response.text)
-    except requests.RequestException as e:
-        raise HTTPException(status_code=500, detail=str(e))
-
-
-# Funkcja do parsowania pojedynczego wiersza z danych DataFrame
-def parse_row(row):
-    if pd.notna(row['latitude']) and pd.notna(row['longitude']):
-        if row['drop'] == 0:
-            return {"add_waypoint": [row['latitude'], row['longitude']], "delay": row['delay']}
-        elif row['drop'] == 1 and pd.notna(row['servo']):
-            if pd.notna(row['drop_delay']):
-                return {"add_waypoint": [row['latitude'], row['longitude']], "delay": row['delay'], 
-                        "set_servo": row['servo'], "drop_delay": row['drop_delay'], "servo_value_octa": row['servo_value_octa']}
-    elif pd.isna(row['latitude']) and pd.isna(row['longitude']) and pd.notna(row['delay']):
-        return {"delay": row['delay']}
-    return None
-
-# Funkcja do parsowania całego DataFrame
-def parse_dataframe(df):
-    results = []
-    for _, row in df.iterrows():
-        result = parse_row(row)
-        if result:
-            results.append(result)
-    return results
-
-# Endpoint do przetwarzania pliku JSON i obsługi misji
+        payload = model.model_validate(await request.json())
+    except json.JSONDecodeError as e:
+        # Taki sam błąd 422 jak dla parametru z modelem w sygnaturze endpointu
+        raise RequestValidationError([{"type": "json_invalid", "loc": ("body", e.pos), "msg": "JSON decode error",
+                                       "input": {}, "ctx": {"error": e.msg}}])
+    except ValidationError as e:
+        raise RequestValidationError(e.errors())
+    return await run_in_threadpool(prepare_mission, payload), payload
+
+
+# Endpoint do przetwarzania misji i jej wgrania - zwraca od razu id zadania.
+# Treść: JSON (DataFramePayload) albo binarna misja (MISSION_CONTENT_TYPE) z ip/port/height w parametrach.
 @app.post("/upload")
-async def upload(payload: DataFramePayload):
-    data = payload.data
-    if data:
-        pd.options.display.float_format = '{:.8f}'.format
-        df = pd.read_json(data, orient='split')
-        
-        ip, port = payload.ip, payload.port
-        height = payload.height
-        parsed_data = parse_dataframe(df)
+async def upload(request: Request, ip: Optional[str] = None, port: Optional[int] = None,
+                 height: Optional[int] = None, force: bool = False, simplify: Optional[float] = None):
+    mission, payload = await read_mission(request, DataFramePayload)
+    if payload is not None:
+        ip, port, height, force = payload.ip, payload.port, payload.height, payload.force
+        simplify = payload.simplify
+    elif ip is None or port is None or height is None:
+        raise HTTPException(status_code=400, detail="ip, port and height query parameters are required")
+
+    simplified = None
+    if simplify:
+        mission, simplified = await run_in_threadpool(simplify_mission, mission, simplify)
+    check_geofence(mission, height)
+
+    job = submit_upload(f'udpin:{ip}:{port}', mission, height, force)
+    return {"job_id": job.id, "state": job.state, "simplified": simplified}
+
+
+# Szacowanie długości trasy i czasu lotu misji (bez łączenia z pojazdem).
+# Treść jak w /upload: JSON (MissionStatsPayload) albo binarna misja z parametrami w zapytaniu.
+@app.post("/mission/stats")
+async def mission_statistics(request: Request, height: Optional[int] = None, speed: float = Query(5.0, gt=0),
+                             climb_rate: float = Query(2.5, gt=0), home_lat: Optional[float] = None,
+                             home_lon: Optional[float] = None, per_item: bool = True):
+    mission, payload = await read_mission(request, MissionStatsPayload)
+    if payload is not None:
+        height, speed, climb_rate = payload.height, payload.speed, payload.climb_rate
+        home_lat, home_lon, per_item = payload.home_lat, payload.home_lon, payload.per_item
+    elif height is None:
+        raise HTTPException(status_code=400, detail="height query parameter is required")
+
+    home = (home_lat, home_lon) if home_lat is not None and home_lon is not None else None
+    stats = mission_stats(mission, height, speed=speed, climb_rate=climb_rate, home=home)
+    legs, eta = stats.pop("legs"), stats.pop("eta")
+    if per_item:
+        stats["legs"] = legs.tolist()
+        stats["eta"] = eta.tolist()
+        stats["index"] = mission.index.tolist()
+    return stats
+
+
+# Import pliku misji (CSV, GPX, KML, QGC WPL, archiwum binarne) - treść zapytania to surowy plik.
+# Plik jest odbierany strumieniowo i parsowany jednym przejściem; odpowiedź to binarna misja (MISSION_CONTENT_TYPE).
+@app.post("/mission/import")
+async def mission_import(request: Request, filename: Optional[str] = None, format: Optional[str] = None):
+    try:
+        format = format or detect_format(filename)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    with tempfile.SpooledTemporaryFile(max_size=IMPORT_SPOOL_SIZE) as file:
+        async for chunk in request.stream():
+            file.write(chunk)
+        file.seek(0)
         try:
-            planner = MissionPlanner(f'udpin:{ip}:{port}')
-        except Exception as e:
-            return {"message": "Cannot communicate with vehicle: " + str(e)}, 400
-        
+            columns = await run_in_threadpool(import_mission, file, format)
+            payload = encode_columns(columns)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    return Response(payload, media_type=MISSION_CONTENT_TYPE,
+                    headers={"X-Mission-Rows": str(len(columns["latitude"]))})
+
+
+# Wgranie misji z archiwum binarnego (eksport ARCHIVE_CONTENT_TYPE) - bez parsowania i kompilacji
+@app.post("/upload/archive")
+async def upload_archive(request: Request, ip: str, port: int, force: bool = False):
+    try:
+        store = read_archive(await request.body())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    # Te same sprawdzenia co /upload - indeksy w odpowiedzi to seq elementów archiwum
+    mission, altitude = items_mission(store.items())
+    check_geofence(check_mission(mission), altitude)
+    job = submit_upload(f'udpin:{ip}:{port}', None, None, force, store)
+    return {"job_id": job.id, "state": job.state, "count": store.count()}
+
+
+# Odpowiedź strumieniowa z plikiem misji: QGC WPL (format=wpl) albo archiwum binarne (format=binary)
+def export_response(items, format, name):
+    if format == "wpl":
+        return StreamingResponse(iter_wpl(items), media_type="text/plain",
+                                 headers={"Content-Disposition": f'attachment; filename="{name}.waypoints"'})
+    if format == "binary":
+        return StreamingResponse(iter_archive(items), media_type=ARCHIVE_CONTENT_TYPE,
+                                 headers={"Content-Disposition": f'attachment; filename="{name}.{ARCHIVE_EXTENSION}"'})
+    raise HTTPException(status_code=400, detail=f"Unknown format {format}")
+
+
+# Eksport skompilowanej misji (takie elementy, jakie zostałyby wgrane) bez łączenia z pojazdem.
+# Treść jak w /upload: JSON (MissionExportPayload) albo binarna misja z height w parametrach.
+@app.post("/mission/export")
+async def mission_export(request: Request, format: str = "wpl", height: Optional[int] = None):
+    if format not in ("wpl", "binary"):
+        raise HTTPException(status_code=400, detail=f"Unknown format {format}")
+    mission, payload = await read_mission(request, MissionExportPayload)
+    if payload is not None:
+        height = payload.height
+    elif height is None:
+        raise HTTPException(status_code=400, detail="height query parameter is required")
+
+    planner = MissionPlanner(None, connect=False)
+    await run_in_threadpool(build_mission, planner, mission, height)
+    return export_response(planner.mission_items.items(), format, "mission")
+
+
+# Równoległe wgranie misji do kilku pojazdów - czas całości ~ czas najwolniejszego pojazdu
+@app.post("/upload-fleet")
+async def upload_fleet(payload: FleetPayload):
+    start = time.perf_counter()
+    missions = []
+    for number, vehicle in enumerate(payload.vehicles):
         try:
-            # Dodanie punktu startowego (takeoff)
-            planner.add_takeoff(altitude=height)
-            
-            # Przetwarzanie komend z parsowanego DataFrame
-            for command in parsed_data:
-                if ('add_waypoint' in command and 'delay' in command and 
-                    'set_servo' in command and 'drop_delay' in command):
-                    print(command)
-                    planner.add_waypoint(lat=command['add_waypoint'][0], lon=command['add_waypoint'][1], 
-                                         altitude=height, delay=command['delay'])
-                    planner.set_servo(servo_number=command['set_servo'], pwm=command['servo_value_octa'])
-                    planner.set_delay(delay_seconds=command['drop_delay'])
-                elif 'add_waypoint' in command and 'delay' in command:
-                    planner.add_waypoint(lat=command['add_waypoint'][0], lon=command['add_waypoint'][1], 
-                                         altitude=height, delay=command['delay'])
-                elif 'delay' in command:
-                    planner.set_delay(delay_seconds=command['delay'])
-                else:
-                    return {"message": f"Invalid data received: {command}"}, 400
-            
-            # Powrót do punktu startowego (RTL)
-            planner.add_return_to_launch()
-            
-            mission_upload_status = planner.upload_mission()
-            planner.close_connection()
-            if mission_upload_status == True:
-                return {"message": "Data received successfully"}
+            mission = await run_in_threadpool(prepare_mission, vehicle)
+            if vehicle.simplify:
+                mission, _ = await run_in_threadpool(simplify_mission, mission, vehicle.simplify)
+            check_geofence(mission, vehicle.height)
+        except HTTPException as e:
+            detail = {"vehicle": number, **e.detail} if isinstance(e.detail, dict) else f"Vehicle {number}: {e.detail}"
+            raise HTTPException(status_code=e.status_code, detail=detail)
+        missions.append(mission)
+
+    jobs = [submit_upload(f'udpin:{vehicle.ip}:{vehicle.port}', mission, vehicle.height, vehicle.force)
+            for vehicle, mission in zip(payload.vehicles, missions)]
+    await asyncio.gather(*(asyncio.wrap_future(job.future) for job in jobs))
+
+    return {"wall_time": time.perf_counter() - start,
+            "vehicles": [job.to_dict() for job in jobs]}
+
+
+# Aktualny obszar lotu
+@app.get("/geofence")
+def get_geofence():
+    return geofence.to_dict()
+
+
+# Ustawienie obszaru lotu - indeks przestrzenny budowany raz, tutaj
+@app.put("/geofence")
+def set_geofence(config: GeofenceConfig):
+    global geofence
+    try:
+        geofence = Geofence.from_dict(config.model_dump())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return geofence.to_dict()
+
+
+# Lista zadań wgrywania misji
+@app.get("/upload")
+def upload_jobs_status():
+    return [job.to_dict() for job in upload_jobs.jobs()]
+
+
+# Stan, postęp (seq z count) i wynik zadania wgrywania misji
+@app.get("/upload/{job_id}")
+def upload_job_status(job_id: str):
+    job = upload_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown upload job {job_id}")
+    return job.to_dict()
+
+
+# Oś czasu zadania wgrywania (połączenie, MISSION_COUNT, żądania i wysłane elementy, ACK).
+# t - sekundy od przyjęcia zadania, dropped - zdarzenia pominięte ponad limit śladu.
+@app.get("/upload/{job_id}/trace")
+def upload_job_trace(job_id: str):
+    job = upload_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown upload job {job_id}")
+    return {"job_id": job.id, "state": job.state, "events": job.trace.to_list(), "dropped": job.trace.dropped}
+
+
+# Zmiana poziomu dziennika zdarzeń (DEBUG włącza zdarzenia dla każdego elementu misji i beaconu)
+@app.put("/log-level")
+def set_log_level(level: str):
+    if level.upper() not in ("DEBUG", "INFO", "WARNING", "ERROR"):
+        raise HTTPException(status_code=400, detail=f"Unknown log level {level}")
+    event_log.set_level(level.upper())
+    return {"level": level.upper()}
+
+
+# Connection string pojazdu z adresu "ip:port" (tak jak w /upload)
+def vehicle_connection(conn: str):
+    return f'udpin:{conn}'
+
+
+# Funkcja do zamiany listy elementów misji na kolumny (lat/lon w stopniach)
+def mission_columns(items):
+    columns = {name: list(values) for name, values in zip(MISSION_FIELDS, zip(*items))}
+    if not items:
+        columns = {name: [] for name in MISSION_FIELDS}
+    columns["seq"] = list(range(len(items)))
+    columns["latitude"] = [x / 1e7 for x in columns.pop("x")]
+    columns["longitude"] = [y / 1e7 for y in columns.pop("y")]
+    columns["altitude"] = columns.pop("z")
+    return columns
+
+
+# Funkcja do pobrania misji z pojazdu. Pamięć podręczna jest używana tylko, gdy pojazd potwierdzi
+# niezmienioną misję identyfikatorem opaque_id (MAVLink 2). Pojazdy bez opaque_id nie zgłaszają zmian misji
+# wgranych przez inne stacje (liczba elementów nie wystarcza), więc misja jest wtedy zawsze pobierana.
+# Zwraca (elementy, czy z pamięci podręcznej).
+def onboard_mission(conn, refresh=False):
+    connection_string = vehicle_connection(conn)
+    try:
+        with connection_pool.connection(connection_string) as vehicle:
+            planner = MissionPlanner(connection_string, vehicle=vehicle)
+            cached = None if refresh else mission_cache.get(connection_string, vehicle, planner.read_mission_state)
+            if cached is None:
+                items = planner.read_current_mission()
+                mission_cache.store(connection_string, vehicle, items, planner.opaque_id)
             else:
-                return {"message": "Mission upload failed"}, 400
-            
-        except Exception as e:
-            return {"message": str(e)}, 400
+                items = cached[1]
+    except (TimeoutError, OSError) as e:
+        raise HTTPException(status_code=504, detail="Cannot communicate with vehicle: " + str(e))
+    return items, cached is not None
 
-    else:
-        return {"message": "No data received"}, 400
+
+# Pobranie misji z pojazdu jako kolumny (format=columns) albo DataFrame w orient='split'
+@app.get("/vehicles/{conn}/mission")
+def vehicle_mission(conn: str, format: str = "columns", refresh: bool = False):
+    if format not in ("columns", "split"):
+        raise HTTPException(status_code=400, detail=f"Unknown format {format}")
+    items, cached = onboard_mission(conn, refresh)
+
+    columns = mission_columns(items)
+    if format == "split":
+        return {"data": pd.DataFrame(columns).to_json(orient='split'), "cached": cached}
+    return {"count": len(items), "columns": columns, "cached": cached}
+
+
+# Eksport misji z pojazdu do pliku QGC WPL (format=wpl) albo archiwum binarnego (format=binary)
+@app.get("/vehicles/{conn}/mission/export")
+def vehicle_mission_export(conn: str, format: str = "wpl", refresh: bool = False):
+    if format not in ("wpl", "binary"):
+        raise HTTPException(status_code=400, detail=f"Unknown format {format}")
+    items, _ = onboard_mission(conn, refresh)
+    return export_response(items_array(items), format, f"vehicle_{conn.replace(':', '_')}")
+
+
+# Stan wszystkich obserwowanych pojazdów
+@app.get("/telemetry")
+def telemetry_snapshot():
+    return telemetry.snapshot()
+
+
+# Rozpoczęcie obserwowania pojazdu "ip:port" - czytnik w tle na połączeniu z puli (wspólnym z wgrywaniem)
+@app.post("/vehicles/{conn}/telemetry")
+def watch_vehicle(conn: str):
+    return telemetry.watch(vehicle_connection(conn)).to_dict()
+
+
+# Zakończenie obserwowania pojazdu
+@app.delete("/vehicles/{conn}/telemetry")
+def unwatch_vehicle(conn: str):
+    if telemetry.unwatch(vehicle_connection(conn)) is None:
+        raise HTTPException(status_code=404, detail=f"Vehicle {conn} is not watched")
+    return {"message": f"Vehicle {conn} no longer watched"}
+
+
+# Strumień telemetrii (Server-Sent Events): jeden komunikat JSON na zmianę stanu pojazdu.
+# vehicle - tylko ten pojazd ("ip:port"), bez parametru - wszystkie.
+@app.get("/telemetry/stream")
+async def telemetry_stream(vehicle: Optional[str] = None):
+    async def events():
+        with telemetry_clients.track("sse"):
+            async for text in telemetry.updates(vehicle_connection(vehicle) if vehicle else None):
+                yield ": keepalive\n\n" if text is None else f"data: {text}\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "Access-Control-Allow-Origin": "*"})
+
+
+# Strumień telemetrii przez WebSocket (te same komunikaty co w /telemetry/stream)
+@app.websocket("/telemetry/ws")
+async def telemetry_websocket(websocket: WebSocket, vehicle: Optional[str] = None):
+    await websocket.accept()
+
+    async def send():
+        async for text in telemetry.updates(vehicle_connection(vehicle) if vehicle else None):
+            if text is not None:
+                await websocket.send_text(text)
+
+    with telemetry_clients.track("websocket"):
+        sender = asyncio.create_task(send())
+        try:
+            # Odbiór tylko po to, żeby od razu wykryć rozłączenie klienta
+            while True:
+                await websocket.receive_text()
+        except WebSocketDisconnect:
+            pass
+        finally:
+            sender.cancel()
+
+
+# Metryki w formacie tekstowym Prometheusa
+@app.get("/metrics")
+def prometheus_metrics():
+    mavlink_connections_open.set(len(connection_pool.status()))
+    return Response(content=metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
 
 
 # Uruchomienie aplikacji
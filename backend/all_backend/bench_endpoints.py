@@ -0,0 +1,220 @@
+import argparse
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+from fastapi.testclient import TestClient
+
+import backend
+from bench_mission_compiler import make_mission
+from bench_mission_protocol import free_port
+from mission_compiler import compile_dataframe
+from sim_vehicle import SimVehicle
+
+# Adres zastępczego ESP32 (port losowy - ustawiany w klientach urządzeń backendu)
+DEVICE_IP = "127.0.0.1"
+
+# Regresja: mediana etapu wolniejsza niż TOLERANCE x mediana z pomiaru bazowego (+ SLACK s na szum
+# zegara przy etapach poniżej milisekundy). Etapy z mniej niż MIN_SAMPLES próbkami są tylko raportowane.
+TOLERANCE = 1.5
+SLACK = 0.0002
+MIN_SAMPLES = 30
+
+# Mediany zależą od maszyny, więc pomiar bazowy jest lokalny (poza repozytorium), osobny dla hosta,
+# architektury i wersji Pythona. Pierwsze uruchomienie na maszynie zapisuje go zamiast sprawdzać.
+BASELINE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "sztafeta")
+
+
+def default_baseline():
+    name = f"bench_baseline-{platform.node()}-{platform.machine()}-py{platform.python_version()}.json"
+    return os.path.join(BASELINE_DIR, name)
+
+
+class DeviceHandler(BaseHTTPRequestHandler):
+    # Zastępczy ESP32: przyjmuje POST i odpowiada "ok"
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True  # nagłówki i treść w osobnych zapisach - bez opóźnionego ACK
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self._reply(b'ok')
+
+    def do_GET(self):
+        self._reply(b'{"status": "ok"}')
+
+    def _reply(self, body):
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def summary(samples, items=None):
+    """
+    Funkcja do podsumowania czasów (s): p50, p99, średnia i przepustowość (na sekundę).
+    items - liczba elementów na próbkę (przepustowość w elementach/s zamiast operacji/s).
+    """
+    samples = np.asarray(samples, dtype=float)
+    mean = float(samples.mean())
+    return {
+        "n": len(samples),
+        "p50": float(np.percentile(samples, 50)),
+        "p99": float(np.percentile(samples, 99)),
+        "mean": mean,
+        "throughput": (items or 1) / mean if mean else None,
+    }
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def bench_mission(client, port, rows, repeat, results):
+    df = make_mission(rows)
+    data = df.to_json(orient='split')
+    results[f"parse[{rows}]"] = summary(timed(lambda: pd.read_json(io.StringIO(data), orient='split'), repeat), rows)
+    results[f"compile[{rows}]"] = summary(timed(lambda: compile_dataframe(df), repeat), rows)
+
+    request = {"data": data, "ip": "127.0.0.1", "port": port, "height": 30, "force": True}
+    stages = {"request": [], "connect_warm": [], "build": [], "transfer": []}
+    connect_cold = []
+    items = None
+    for attempt in range(repeat + 1):
+        cold = attempt < min(3, repeat)
+        if cold:
+            client.post("/connections/drain")
+        start = time.perf_counter()
+        response = client.post("/upload", json=request)
+        request_time = time.perf_counter() - start
+        job = backend.upload_jobs.get(response.json()["job_id"])
+        job.future.result()
+        if job.error is not None:
+            raise RuntimeError(f"Upload failed: {job.error}")
+        items = job.count
+        if cold:
+            connect_cold.append(job.timings["connect"])
+            continue
+        stages["request"].append(request_time)
+        stages["connect_warm"].append(job.timings["connect"])
+        stages["build"].append(job.timings["build"])
+        stages["transfer"].append(job.timings["transfer"])
+
+    results[f"upload_request[{rows}]"] = summary(stages["request"])
+    results[f"connect_cold[{rows}]"] = summary(connect_cold)
+    results[f"connect_warm[{rows}]"] = summary(stages["connect_warm"])
+    results[f"build[{rows}]"] = summary(stages["build"], items)
+    results[f"transfer[{rows}]"] = summary(stages["transfer"], items)
+
+
+def bench_beacons(client, repeat, results):
+    beacon = {"long": 20.88, "lat": 53.019, "altitude": 10.0, "delay": 300.0, "servo_value": 93, "ip": DEVICE_IP}
+
+    def send():
+        if client.post("/streamlit-coordinates", json=beacon).status_code != 200:
+            raise RuntimeError("Beacon send failed")
+
+    send()  # nawiązanie połączenia keep-alive
+    results["beacon"] = summary(timed(send, repeat))
+
+    batch = {"beacons": [beacon] * backend.BEACON_FAN_OUT}
+    results[f"beacon_batch[{backend.BEACON_FAN_OUT}]"] = summary(
+        timed(lambda: client.post("/streamlit-coordinates/batch", json=batch), repeat), backend.BEACON_FAN_OUT)
+
+
+def check_baseline(results, baseline, tolerance=TOLERANCE, slack=SLACK):
+    """
+    Funkcja do porównania median etapów z pomiarem bazowym {"etap": {"p50": s, "n": próbek}}.
+    Zwraca (przekroczenia, etapy pominięte z powodu zbyt małej liczby próbek).
+    """
+    failures, skipped = [], []
+    for stage, base in baseline.items():
+        if stage not in results:
+            continue
+        if min(base["n"], results[stage]["n"]) < MIN_SAMPLES:
+            skipped.append(stage)
+            continue
+        value, limit = results[stage]["p50"], base["p50"] * tolerance + slack
+        if value > limit:
+            failures.append(f"{stage} median {value * 1e3:.3f} ms > {limit * 1e3:.3f} ms "
+                            f"(baseline {base['p50'] * 1e3:.3f} ms)")
+    return failures, skipped
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark endpointów backendu (pojazd i ESP32 zastępcze)")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000], help="wierszy misji")
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--output", default=os.path.join(tempfile.gettempdir(), "bench_results.json"))
+    parser.add_argument("--baseline", default=default_baseline(),
+                        help="pomiar bazowy tej maszyny (domyślnie w ~/.cache/sztafeta)")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE,
+                        help="dopuszczalny stosunek mediany do mediany bazowej")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="zapisz wyniki jako pomiar bazowy zamiast sprawdzać")
+    args = parser.parse_args()
+
+    results = {}
+    port = free_port()
+    # Klient w bloku with: jedna pętla zdarzeń dla wszystkich zapytań (keep-alive do ESP32)
+    # Zdarzenia każdego wgrania zaśmiecałyby wyniki - tylko ostrzeżenia i błędy
+    backend.event_log.set_level("WARNING")
+    with TestClient(backend.app) as client:
+        with SimVehicle(port) as vehicle:
+            for rows in args.sizes:
+                print(f"mission {rows} rows", file=sys.stderr)
+                bench_mission(client, port, rows, args.repeat, results)
+            backend.connection_pool.drain()
+
+        server = ThreadingHTTPServer((DEVICE_IP, 0), DeviceHandler)
+        backend.device_clients.client_options["port"] = server.server_address[1]
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        print("beacons", file=sys.stderr)
+        bench_beacons(client, args.repeat, results)
+        server.shutdown()
+        server.server_close()
+
+    with open(args.output, "w") as file:
+        json.dump({"python": platform.python_version(), "machine": platform.machine(),
+                   "repeat": args.repeat, "link": vehicle.counters, "results": results}, file, indent=2)
+
+    print(f"{'stage':>22} {'p50 ms':>9} {'p99 ms':>9} {'per second':>11}")
+    for stage, result in results.items():
+        print(f"{stage:>22} {result['p50'] * 1e3:>9.2f} {result['p99'] * 1e3:>9.2f} {result['throughput']:>11,.0f}")
+
+    print(f"results written to {args.output}")
+
+    if args.update_baseline or not os.path.exists(args.baseline):
+        baseline = {stage: {"p50": round(result["p50"], 6), "n": result["n"]} for stage, result in results.items()}
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, "w") as file:
+            json.dump(baseline, file, indent=2)
+        print(f"baseline written to {args.baseline}")
+        return
+
+    with open(args.baseline) as file:
+        failures, skipped = check_baseline(results, json.load(file), args.tolerance)
+    if skipped:
+        print(f"not gated (fewer than {MIN_SAMPLES} samples): {', '.join(skipped)}")
+    for failure in failures:
+        print(f"SLOWER: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+import argparse
+import io
+import json
+import statistics
+import time
+
+import pandas as pd
+
+from bench_mission_compiler import make_mission
+from mission_codec import decode_mission, encode_mission
+from mission_compiler import compile_columns, compile_dataframe
+
+
+def decode_json(body):
+    # Ścieżka JSON: JSON w JSON-ie + pd.read_json
+    payload = json.loads(body)
+    df = pd.read_json(io.StringIO(payload["data"]), orient='split')
+    return compile_dataframe(df)
+
+
+def decode_binary(body):
+    return compile_columns(decode_mission(body))
+
+
+def median_time(fn, body, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(body)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark formatów misji dla /upload")
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    df = make_mission(args.rows)
+    json_body = json.dumps({"data": df.round(8).to_json(orient='split'),
+                            "ip": "127.0.0.1", "port": 14550, "height": 60}).encode()
+    binary_body = encode_mission(df)
+
+    json_time = median_time(decode_json, json_body, args.repeat)
+    binary_time = median_time(decode_binary, binary_body, args.repeat)
+
+    print(f"{args.rows} rows")
+    print(f"{'format':>8} {'bytes':>10} {'decode ms':>10}")
+    print(f"{'json':>8} {len(json_body):>10,} {json_time * 1e3:>10.2f}")
+    print(f"{'binary':>8} {len(binary_body):>10,} {binary_time * 1e3:>10.2f}")
+    print(f"size x{len(json_body) / len(binary_body):.1f} smaller, decode x{json_time / binary_time:.1f} faster")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from mission_compiler import compile_dataframe, emit_mission
+
+
+class CallCounter:
+    """
+    Zastępuje MissionPlanner - zlicza wywołania bez tworzenia wiadomości MAVLink.
+    """
+    def __init__(self):
+        self.calls = 0
+
+    def add_waypoint(self, lat, lon, altitude, delay=0):
+        self.calls += 1
+
+    def set_servo(self, servo_number, pwm):
+        self.calls += 1
+
+    def set_delay(self, delay_seconds):
+        self.calls += 1
+
+
+# Poprzednia ścieżka (iterrows + parse_row + słowniki) - tylko do porównania
+def legacy_parse_row(row):
+    if pd.notna(row['latitude']) and pd.notna(row['longitude']):
+        if row['drop'] == 0:
+            return {"add_waypoint": [row['latitude'], row['longitude']], "delay": row['delay']}
+        elif row['drop'] == 1 and pd.notna(row['servo']):
+            if pd.notna(row['drop_delay']):
+                return {"add_waypoint": [row['latitude'], row['longitude']], "delay": row['delay'],
+                        "set_servo": row['servo'], "drop_delay": row['drop_delay'], "servo_value_octa": row['servo_value_octa']}
+    elif pd.isna(row['latitude']) and pd.isna(row['longitude']) and pd.notna(row['delay']):
+        return {"delay": row['delay']}
+    return None
+
+
+def legacy_compile(df, planner, height):
+    parsed_data = [result for _, row in df.iterrows() if (result := legacy_parse_row(row))]
+    for command in parsed_data:
+        if ('add_waypoint' in command and 'delay' in command and
+                'set_servo' in command and 'drop_delay' in command):
+            planner.add_waypoint(lat=command['add_waypoint'][0], lon=command['add_waypoint'][1],
+                                 altitude=height, delay=command['delay'])
+            planner.set_servo(servo_number=command['set_servo'], pwm=command['servo_value_octa'])
+            planner.set_delay(delay_seconds=command['drop_delay'])
+        elif 'add_waypoint' in command and 'delay' in command:
+            planner.add_waypoint(lat=command['add_waypoint'][0], lon=command['add_waypoint'][1],
+                                 altitude=height, delay=command['delay'])
+        elif 'delay' in command:
+            planner.set_delay(delay_seconds=command['delay'])
+
+
+def vectorized_compile(df, planner, height):
+    emit_mission(compile_dataframe(df).valid(), planner, height)
+
+
+def make_mission(rows, seed=0):
+    """
+    Funkcja do wygenerowania misji: ~80% punktów, ~10% zrzutów, ~10% opóźnień.
+    """
+    rng = np.random.default_rng(seed)
+    kind = rng.choice(3, size=rows, p=[0.8, 0.1, 0.1])
+    is_delay = kind == 2
+    is_drop = kind == 1
+    lat = 53.019 + rng.random(rows) * 0.01
+    lon = 20.880 + rng.random(rows) * 0.01
+    lat[is_delay] = np.nan
+    lon[is_delay] = np.nan
+    return pd.DataFrame({
+        'latitude': lat,
+        'longitude': lon,
+        'altitude': np.where(is_delay, np.nan, 10.0),
+        'delay': rng.integers(0, 10, rows).astype(float),
+        'drop': np.where(is_delay, np.nan, is_drop.astype(float)),
+        'servo': np.where(is_drop, 1.0, np.nan),
+        'servo_value_octa': np.where(is_drop, 1500.0, np.nan),
+        'drop_delay': np.where(is_drop, 2.0, np.nan),
+    })
+
+
+def rows_per_second(compile_fn, df):
+    planner = CallCounter()
+    start = time.perf_counter()
+    compile_fn(df, planner, 60)
+    elapsed = time.perf_counter() - start
+    return len(df) / elapsed, planner.calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark kompilatora misji")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 10_000, 1_000_000])
+    parser.add_argument("--legacy-limit", type=int, default=100_000,
+                        help="maks. liczba wierszy dla starej ścieżki (koszt jest liniowy)")
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'legacy rows/s':>15} {'vectorized rows/s':>18} {'speedup':>9}")
+    for rows in args.sizes:
+        df = make_mission(rows)
+        legacy_rate, legacy_calls = rows_per_second(legacy_compile, df.iloc[:args.legacy_limit])
+        fast_rate, fast_calls = rows_per_second(vectorized_compile, df)
+        if rows <= args.legacy_limit:
+            assert legacy_calls == fast_calls
+        print(f"{rows:>10} {legacy_rate:>15,.0f} {fast_rate:>18,.0f} {fast_rate / legacy_rate:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
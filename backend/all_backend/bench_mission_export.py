@@ -0,0 +1,64 @@
+import argparse
+import io
+import json
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from bench_mission_compiler import make_mission
+from createmission import MissionPlanner
+from mission_compiler import compile_dataframe, emit_mission
+from mission_export import ARCHIVE_EXTENSION, iter_wpl, load_archive, write_archive
+
+
+def build_from_json(body, height):
+    # Dotychczasowa ścieżka ponownego wgrania: JSON -> pandas -> kompilacja -> elementy misji
+    payload = json.loads(body)
+    mission = compile_dataframe(pd.read_json(io.StringIO(payload["data"]), orient='split'))
+    planner = MissionPlanner(None, connect=False)
+    planner.add_takeoff(altitude=height)
+    emit_mission(mission, planner, height)
+    planner.add_return_to_launch()
+    planner.mission_items.prepare(1, 1)
+    return planner.mission_items
+
+
+def build_from_archive(path):
+    store = load_archive(path)
+    store.prepare(1, 1)
+    return store
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark eksportu i ponownego wczytania misji")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000, 10_000, 50_000],
+                        help="wierszy misji (MAVLink pozwala na najwyżej 65535 elementów)")
+    args = parser.parse_args()
+
+    print(f"{'rows':>8} {'items':>8} {'json reload ms':>15} {'archive reload ms':>18} "
+          f"{'wpl export ms':>14} {'archive kB':>11}")
+    with tempfile.TemporaryDirectory() as directory:
+        for rows in args.rows:
+            body = json.dumps({"data": make_mission(rows).to_json(orient='split'), "height": 60})
+            json_time, store = timed(build_from_json, body, 60)
+
+            path = os.path.join(directory, f"{rows}.{ARCHIVE_EXTENSION}")
+            write_archive(path, store.items())
+            archive_time, loaded = timed(build_from_archive, path)
+            assert loaded.fields() == store.fields()
+
+            wpl_time, _ = timed(lambda: sum(len(chunk) for chunk in iter_wpl(store.items())))
+            print(f"{rows:>8} {store.count():>8} {json_time * 1e3:>15.1f} {archive_time * 1e3:>18.2f} "
+                  f"{wpl_time * 1e3:>14.1f} {os.path.getsize(path) / 1e3:>11.0f}")
+
+
+if __name__ == "__main__":
+    main()
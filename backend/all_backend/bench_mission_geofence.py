@@ -0,0 +1,74 @@
+import argparse
+import time
+
+import numpy as np
+
+from mission_compiler import ROW_WAYPOINT, CompiledMission
+from mission_geofence import Geofence
+
+# Obszar zawodów w kształcie litery U (wklęsły) ze strefą zakazaną w środku
+AREA = [(53.0185, 20.8795), (53.0185, 20.8905), (53.0295, 20.8905), (53.0295, 20.8860),
+        (53.0210, 20.8860), (53.0210, 20.8845), (53.0295, 20.8845), (53.0295, 20.8795)]
+NO_FLY = [(53.0200, 20.8830), (53.0200, 20.8840), (53.0205, 20.8835)]
+
+
+def make_path(points, step=5.0, seed=0):
+    """
+    Funkcja do wygenerowania trasy jako błądzenia losowego (krok ~step m) wewnątrz prostokąta obszaru.
+    """
+    rng = np.random.default_rng(seed)
+    angle = rng.random(points) * 2 * np.pi
+    lat = 53.024 + np.cumsum(np.sin(angle)) * step / 111_000
+    lon = 20.885 + np.cumsum(np.cos(angle)) * step / 67_000
+    # Odbicie od brzegów prostokąta 53.0185-53.0295 x 20.8795-20.8905
+    lat = 53.0185 + np.abs((lat - 53.0185) % 0.022 - 0.011)
+    lon = 20.8795 + np.abs((lon - 20.8795) % 0.022 - 0.011)
+    nan = np.full(points, np.nan)
+    return CompiledMission(np.full(points, ROW_WAYPOINT, dtype=np.int8), lat, lon,
+                           nan, nan, nan, nan, np.arange(points))
+
+
+def legacy_inside(lat, lon, polygon):
+    # Test promienia punkt po punkcie w czystym Pythonie
+    inside = False
+    for (ay, ax), (by, bx) in zip(polygon, polygon[1:] + polygon[:1]):
+        if (ay > lat) != (by > lat) and lon < ax + (lat - ay) * (bx - ax) / (by - ay):
+            inside = not inside
+    return inside
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark walidacji misji względem geofence")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    geofence = Geofence(include=[AREA], exclude=[NO_FLY], min_altitude=5, max_altitude=120)
+    print(f"index build {(time.perf_counter() - start) * 1e3:.2f} ms")
+
+    print(f"{'points':>10} {'check ms':>9} {'points/s':>14} {'legacy points/s':>16} {'outside':>8} {'legs':>7}")
+    for points in args.sizes:
+        mission = make_path(points)
+        times = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            report = geofence.check(mission, 60)
+            times.append(time.perf_counter() - start)
+        best = min(times)
+
+        # Stara ścieżka (tylko punkty, bez odcinków) na próbce - koszt jest liniowy
+        sample = min(points, 10_000)
+        start = time.perf_counter()
+        legacy = [legacy_inside(lat, lon, AREA)
+                  for lat, lon in zip(mission.latitude[:sample].tolist(), mission.longitude[:sample].tolist())]
+        legacy_rate = sample / (time.perf_counter() - start)
+        assert [not inside for inside in legacy] == \
+            np.isin(np.arange(sample), report["outside"]).tolist()
+
+        print(f"{points:>10} {best * 1e3:>9.2f} {points / best:>14,.0f} {legacy_rate:>16,.0f} "
+              f"{len(report['outside']):>8} {len(report['legs']):>7}")
+
+
+if __name__ == "__main__":
+    main()
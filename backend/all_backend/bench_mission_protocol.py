@@ -0,0 +1,82 @@
+import argparse
+import socket
+import time
+
+from pymavlink import mavutil
+
+from createmission import MissionPlanner
+from sim_vehicle import SimVehicle
+
+# Warunki łącza: idealne, typowe radio telemetryczne i radio z zakłóceniami
+SCENARIOS = {
+    "loopback": {},
+    "legacy": {"legacy": True},
+    "radio": {"latency": 0.02, "jitter": 0.01},
+    "lossy": {"latency": 0.02, "jitter": 0.01, "loss": 0.02},
+    "messy": {"latency": 0.02, "jitter": 0.01, "loss": 0.02, "duplicate": 0.05, "reorder": 0.05},
+}
+
+
+def free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as probe:
+        probe.bind(('127.0.0.1', 0))
+        return probe.getsockname()[1]
+
+
+def run_scenario(items, seed, **link):
+    """
+    Funkcja do wgrania i pobrania misji z `items` punktami przez symulowany pojazd.
+    Zwraca słownik z przepustowością (elementy/s) i statystykami obu transferów.
+    """
+    port = free_port()
+    with SimVehicle(port, seed=seed, **link) as vehicle:
+        connection = mavutil.mavlink_connection(f'udpin:127.0.0.1:{port}')
+        try:
+            if connection.wait_heartbeat(timeout=5) is None:
+                raise TimeoutError("No heartbeat from simulated vehicle")
+            planner = MissionPlanner(f'udpin:127.0.0.1:{port}', vehicle=connection)
+            for seq in range(items):
+                planner.add_waypoint(lat=53.019 + seq * 1e-5, lon=20.880, altitude=30, delay=0)
+
+            uploaded = planner.upload_mission(mission_timeout=120.0)
+            stats = planner.transfer_stats
+
+            start = time.monotonic()
+            try:
+                downloaded = planner.read_current_mission(mission_timeout=120.0)
+            except TimeoutError:
+                downloaded = None
+            download_time = time.monotonic() - start
+        finally:
+            connection.close()
+
+    return {
+        "upload_ok": uploaded,
+        "upload_items_per_second": stats["items_per_second"],
+        "upload_duplicates": stats["duplicates"],
+        "download_ok": downloaded == planner.mission_fields(),
+        "download_items_per_second": items / download_time if downloaded is not None else 0.0,
+        "lost": vehicle.counters["lost"],
+        "re_requests": vehicle.counters["re_requests"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark protokołu misji na symulowanym pojeździe")
+    parser.add_argument("--items", type=int, default=200)
+    parser.add_argument("--scenarios", nargs="+", default=list(SCENARIOS), choices=list(SCENARIOS))
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"{args.items} items")
+    print(f"{'link':>9} {'upload':>7} {'up items/s':>11} {'dup':>5} {'download':>9} {'down items/s':>13} "
+          f"{'lost':>5} {'re-req':>7}")
+    for name in args.scenarios:
+        result = run_scenario(args.items, args.seed, **SCENARIOS[name])
+        print(f"{name:>9} {str(result['upload_ok']):>7} {result['upload_items_per_second']:>11.1f} "
+              f"{result['upload_duplicates']:>5} {str(result['download_ok']):>9} "
+              f"{result['download_items_per_second']:>13.1f} {result['lost']:>5} {result['re_requests']:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import argparse
+import time
+import tracemalloc
+
+from pymavlink import mavutil, mavwp
+
+from mission_store import MissionStore
+
+
+class NullFile:
+    def write(self, buf):
+        pass
+
+
+def waypoint(seq):
+    return (mavutil.mavlink.MAV_FRAME_GLOBAL_RELATIVE_ALT, 82, 0, 1,
+            0.0, 0, 0, 0, 530190701 + seq, 208802902 + seq, 60.0)
+
+
+def build_loader(count):
+    # Poprzednia reprezentacja: lista obiektów MAVLink w MAVWPLoader
+    loader = mavwp.MAVWPLoader()
+    for seq in range(count):
+        frame, command, current, autocontinue, p1, p2, p3, p4, x, y, z = waypoint(seq)
+        loader.add(mavutil.mavlink.MAVLink_mission_item_int_message(
+            0, 0, 0, frame, command, current, autocontinue, p1, p2, p3, p4, x, y, z))
+    return loader
+
+
+def build_store(count):
+    store = MissionStore()
+    for seq in range(count):
+        store.append(*waypoint(seq))
+    return store
+
+
+def serve_loader(loader, mav):
+    for seq in range(loader.count()):
+        item = loader.wp(seq)
+        item.target_system = 1
+        item.target_component = 1
+        mav.send(item)
+
+
+def serve_store(store, mav):
+    store.prepare(1, 1)
+    for seq in range(store.count()):
+        mav.send(store.packed(seq))
+
+
+def measure(build, serve, count):
+    tracemalloc.start()
+    start = time.perf_counter()
+    mission = build(count)
+    build_time = time.perf_counter() - start
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    mav = mavutil.mavlink.MAVLink(NullFile(), 255, 0)
+    start = time.perf_counter()
+    serve(mission, mav)
+    serve_time = time.perf_counter() - start
+    return memory / count, build_time / count * 1e6, serve_time / count * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mikro-benchmark reprezentacji misji")
+    parser.add_argument("--items", type=int, default=10_000)
+    args = parser.parse_args()
+
+    # Obie reprezentacje muszą dawać identyczne bajty na łączu
+    loader, store = build_loader(3), build_store(3)
+    store.prepare(1, 1)
+    for seq in range(3):
+        item = loader.wp(seq)
+        item.target_system = item.target_component = 1
+        assert item.pack(mavutil.mavlink.MAVLink(NullFile(), 255, 0)) == \
+            store.packed(seq).pack(mavutil.mavlink.MAVLink(NullFile(), 255, 0))
+
+    print(f"{args.items} items")
+    print(f"{'store':>12} {'bytes/item':>11} {'build us/item':>14} {'serve us/item':>14}")
+    for name, build, serve in (("MAVWPLoader", build_loader, serve_loader),
+                               ("MissionStore", build_store, serve_store)):
+        memory, build_time, serve_time = measure(build, serve, args.items)
+        print(f"{name:>12} {memory:>11,.0f} {build_time:>14.2f} {serve_time:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
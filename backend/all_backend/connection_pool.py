@@ -0,0 +1,162 @@
+import threading
+import time
+from contextlib import contextmanager
+
+from pymavlink import mavutil
+
+
+class PooledConnection:
+    def __init__(self, connection_string, vehicle):
+        """
+        Otwarte połączenie MAVLink trzymane w puli.
+        """
+        self.connection_string = connection_string
+        self.vehicle = vehicle
+        self.lock = threading.Lock()
+        self.last_used = time.monotonic()
+
+    def drain_messages(self):
+        """
+        Odczytuje zaległe wiadomości z gniazda (m.in. odświeża czas ostatniego HEARTBEAT).
+        """
+        while self.vehicle.recv_match(blocking=False) is not None:
+            pass
+
+    def heartbeat_age(self):
+        return self.vehicle.time_since('HEARTBEAT')
+
+    def close(self):
+        self.vehicle.close()
+
+
+class ConnectionPool:
+    def __init__(self, idle_timeout=300.0, heartbeat_timeout=5.0, connect_timeout=10.0):
+        """
+        Pula połączeń mavutil według connection stringa.
+        idle_timeout - po ilu sekundach bez użycia połączenie jest zamykane,
+        heartbeat_timeout - maksymalny wiek ostatniego HEARTBEAT dla żywego połączenia,
+        connect_timeout - czas oczekiwania na HEARTBEAT przy nowym połączeniu.
+        """
+        self.idle_timeout = idle_timeout
+        self.heartbeat_timeout = heartbeat_timeout
+        self.connect_timeout = connect_timeout
+        self._connections = {}
+        self._open_locks = {}
+        self._lock = threading.Lock()
+
+    def _open(self, connection_string):
+        vehicle = mavutil.mavlink_connection(connection_string)
+        if vehicle.wait_heartbeat(timeout=self.connect_timeout) is None:
+            vehicle.close()
+            raise TimeoutError(f"No heartbeat from {connection_string} within {self.connect_timeout}s")
+        return PooledConnection(connection_string, vehicle)
+
+    def _ensure_alive(self, pooled):
+        pooled.drain_messages()
+        if pooled.heartbeat_age() <= self.heartbeat_timeout:
+            return True
+        # Brak świeżego HEARTBEAT - dajemy pojazdowi jeszcze jedną szansę
+        return pooled.vehicle.wait_heartbeat(timeout=self.heartbeat_timeout) is not None
+
+    def evict_idle(self):
+        """
+        Zamyka połączenia nieużywane dłużej niż idle_timeout.
+        """
+        now = time.monotonic()
+        with self._lock:
+            idle = [pooled for pooled in self._connections.values()
+                    if now - pooled.last_used > self.idle_timeout and not pooled.lock.locked()]
+            for pooled in idle:
+                del self._connections[pooled.connection_string]
+        for pooled in idle:
+            pooled.close()
+        return len(idle)
+
+    def _discard(self, pooled):
+        with self._lock:
+            if self._connections.get(pooled.connection_string) is pooled:
+                del self._connections[pooled.connection_string]
+        pooled.close()
+
+    @contextmanager
+    def connection(self, connection_string):
+        """
+        Wypożycza połączenie z puli (nowe tylko gdy brak żywego).
+        Błąd w trakcie użycia zamyka połączenie (przerwanie, np. KeyboardInterrupt, go nie zamyka).
+        """
+        self.evict_idle()
+        with self._lock:
+            open_lock = self._open_locks.setdefault(connection_string, threading.Lock())
+        # Otwieranie nowego połączenia nie blokuje puli dla innych pojazdów
+        with open_lock:
+            with self._lock:
+                pooled = self._connections.get(connection_string)
+                if pooled is not None:
+                    pooled.last_used = time.monotonic()
+            if pooled is None:
+                pooled = self._open(connection_string)
+                with self._lock:
+                    self._connections[connection_string] = pooled
+
+        with pooled.lock:
+            if not self._ensure_alive(pooled):
+                self._discard(pooled)
+                raise TimeoutError(f"Vehicle at {connection_string} stopped sending heartbeats")
+            try:
+                yield pooled.vehicle
+            except Exception:
+                self._discard(pooled)
+                raise
+            finally:
+                pooled.last_used = time.monotonic()
+
+    def is_open(self, connection_string):
+        """
+        Czy pula ma już połączenie z pojazdem (kolejne wypożyczenie nie czeka na pierwszy HEARTBEAT).
+        """
+        with self._lock:
+            return connection_string in self._connections
+
+    def poll(self, connection_string, fn=None):
+        """
+        Odczyt połączenia bez czekania (np. telemetria): jeśli nikt go nie używa, odbiera zaległe
+        wiadomości i woła fn(vehicle); w trakcie wgrania tylko zwraca połączenie - ostatnie
+        wiadomości są i tak w vehicle.messages. Zwraca None, gdy połączenia nie ma w puli.
+        """
+        with self._lock:
+            pooled = self._connections.get(connection_string)
+        if pooled is None:
+            return None
+        if pooled.lock.acquire(blocking=False):
+            try:
+                pooled.drain_messages()
+                if fn is not None:
+                    fn(pooled.vehicle)
+                pooled.last_used = time.monotonic()
+            finally:
+                pooled.lock.release()
+        return pooled.vehicle
+
+    def status(self):
+        """
+        Stan połączeń w puli.
+        """
+        now = time.monotonic()
+        with self._lock:
+            connections = list(self._connections.values())
+        return [{"connection": pooled.connection_string,
+                 "in_use": pooled.lock.locked(),
+                 "idle_seconds": round(now - pooled.last_used, 3),
+                 "heartbeat_age": round(pooled.heartbeat_age(), 3)}
+                for pooled in connections]
+
+    def drain(self):
+        """
+        Zamyka wszystkie połączenia w puli.
+        """
+        with self._lock:
+            connections = list(self._connections.values())
+            self._connections.clear()
+        for pooled in connections:
+            pooled.close()
+        return len(connections)
@@ -1,15 +1,34 @@
-from pymavlink import mavutil, mavwp
+import logging
+import time
+
+from pymavlink import mavutil
+
+from event_log import EventLogger
+from mission_store import MissionStore
+
+log = EventLogger("mission")
+
+# Kolejność pól w krotkach zwracanych przez mission_fields() i read_current_mission()
+MISSION_FIELDS = ('frame', 'command', 'current', 'autocontinue',
+                  'param1', 'param2', 'param3', 'param4', 'x', 'y', 'z')
+
 
 class MissionPlanner:
-    def __init__(self, connection_string):
+    def __init__(self, connection_string, vehicle=None, connect=True):
         """
         Inicjalizacja klasy MissionPlanner.
+        Można przekazać już otwarte połączenie (np. z puli) - wtedy nie czekamy na HEARTBEAT.
+        connect=False - planowanie misji bez pojazdu (np. eksport do pliku).
         """
         self.connection_string = connection_string
         # self.vehicle = self.connect_to_vehicle()
-        self.mission_items = mavwp.MAVWPLoader()
-        self.vehicle = mavutil.mavlink_connection(self.connection_string)
-        self.vehicle.wait_heartbeat()
+        self.mission_items = MissionStore()
+        # Identyfikator misji na pojeździe (opaque_id z MISSION_COUNT/MISSION_ACK, MAVLink 2); 0 - nieznany
+        self.opaque_id = 0
+        if vehicle is None and connect:
+            vehicle = mavutil.mavlink_connection(self.connection_string)
+            vehicle.wait_heartbeat()
+        self.vehicle = vehicle
         # self.wp = 
     
     def create_takeoff_command(self, altitude):
@@ -74,7 +93,8 @@ class MissionPlanner:
         """
         Dodaje komendę WAYPOINT do misji z opcjonalnym opóźnieniem.
         """
-        self.mission_items.add(self.create_waypoint_command(lat, lon, altitude, delay))
+        self.mission_items.append(mavutil.mavlink.MAV_FRAME_GLOBAL_RELATIVE_ALT, 82, 0, 1,
+                                  delay, 0, 0, 0, int(lat * 1e7), int(lon * 1e7), altitude)
 
     def add_do_set_servo(self, servo_number, pwm_value, duration=0):
         """
@@ -90,50 +110,218 @@ class MissionPlanner:
 
     
     
-    def read_current_mission(self):
-        self.vehicle.waypoint_request_list_send()
-        waypoint_count = 0
-
-        msg = self.vehicle.recv_match(type=['MISSION_COUNT'], blocking=True)
-        waypoint_count = msg.count
-        print(waypoint_count)
-
-        for i in range(waypoint_count):
-            self.vehicle.waypoint_request_send(i)
-            msg = self.vehicle.recv_match(type=['MISSION_ITEM'], blocking=True)
-            print(f'Receiving waypoint {msg.seq} ----------')
-            print(msg)
-            print('\n')
-
-        self.vehicle.mav.mission_ack_send(self.vehicle.target_system, self.vehicle.target_component, 0)  
+    def _request_count(self, item_timeout, retries, deadline):
+        msg = None
+        for attempt in range(retries + 1):
+            self.vehicle.waypoint_request_list_send()
+            msg = self.vehicle.recv_match(type=['MISSION_COUNT'], blocking=True,
+                                          timeout=min(item_timeout, max(0.0, deadline - time.monotonic())))
+            if msg is not None:
+                break
+        if msg is None:
+            raise TimeoutError("No MISSION_COUNT from vehicle")
+        self.opaque_id = getattr(msg, 'opaque_id', 0)
+        return msg.count
+
+    def read_mission_state(self, item_timeout=1.0, retries=3):
+        """
+        Funkcja do odczytania liczby elementów i identyfikatora misji na pojeździe
+        (MISSION_REQUEST_LIST -> MISSION_COUNT) bez pobierania elementów - pobieranie kończymy
+        od razu przez MISSION_ACK. Zwraca (liczba, opaque_id); rzuca TimeoutError, gdy pojazd nie odpowiada.
+        """
+        count = self._request_count(item_timeout, retries, time.monotonic() + item_timeout * (retries + 1))
+        self.vehicle.mav.mission_ack_send(self.vehicle.target_system, self.vehicle.target_component,
+                                          mavutil.mavlink.MAV_MISSION_ACCEPTED)
+        return count, self.opaque_id
+
+    def read_current_mission(self, item_timeout=1.0, mission_timeout=60.0, retries=3, window=8):
+        """
+        Funkcja do pobrania misji z pojazdu protokołem MISSION_REQUEST_INT.
+        Wysyła do `window` żądań naraz i ponawia żądania brakujących seq po item_timeout.
+        Zwraca listę krotek w formacie mission_fields() albo rzuca TimeoutError.
+        """
+        deadline = time.monotonic() + mission_timeout
+        waypoint_count = self._request_count(item_timeout, retries, deadline)
+
+        items = [None] * waypoint_count
+        missing = list(range(waypoint_count))
+        missed = 0
+        while missing:
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"Mission download timed out, missing seq {missing}")
+            for seq in missing[:window]:
+                self.vehicle.mav.mission_request_int_send(
+                    self.vehicle.target_system, self.vehicle.target_component, seq)
+
+            received = False
+            requested = set(missing[:window])
+            while requested:
+                msg = self.vehicle.recv_match(type=['MISSION_ITEM_INT', 'MISSION_ITEM'], blocking=True,
+                                              timeout=min(item_timeout, max(0.0, deadline - time.monotonic())))
+                if msg is None:
+                    break
+                if msg.seq >= waypoint_count or items[msg.seq] is not None:
+                    continue
+                x, y = msg.x, msg.y
+                if msg.get_type() == 'MISSION_ITEM':
+                    x, y = int(x * 1e7), int(y * 1e7)
+                items[msg.seq] = (msg.frame, msg.command, msg.current, msg.autocontinue,
+                                  msg.param1, msg.param2, msg.param3, msg.param4, x, y, msg.z)
+                requested.discard(msg.seq)
+                received = True
+
+            missing = [seq for seq in missing if items[seq] is None]
+            missed = 0 if received else missed + 1
+            if missed > retries:
+                raise TimeoutError(f"Vehicle stopped answering, missing seq {missing}")
+
+        self.vehicle.mav.mission_ack_send(self.vehicle.target_system, self.vehicle.target_component,
+                                          mavutil.mavlink.MAV_MISSION_ACCEPTED)
+        return items
     
-    def upload_mission(self):
+    def mission_fields(self):
         """
-        Funkcja do wgrania misji do pojazdu.
+        Zawartość misji jako lista krotek (do porównywania i hashowania).
         """
-        self.vehicle.waypoint_clear_all_send()
-        
-        self.vehicle.waypoint_count_send(self.mission_items.count())
-
-        for i in range(self.mission_items.count()):
-            msg = self.vehicle.recv_match(type=['MISSION_REQUEST'], blocking=True)
-            self.vehicle.mav.send(self.mission_items.wp(msg.seq))
-            print(self.mission_items.wp(msg.seq))
-            
-        msg = self.vehicle.recv_match(type=['MISSION_ACK'], blocking=True)  # OKAY
-        
-        if msg == 0:
-            return True
+        return self.mission_items.fields()
+
+    def upload_mission(self, progress=None, item_timeout=2.0, mission_timeout=60.0, retries=3,
+                       start_index=None, end_index=None, trace=None):
+        """
+        Funkcja do wgrania misji do pojazdu (maszyna stanów protokołu misji).
+        Odpowiada na każde żądane seq (także powtórzone i nie po kolei), ponawia MISSION_COUNT
+        gdy pojazd milczy, kończy się po MISSION_ACK z wynikiem MAV_MISSION_RESULT.
+        progress - opcjonalna funkcja progress(seq, count) wołana po wysłaniu elementu,
+        item_timeout - maksymalny czas oczekiwania na kolejną wiadomość od pojazdu,
+        mission_timeout - maksymalny czas całego transferu,
+        retries - ile razy z rzędu można przekroczyć item_timeout,
+        start_index, end_index - jeśli podane, wysyłany jest tylko ten zakres
+        (MISSION_WRITE_PARTIAL_LIST) - liczba elementów misji musi być bez zmian,
+        trace - opcjonalny EventTrace na oś czasu transferu (żądania, wysłane elementy, ACK).
+        Wynik w self.upload_result, statystyki transferu w self.transfer_stats.
+        """
+        count = self.mission_items.count()
+        partial = start_index is not None
+        if partial:
+            expected = range(start_index, end_index + 1)
         else:
-            return False
-        
+            expected = range(count)
+
+        def send_start():
+            if partial:
+                self.vehicle.mav.mission_write_partial_list_send(
+                    self.vehicle.target_system, self.vehicle.target_component, start_index, end_index)
+            else:
+                # MISSION_COUNT zastępuje całą misję - osobne czyszczenie nie jest potrzebne
+                self.vehicle.waypoint_count_send(count)
+            if trace is not None:
+                trace.add("partial_sent" if partial else "count_sent", start=expected.start, end=expected.stop - 1)
+
+        # Zdarzenia dla każdego elementu tylko przy włączonym poziomie DEBUG
+        debug = log.enabled(logging.DEBUG)
+
+        # Ładunki elementów pakowane raz - żądanie to tylko wybranie bufora i wysłanie
+        self.mission_items.prepare(self.vehicle.target_system, self.vehicle.target_component)
+
+        start = time.monotonic()
+        deadline = start + mission_timeout
+        send_start()
+        last_sent = start
+        sent = set()
+        latencies = []
+        requests = duplicates = count_retries = timeouts = 0
+        missed = 0
+        first_request = ack_wait = None
+        self.upload_result = None
+
+        while self.upload_result is None:
+            now = time.monotonic()
+            if now >= deadline:
+                self.upload_result = "TIMEOUT"
+                break
+
+            msg = self.vehicle.recv_match(type=['MISSION_REQUEST', 'MISSION_REQUEST_INT', 'MISSION_ACK'],
+                                          blocking=True, timeout=min(item_timeout, deadline - now))
+            if msg is None:
+                timeouts += 1
+                missed += 1
+                if trace is not None:
+                    trace.add("timeout", sent=len(sent))
+                if missed > retries:
+                    self.upload_result = "TIMEOUT"
+                elif not sent:
+                    # Pojazd nie odebrał MISSION_COUNT - wysyłamy ponownie
+                    send_start()
+                    count_retries += 1
+                    last_sent = time.monotonic()
+                continue
+            missed = 0
+
+            if msg.get_type() == 'MISSION_ACK':
+                if trace is not None:
+                    trace.add("ack", type=msg.type)
+                if msg.type != mavutil.mavlink.MAV_MISSION_ACCEPTED:
+                    # Kod spoza znanego słownika (nowszy autopilot) zgłaszamy numerem
+                    result = mavutil.mavlink.enums['MAV_MISSION_RESULT'].get(msg.type)
+                    self.upload_result = result.name if result else f"MAV_MISSION_RESULT_{msg.type}"
+                elif len(sent) == len(expected):
+                    self.upload_result = 'MAV_MISSION_ACCEPTED'
+                    self.opaque_id = getattr(msg, 'opaque_id', 0)
+                    ack_wait = time.monotonic() - last_sent
+                    latencies.append(ack_wait)
+                # ACCEPTED przed wysłaniem wszystkich elementów to stare potwierdzenie - pomijamy
+                continue
+
+            seq = msg.seq
+            if trace is not None:
+                trace.add("request", seq=seq)
+            if seq not in expected:
+                continue
+            requests += 1
+            if first_request is None:
+                first_request = time.monotonic() - start
+            if seq in sent:
+                duplicates += 1
+            else:
+                latencies.append(time.monotonic() - last_sent)
+                sent.add(seq)
+
+            self.vehicle.mav.send(self.mission_items.packed(seq))
+            last_sent = time.monotonic()
+            if trace is not None:
+                trace.add("item_sent", seq=seq)
+            if debug:
+                log.debug("mission_item_sent", seq=seq, count=count)
+            if progress is not None:
+                progress(seq, count)
+
+        duration = time.monotonic() - start
+        self.item_latencies = latencies
+        self.transfer_stats = {
+            "result": self.upload_result,
+            "items": len(expected),
+            "sent": len(sent),
+            "requests": requests,
+            "duplicates": duplicates,
+            "count_retries": count_retries,
+            "timeouts": timeouts,
+            "duration": duration,
+            "first_request": first_request,  # od MISSION_COUNT do pierwszego żądania elementu
+            "ack_wait": ack_wait,  # od ostatniego wysłanego elementu do MISSION_ACK
+            "items_per_second": len(sent) / duration if duration else 0.0,
+            "latency_min": min(latencies, default=None),
+            "latency_mean": sum(latencies) / len(latencies) if latencies else None,
+            "latency_max": max(latencies, default=None),
+        }
+        log.info("mission_upload", connection=self.connection_string, **self.transfer_stats)
+        return self.upload_result == 'MAV_MISSION_ACCEPTED'
 
     def arm_and_start_mission(self):
         """
         Uzbrojenie drona i rozpoczęcie misji.
         """
         self.vehicle.arducopter_arm()
-        print("Dron uzbrojony.")
+        log.info("vehicle_armed", connection=self.connection_string)
         
         self.vehicle.mav.command_long_send(
             self.vehicle.target_system,
@@ -142,30 +330,21 @@ class MissionPlanner:
             0,
             0, 0, 0, 0, 0, 0, 0
         )
-        print("Misja rozpoczęta!")
+        log.info("mission_started", connection=self.connection_string)
 
     def close_connection(self):
         """
         Zamknięcie połączenia z pojazdem.
         """
         self.vehicle.close()
-        print("Połączenie zamknięte.")
+        log.info("connection_closed", connection=self.connection_string)
         
     def set_servo(self, servo_number, pwm):
         #183 to jest komenda do ustwienia serwa 
-        servo_message = mavutil.mavlink.MAVLink_mission_item_int_message(0, 0, 0,
-                                                                         0, 183, 0, 
-                                                                         1, float(servo_number), float(pwm), 
-                                                                         0.0, 0.0, 0, 0, 0)
-        self.mission_items.add(servo_message)
+        self.mission_items.append(0, 183, 0, 1, float(servo_number), float(pwm), 0.0, 0.0, 0, 0, 0)
 
     def set_delay(self, delay_seconds: int):
-        delay = mavutil.mavlink.MAVLink_mission_item_int_message(0, 0, 0,
-                                                                0, 93, 0, 
-                                                                1, float(delay_seconds), 0, 
-                                                                0.0, 0.0, 0, 0, 0)
-        
-        self.mission_items.add(delay)
+        self.mission_items.append(0, 93, 0, 1, float(delay_seconds), 0, 0.0, 0.0, 0, 0, 0)
 
 
 
@@ -174,7 +353,8 @@ if __name__ == "__main__":
 # MISSION_ITEM {target_system : 255, target_component : 0, seq : 2, frame : 0, command : 183, current : 0, autocontinue : 1, param1 : 1.0, param2 : 1500.0, param3 : 0.0, param4 : 0.0, x : 0.0, y : 0.0, z : 0.0, mission_type : 0}
 
     planner = MissionPlanner('udpin:localhost:14552')
-    planner.read_current_mission()
+    for seq, item in enumerate(planner.read_current_mission()):
+        print(seq, dict(zip(MISSION_FIELDS, item)))
     
     # Dodawanie nowej misji
     # planner.add_takeoff(altitude=10)
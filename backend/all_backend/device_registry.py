@@ -0,0 +1,106 @@
+import asyncio
+import time
+
+
+class Device:
+    def __init__(self, name, ip, altitude=0.0, delay=300.0, servo_value=93):
+        """
+        Zarejestrowane urządzenie ESP32 (beacon) z ostatnim wynikiem sprawdzenia.
+        altitude, delay, servo_value - wartości wysyłane razem ze współrzędnymi w /send-data.
+        """
+        self.name = name
+        self.ip = ip
+        self.altitude = altitude
+        self.delay = delay
+        self.servo_value = servo_value
+        self.status = "unknown"
+        self.rtt = None
+        self.last_seen = None
+        self.checked_at = None
+
+    def to_dict(self):
+        return {
+            "ip": self.ip,
+            "status": self.status,
+            "rtt": self.rtt,
+            "last_seen": self.last_seen,
+            "checked_at": self.checked_at,
+        }
+
+
+class DeviceRegistry:
+    def __init__(self, clients, interval=5.0):
+        """
+        Rejestr urządzeń ESP32 sprawdzanych cyklicznie w tle.
+        clients - DeviceClients, przez które idą sprawdzenia i wysyłanie danych,
+        interval - odstęp (s) między kolejnymi rundami sprawdzeń.
+        """
+        self.clients = clients
+        self.interval = interval
+        self._devices = {}
+        self._task = None
+
+    def register(self, name, ip, **settings):
+        self._devices[name] = Device(name, ip, **settings)
+        return self._devices[name]
+
+    async def remove(self, name):
+        """
+        Usuwa urządzenie z rejestru i zamyka jego klienta HTTP.
+        """
+        device = self._devices.pop(name, None)
+        if device is not None:
+            await self.release(device.ip)
+        return device
+
+    async def release(self, ip):
+        """
+        Zamyka klienta HTTP adresu, którego nie używa już żadne zarejestrowane urządzenie.
+        """
+        if all(device.ip != ip for device in self._devices.values()):
+            await self.clients.remove(ip)
+
+    def get(self, name):
+        return self._devices.get(name)
+
+    def snapshot(self):
+        """
+        Stan wszystkich urządzeń z pamięci - bez odpytywania sieci.
+        """
+        return {name: device.to_dict() for name, device in self._devices.items()}
+
+    async def probe(self, device):
+        start = time.perf_counter()
+        reachable = await self.clients.get(device.ip).probe()
+        device.checked_at = time.time()
+        if reachable:
+            device.status = "online"
+            device.rtt = time.perf_counter() - start
+            device.last_seen = device.checked_at
+        else:
+            device.status = "offline"
+            device.rtt = None
+
+    async def probe_all(self):
+        """
+        Sprawdza wszystkie urządzenia równolegle.
+        """
+        await asyncio.gather(*(self.probe(device) for device in list(self._devices.values())))
+
+    async def _run(self):
+        while True:
+            await self.probe_all()
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
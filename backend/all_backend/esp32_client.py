@@ -0,0 +1,95 @@
+import asyncio
+import time
+
+import httpx
+
+
+class DeviceClient:
+    def __init__(self, ip, port=80, timeout=5.0, reachability_ttl=10.0, scheme="http", verify=True):
+        """
+        Klient HTTP jednego urządzenia ESP32 z utrzymywanym połączeniem (keep-alive)
+        i zapamiętaną osiągalnością urządzenia.
+        timeout - limit czasu połączenia i odpowiedzi,
+        reachability_ttl - jak długo (s) ufamy ostatniemu sprawdzeniu połączenia,
+        scheme - "http" albo "https",
+        verify - weryfikacja certyfikatu TLS przy https (True, False albo gotowy ssl.SSLContext).
+        """
+        self.ip = ip
+        self.port = port
+        self.timeout = timeout
+        self.reachability_ttl = reachability_ttl
+        self.client = httpx.AsyncClient(base_url=f"{scheme}://{ip}:{port}", verify=verify,
+                                        timeout=httpx.Timeout(timeout),
+                                        limits=httpx.Limits(max_connections=2, max_keepalive_connections=2))
+        self.reachable = None
+        self.checked_at = 0.0
+        self.last_send_ok = True
+
+    async def probe(self):
+        """
+        Sprawdza połączenie TCP z urządzeniem (bez globalnego socket.setdefaulttimeout).
+        """
+        try:
+            _, writer = await asyncio.wait_for(asyncio.open_connection(self.ip, self.port), self.timeout)
+            writer.close()
+            await writer.wait_closed()
+            self.reachable = True
+        except (OSError, asyncio.TimeoutError):
+            self.reachable = False
+        self.checked_at = time.monotonic()
+        return self.reachable
+
+    async def is_reachable(self):
+        """
+        Zwraca zapamiętaną osiągalność; sprawdza ponownie tylko gdy wynik jest
+        starszy niż reachability_ttl albo ostatnie wysłanie się nie udało.
+        """
+        fresh = time.monotonic() - self.checked_at < self.reachability_ttl
+        if self.reachable is None or not fresh or not self.last_send_ok:
+            return await self.probe()
+        return self.reachable
+
+    async def post(self, path, data):
+        try:
+            response = await self.client.post(path, json=data)
+        except httpx.HTTPError:
+            self.last_send_ok = False
+            raise
+        self.last_send_ok = response.status_code == 200
+        if self.last_send_ok:
+            self.reachable = True
+            self.checked_at = time.monotonic()
+        return response
+
+    async def aclose(self):
+        await self.client.aclose()
+
+
+class DeviceClients:
+    def __init__(self, verify=True, **client_options):
+        """
+        Współdzielone klienty HTTP - jeden na urządzenie (adres IP).
+        verify - weryfikacja certyfikatów TLS; kontekst SSL (wczytanie certyfikatów CA)
+        jest tworzony raz i współdzielony przez wszystkie klienty.
+        """
+        self.client_options = dict(client_options, verify=httpx.create_ssl_context(verify=verify))
+        self._clients = {}
+
+    def get(self, ip):
+        client = self._clients.get(ip)
+        if client is None:
+            client = self._clients[ip] = DeviceClient(ip, **self.client_options)
+        return client
+
+    async def remove(self, ip):
+        """
+        Zamyka i zapomina klienta urządzenia (kolejne get tworzy nowego).
+        """
+        client = self._clients.pop(ip, None)
+        if client is not None:
+            await client.aclose()
+
+    async def aclose(self):
+        clients = list(self._clients.values())
+        self._clients.clear()
+        await asyncio.gather(*(client.aclose() for client in clients))
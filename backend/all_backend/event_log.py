@@ -0,0 +1,112 @@
+import json
+import logging
+import queue
+import sys
+import time
+from logging.handlers import QueueHandler, QueueListener
+
+# Wspólny przedrostek loggerów aplikacji (sztafeta.mission, sztafeta.backend, ...)
+ROOT_LOGGER = "sztafeta"
+
+# Najwięcej zdarzeń w śladzie jednego wgrania (misja 65535 elementów to ~130 tys. zdarzeń)
+TRACE_LIMIT = 20000
+
+
+class EventLogger:
+    def __init__(self, name):
+        """
+        Logger zdarzeń strukturalnych: nazwa zdarzenia + pola (bez formatowania tekstu w wywołującym wątku).
+        """
+        self.logger = logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+    def enabled(self, level):
+        return self.logger.isEnabledFor(level)
+
+    def event(self, level, event, **fields):
+        if self.logger.isEnabledFor(level):
+            self.logger.log(level, event, extra={"fields": fields})
+
+    def debug(self, event, **fields):
+        self.event(logging.DEBUG, event, **fields)
+
+    def info(self, event, **fields):
+        self.event(logging.INFO, event, **fields)
+
+    def warning(self, event, **fields):
+        self.event(logging.WARNING, event, **fields)
+
+    def error(self, event, **fields):
+        self.event(logging.ERROR, event, **fields)
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        """
+        Zdarzenie jako jedna linia JSON (czas, poziom, logger, nazwa zdarzenia i pola).
+        """
+        entry = {"time": self.formatTime(record), "level": record.levelname, "logger": record.name,
+                 "event": record.getMessage()}
+        entry.update(getattr(record, "fields", {}))
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class EventQueueHandler(QueueHandler):
+    def prepare(self, record):
+        # Formatowanie odbywa się w wątku QueueListenera, nie w gorącej pętli
+        return record
+
+
+class EventLog:
+    def __init__(self, level=logging.INFO, stream=None):
+        """
+        Konfiguracja loggerów aplikacji: zdarzenia trafiają do kolejki w pamięci,
+        a osobny wątek (QueueListener) formatuje je i zapisuje do stream (domyślnie stdout).
+        """
+        self.logger = logging.getLogger(ROOT_LOGGER)
+        self.logger.setLevel(level)
+        self.logger.propagate = False
+        self.queue = queue.SimpleQueue()
+        handler = logging.StreamHandler(stream or sys.stdout)
+        handler.setFormatter(JsonFormatter())
+        self.listener = QueueListener(self.queue, handler)
+        self.logger.addHandler(EventQueueHandler(self.queue))
+        self.running = False
+        self.start()
+
+    def set_level(self, level):
+        self.logger.setLevel(level)
+
+    def start(self):
+        if not self.running:
+            self.listener.start()
+            self.running = True
+
+    def stop(self):
+        """
+        Zapisuje zaległe zdarzenia i zatrzymuje wątek zapisu.
+        """
+        if self.running:
+            self.listener.stop()
+            self.running = False
+
+
+class EventTrace:
+    def __init__(self, limit=TRACE_LIMIT):
+        """
+        Oś czasu jednej operacji (np. wgrania misji): zdarzenia zapisywane jako surowe krotki,
+        zamieniane na słowniki dopiero przy odczycie. Zdarzenia ponad limit są tylko liczone.
+        """
+        self.started = time.perf_counter()
+        self.limit = limit
+        self.events = []
+        self.dropped = 0
+
+    def add(self, event, **fields):
+        if len(self.events) < self.limit:
+            self.events.append((time.perf_counter(), event, fields))
+        else:
+            self.dropped += 1
+
+    def to_list(self):
+        return [{"t": round(at - self.started, 6), "event": event, **fields}
+                for at, event, fields in list(self.events)]
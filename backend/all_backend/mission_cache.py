@@ -0,0 +1,78 @@
+import hashlib
+import threading
+import weakref
+
+
+def mission_hash(items):
+    """
+    Skrót zawartości misji (listy krotek z MissionPlanner.mission_fields) do porównania z misją na pojeździe.
+    Pomija element 0 (punkt domowy - autopilot nadpisuje go swoją pozycją startu) i pole current.
+    """
+    return hashlib.sha256(repr([item[:2] + item[3:] for item in items[1:]]).encode()).hexdigest()
+
+
+def changed_range(old_items, new_items):
+    """
+    Zwraca (start, end) - najmniejszy ciągły zakres elementów do ponownego wysłania,
+    None gdy misje są identyczne, albo 'full' gdy zmieniła się liczba elementów.
+    """
+    if len(old_items) != len(new_items):
+        return 'full'
+    changed = [seq for seq, (old, new) in enumerate(zip(old_items, new_items)) if old != new]
+    if not changed:
+        return None
+    return changed[0], changed[-1]
+
+
+class MissionCache:
+    def __init__(self):
+        """
+        Ostatnia potwierdzona (MISSION_ACK) lub pobrana misja każdego pojazdu.
+        Wpis jest ważny tylko dla tego samego otwartego połączenia - po ponownym
+        połączeniu (np. restart pojazdu) misja jest wysyłana w całości.
+        Misję może zmienić inna stacja, także na misję o tej samej długości, więc wpis jest
+        zwracany dopiero po potwierdzeniu zawartości na pojeździe - zgodna liczba elementów nie wystarcza.
+        """
+        self._missions = {}
+        self._lock = threading.Lock()
+
+    def get(self, connection_string, vehicle, read_state, read_items=None):
+        """
+        Zwraca (hash, items) albo None, gdy zawartości misji na pojeździe nie da się potwierdzić.
+        read_state - funkcja zwracająca (liczba elementów, opaque_id) z MISSION_COUNT
+        (opaque_id 0 - pojazd lub dialekt go nie obsługuje),
+        read_items - funkcja pobierająca elementy misji z pojazdu; bez opaque_id misja jest potwierdzana
+        skrótem pobranych elementów (None - bez pobierania, czyli bez potwierdzenia).
+        """
+        with self._lock:
+            entry = self._missions.get(connection_string)
+        if entry is None or entry[0]() is not vehicle:
+            return None
+        try:
+            count, opaque_id = read_state()
+            if count != len(entry[2]):
+                verified = False
+            elif opaque_id and entry[3]:
+                verified = opaque_id == entry[3]
+            elif read_items is not None:
+                verified = mission_hash(read_items()) == entry[1]
+            else:
+                verified = False
+        except TimeoutError:
+            verified = False
+        if not verified:
+            self.invalidate(connection_string)
+            return None
+        return entry[1], entry[2]
+
+    def store(self, connection_string, vehicle, items, opaque_id=0):
+        """
+        Zapisuje misję potwierdzoną przez pojazd; opaque_id - identyfikator misji z MISSION_ACK
+        lub MISSION_COUNT (MAVLink 2), 0 gdy nieznany.
+        """
+        with self._lock:
+            self._missions[connection_string] = (weakref.ref(vehicle), mission_hash(items), items, opaque_id)
+
+    def invalidate(self, connection_string):
+        with self._lock:
+            self._missions.pop(connection_string, None)
@@ -0,0 +1,110 @@
+import struct
+
+import numpy as np
+import pandas as pd
+
+# Binarny format misji: nagłówek (magic, liczba wierszy) + tablica rekordów little-endian.
+# Szerokość i długość geograficzna jako int32 w 1e7 stopnia - tak jak w MAVLink.
+MISSION_CONTENT_TYPE = "application/vnd.sztafeta.mission"
+MAGIC = b"MSN1"
+HEADER = struct.Struct("<4sI")
+MISSION_DTYPE = np.dtype([
+    ('latitude', '<i4'),
+    ('longitude', '<i4'),
+    ('altitude', '<f4'),
+    ('delay', '<f4'),
+    ('drop', 'u1'),
+    ('servo', 'u1'),
+    ('servo_value_octa', '<u2'),
+    ('drop_delay', '<f4'),
+])
+
+# Wartości oznaczające brak danych (NaN) w polach całkowitych
+MISSING = {
+    'latitude': np.iinfo(np.int32).min,
+    'longitude': np.iinfo(np.int32).min,
+    'drop': 0xFF,
+    'servo': 0xFF,
+    'servo_value_octa': 0xFFFF,
+}
+
+# Dozwolony zakres wartości każdej kolumny (bez wartości brakującej) - poza nim rzutowanie
+# na typ z MISSION_DTYPE po cichu przekłamałoby dane (np. servo 5000 -> 136)
+FLOAT32_MAX = float(np.finfo(np.float32).max)
+VALID_RANGE = {
+    'latitude': (-90.0, 90.0),
+    'longitude': (-180.0, 180.0),
+    'altitude': (-FLOAT32_MAX, FLOAT32_MAX),
+    'delay': (-FLOAT32_MAX, FLOAT32_MAX),
+    'drop': (0, 0xFE),
+    'servo': (0, 0xFE),
+    'servo_value_octa': (0, 0xFFFE),
+    'drop_delay': (-FLOAT32_MAX, FLOAT32_MAX),
+}
+
+
+def _column(df, name):
+    if name not in df.columns:
+        return np.full(len(df), np.nan)
+    return pd.to_numeric(df[name], errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+
+
+def encode_mission(df):
+    """
+    Funkcja do zakodowania DataFrame misji do formatu binarnego.
+    """
+    return encode_columns({name: _column(df, name) for name in MISSION_DTYPE.names})
+
+
+def _check_column(name, values, missing):
+    low, high = VALID_RANGE[name]
+    present = values[~missing]
+    bad = ~np.isfinite(present) | (present < low) | (present > high)
+    if MISSION_DTYPE[name].kind in 'iu' and name not in ('latitude', 'longitude'):
+        bad |= present != np.round(present)
+    if bad.any():
+        rows = np.flatnonzero(~missing)[bad]
+        raise ValueError(f"Column {name} out of range [{low}, {high}] in rows {rows[:10].tolist()}")
+
+
+def encode_columns(columns):
+    """
+    Jak encode_mission, ale dla słownika kolumn numpy (float, NaN = brak wartości).
+    Wartość spoza VALID_RANGE (także nieskończona albo ułamkowa w polu całkowitym) daje ValueError.
+    """
+    records = np.zeros(len(columns['latitude']), dtype=MISSION_DTYPE)
+    for name in MISSION_DTYPE.names:
+        values = np.asarray(columns[name], dtype=float)
+        missing = np.isnan(values)
+        _check_column(name, values, missing)
+        if name in ('latitude', 'longitude'):
+            values = np.round(values * 1e7)
+        if name in MISSING:
+            values = np.where(missing, MISSING[name], values)
+        records[name] = values
+    return HEADER.pack(MAGIC, len(records)) + records.tobytes()
+
+
+def decode_mission(payload):
+    """
+    Funkcja do odczytania misji w formacie binarnym.
+    Zwraca słownik kolumn float64 (NaN = brak wartości, lat/lon w stopniach).
+    """
+    if len(payload) < HEADER.size:
+        raise ValueError("Mission payload too short")
+    magic, count = HEADER.unpack_from(payload)
+    if magic != MAGIC:
+        raise ValueError(f"Unknown mission format {magic!r}")
+    if len(payload) != HEADER.size + count * MISSION_DTYPE.itemsize:
+        raise ValueError(f"Mission payload size does not match {count} records")
+
+    records = np.frombuffer(payload, dtype=MISSION_DTYPE, count=count, offset=HEADER.size)
+    columns = {}
+    for name in MISSION_DTYPE.names:
+        values = records[name].astype(float)
+        if name in MISSING:
+            values[records[name] == MISSING[name]] = np.nan
+        if name in ('latitude', 'longitude'):
+            values /= 1e7
+        columns[name] = values
+    return columns
@@ -0,0 +1,205 @@
+import numpy as np
+import pandas as pd
+
+# Rodzaje wierszy misji
+ROW_INVALID = 0
+ROW_WAYPOINT = 1
+ROW_DROP = 2
+ROW_DELAY = 3
+
+
+class CompiledMission:
+    def __init__(self, kind, latitude, longitude, delay, servo, servo_value_octa, drop_delay, index):
+        """
+        Skompilowana misja - kolumny numpy z typem każdego wiersza.
+        """
+        self.kind = kind
+        self.latitude = latitude
+        self.longitude = longitude
+        self.delay = delay
+        self.servo = servo
+        self.servo_value_octa = servo_value_octa
+        self.drop_delay = drop_delay
+        self.index = index
+
+    def __len__(self):
+        return len(self.kind)
+
+    @property
+    def invalid_rows(self):
+        """
+        Indeksy (z DataFrame) wierszy, których nie da się zamienić na komendy.
+        """
+        return self.index[self.kind == ROW_INVALID].tolist()
+
+    def out_of_range_rows(self, ranges):
+        """
+        Indeksy (z DataFrame) punktów trasy ze współrzędnymi poza zakresami ranges
+        {"latitude": (min, max), "longitude": (min, max)} - także nieskończonymi.
+        """
+        positioned = (self.kind == ROW_WAYPOINT) | (self.kind == ROW_DROP)
+        bad = np.zeros(len(self.kind), dtype=bool)
+        for name in ('latitude', 'longitude'):
+            low, high = ranges[name]
+            values = getattr(self, name)
+            bad |= positioned & ~((values >= low) & (values <= high))
+        return self.index[bad].tolist()
+
+    def item_count(self):
+        """
+        Liczba komend dodawanych przez emit_mission (zrzut to punkt, serwo i opóźnienie) - przed optymalizacją.
+        """
+        kind = self.kind
+        return int(np.count_nonzero(kind == ROW_WAYPOINT) + 3 * np.count_nonzero(kind == ROW_DROP)
+                   + np.count_nonzero(kind == ROW_DELAY))
+
+    def valid(self):
+        """
+        Zwraca misję bez błędnych wierszy.
+        """
+        return self.take(self.kind != ROW_INVALID)
+
+    def take(self, mask):
+        """
+        Zwraca nową misję z wierszami wybranymi maską lub tablicą indeksów.
+        """
+        return CompiledMission(self.kind[mask], self.latitude[mask], self.longitude[mask],
+                               self.delay[mask], self.servo[mask], self.servo_value_octa[mask],
+                               self.drop_delay[mask], self.index[mask])
+
+
+def _column(df, name):
+    # Brakująca kolumna zachowuje się jak kolumna pełna NaN
+    if name not in df.columns:
+        return np.full(len(df), np.nan)
+    return pd.to_numeric(df[name], errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+
+
+# Kolumny misji używane przez kompilator
+MISSION_COLUMNS = ('latitude', 'longitude', 'delay', 'drop', 'servo', 'servo_value_octa', 'drop_delay')
+
+
+def compile_dataframe(df):
+    """
+    Funkcja do klasyfikacji wszystkich wierszy DataFrame naraz (maski logiczne).
+    """
+    return compile_columns({name: _column(df, name) for name in MISSION_COLUMNS}, df.index.to_numpy())
+
+
+def compile_columns(columns, index=None):
+    """
+    Jak compile_dataframe, ale dla słownika kolumn numpy (float, NaN = brak wartości).
+    """
+    lat = columns['latitude']
+    lon = columns['longitude']
+    delay = columns['delay']
+    drop = columns['drop']
+    servo = columns['servo']
+    drop_delay = columns['drop_delay']
+    if index is None:
+        index = np.arange(len(lat))
+
+    has_lat, has_lon = ~np.isnan(lat), ~np.isnan(lon)
+    has_position = has_lat & has_lon
+
+    waypoint = has_position & (drop == 0)
+    drop_waypoint = has_position & (drop == 1) & ~np.isnan(servo) & ~np.isnan(drop_delay)
+    pure_delay = ~has_lat & ~has_lon & ~np.isnan(delay)
+
+    kind = np.full(len(lat), ROW_INVALID, dtype=np.int8)
+    kind[waypoint] = ROW_WAYPOINT
+    kind[drop_waypoint] = ROW_DROP
+    kind[pure_delay] = ROW_DELAY
+
+    return CompiledMission(kind, lat, lon, delay, servo, columns['servo_value_octa'], drop_delay, index)
+
+
+def emit_mission(mission, planner, height, servo_pwm=None):
+    """
+    Funkcja do dodania komend misji do MissionPlannera w kolejności wierszy.
+    Błędne wiersze są pomijane - sprawdź wcześniej mission.invalid_rows.
+    """
+    columns = zip(mission.kind.tolist(), mission.latitude.tolist(), mission.longitude.tolist(),
+                  mission.delay.tolist(), mission.servo.tolist(), mission.servo_value_octa.tolist(),
+                  mission.drop_delay.tolist())
+    for kind, lat, lon, delay, servo, pwm, drop_delay in columns:
+        if kind == ROW_WAYPOINT:
+            planner.add_waypoint(lat=lat, lon=lon, altitude=height, delay=delay)
+        elif kind == ROW_DROP:
+            planner.add_waypoint(lat=lat, lon=lon, altitude=height, delay=delay)
+            planner.set_servo(servo_number=servo, pwm=pwm if servo_pwm is None else servo_pwm)
+            planner.set_delay(delay_seconds=drop_delay)
+        elif kind == ROW_DELAY:
+            planner.set_delay(delay_seconds=delay)
+
+
+EARTH_RADIUS = 6371000.0  # m
+
+
+def _segment_distance(px, py, ax, ay, bx, by):
+    # Odległość punktów (px, py) od odcinków a-b (m) - działa na całych tablicach
+    dx, dy = bx - ax, by - ay
+    length2 = dx * dx + dy * dy
+    t = np.clip(((px - ax) * dx + (py - ay) * dy) / np.where(length2 == 0, 1.0, length2), 0.0, 1.0)
+    return np.hypot(px - (ax + t * dx), py - (ay + t * dy))
+
+
+def simplify_mission(mission, tolerance):
+    """
+    Funkcja do przerzedzenia punktów trasy algorytmem Ramera-Douglasa-Peuckera.
+    tolerance - maksymalne odchylenie trasy (m). Nigdy nie usuwa zrzutów, punktów z opóźnieniem,
+    punktów przed komendą opóźnienia ani pierwszego i ostatniego punktu.
+    Zwraca (misja, raport) - raport zawiera liczbę usuniętych punktów i maksymalne odchylenie (m).
+    """
+    kind = mission.kind
+    positioned = np.flatnonzero((kind == ROW_WAYPOINT) | (kind == ROW_DROP))
+    if len(positioned) < 3 or tolerance <= 0:
+        return mission, {"removed": 0, "max_deviation": 0.0}
+
+    # Lokalny rzut równoodległościowy na metry - wystarczający dla obszaru jednej misji
+    lat = np.radians(mission.latitude[positioned])
+    lon = np.radians(mission.longitude[positioned])
+    x = lon * EARTH_RADIUS * np.cos(lat.mean())
+    y = lat * EARTH_RADIUS
+
+    next_is_delay = np.zeros(len(kind), dtype=bool)
+    next_is_delay[:-1] = kind[1:] == ROW_DELAY
+    keep = ((kind[positioned] == ROW_DROP) | (np.nan_to_num(mission.delay[positioned]) != 0)
+            | next_is_delay[positioned])
+    keep[[0, -1]] = True
+
+    # Wszystkie otwarte odcinki naraz: w każdym przejściu najdalszy punkt każdego odcinka (reduceat)
+    anchors = np.flatnonzero(keep)
+    starts, ends = anchors[:-1], anchors[1:]
+    while True:
+        open_segments = ends - starts >= 2
+        starts, ends = starts[open_segments], ends[open_segments]
+        if not len(starts):
+            break
+        inner = ends - starts - 1
+        offsets = np.zeros(len(starts), dtype=np.intp)
+        np.cumsum(inner[:-1], out=offsets[1:])
+        point = np.arange(offsets[-1] + inner[-1]) + np.repeat(starts + 1 - offsets, inner)
+        distance = _segment_distance(x[point], y[point], np.repeat(x[starts], inner), np.repeat(y[starts], inner),
+                                     np.repeat(x[ends], inner), np.repeat(y[ends], inner))
+
+        farthest = np.maximum.reduceat(distance, offsets)
+        # Pierwszy punkt z największą odległością w odcinku (jak np.argmax)
+        hits = np.flatnonzero(distance == np.repeat(farthest, inner))
+        middle = point[hits[np.searchsorted(hits, offsets)]]
+        split = farthest > tolerance
+        keep[middle[split]] = True
+        starts = np.concatenate([starts[split], middle[split]])
+        ends = np.concatenate([middle[split], ends[split]])
+
+    kept = np.flatnonzero(keep)
+    removed = np.flatnonzero(~keep)
+    max_deviation = 0.0
+    if len(removed):
+        after = np.searchsorted(kept, removed)
+        a, b = kept[after - 1], kept[after]
+        max_deviation = float(_segment_distance(x[removed], y[removed], x[a], y[a], x[b], y[b]).max())
+
+    rows = np.ones(len(kind), dtype=bool)
+    rows[positioned[removed]] = False
+    return mission.take(rows), {"removed": len(removed), "max_deviation": max_deviation}
@@ -0,0 +1,119 @@
+import struct
+
+import numpy as np
+
+from mission_compiler import ROW_WAYPOINT, CompiledMission
+from mission_store import FIELD_ORDER, ITEM_DTYPE, MissionStore
+
+# Archiwum misji: nagłówek (magic, liczba elementów) + rekordy ITEM_DTYPE (układ MISSION_ITEM_INT na łączu).
+# Rekordy zaczynają się od stałego przesunięcia, więc plik można zmapować w pamięci (np.memmap).
+ARCHIVE_CONTENT_TYPE = "application/vnd.sztafeta.mission-items"
+ARCHIVE_MAGIC = b"MSI1"
+ARCHIVE_EXTENSION = "msnpk"
+ARCHIVE_HEADER = struct.Struct("<4sI")
+
+# Liczba elementów w jednym kawałku odpowiedzi strumieniowej
+EXPORT_CHUNK = 4096
+
+# Ramki, w których x/y to szerokość/długość geograficzna w 1e7 stopnia
+GLOBAL_FRAMES = (0, 3, 5, 6, 10, 11)
+
+# Komendy NAV z pozycją docelową (WAYPOINT, LOITER_*, LAND, LOITER_TO_ALT, SPLINE_WAYPOINT)
+NAV_POSITION_COMMANDS = (16, 17, 18, 19, 21, 31, 82)
+
+
+def items_array(items):
+    """
+    Lista krotek w formacie mission_fields() (np. misja pobrana z pojazdu) jako tablica ITEM_DTYPE.
+    """
+    store = MissionStore(capacity=max(1, len(items)))
+    for item in items:
+        store.append(*item)
+    return store.items()
+
+
+def items_mission(items):
+    """
+    Punkty trasy z elementów misji (tablica ITEM_DTYPE, np. archiwum) jako CompiledMission z indeksem seq
+    oraz wysokości tych punktów - do tych samych sprawdzeń co misja z /upload. Pomija punkt domowy (seq 0)
+    i komendy bez pozycji (0, 0 - bieżąca pozycja pojazdu).
+    """
+    positioned = ((items['seq'] > 0) & np.isin(items['command'], NAV_POSITION_COMMANDS)
+                  & np.isin(items['frame'], GLOBAL_FRAMES) & ((items['x'] != 0) | (items['y'] != 0)))
+    points = items[positioned]
+    count = len(points)
+    nan = np.full(count, np.nan)
+    mission = CompiledMission(np.full(count, ROW_WAYPOINT, dtype=np.int8), points['x'] / 1e7, points['y'] / 1e7,
+                              points['param1'].astype(float), nan, nan, nan, points['seq'].astype(np.int64))
+    return mission, points['z'].astype(float)
+
+
+def iter_wpl(items):
+    """
+    Funkcja do eksportu elementów misji (tablica ITEM_DTYPE) do tekstu QGroundControl WPL 110.
+    Generator kawałków tekstu - cały plik nie powstaje w pamięci.
+    """
+    yield "QGC WPL 110\n"
+    for start in range(0, len(items), EXPORT_CHUNK):
+        chunk = items[start:start + EXPORT_CHUNK]
+        columns = {name: chunk[name].tolist() for name in FIELD_ORDER}
+        lines = []
+        for seq, (frame, command, current, autocontinue, p1, p2, p3, p4, x, y, z) in enumerate(
+                zip(*(columns[name] for name in FIELD_ORDER)), start):
+            if frame in GLOBAL_FRAMES:
+                x, y = f"{x / 1e7:.7f}", f"{y / 1e7:.7f}"
+            lines.append(f"{seq}\t{current}\t{frame}\t{command}\t{p1:.8g}\t{p2:.8g}\t{p3:.8g}\t{p4:.8g}"
+                         f"\t{x}\t{y}\t{z:.6g}\t{autocontinue}\n")
+        yield "".join(lines)
+
+
+def iter_archive(items):
+    """
+    Funkcja do eksportu elementów misji (tablica ITEM_DTYPE) do archiwum binarnego (generator bajtów).
+    """
+    yield ARCHIVE_HEADER.pack(ARCHIVE_MAGIC, len(items))
+    for start in range(0, len(items), EXPORT_CHUNK):
+        yield items[start:start + EXPORT_CHUNK].tobytes()
+
+
+def write_archive(path, items):
+    with open(path, 'wb') as file:
+        for chunk in iter_archive(items):
+            file.write(chunk)
+
+
+def _check_header(magic, count, size):
+    if magic != ARCHIVE_MAGIC:
+        raise ValueError(f"Unknown mission archive format {magic!r}")
+    if size != ARCHIVE_HEADER.size + count * ITEM_DTYPE.itemsize:
+        raise ValueError(f"Mission archive size does not match {count} items")
+
+
+def load_archive(path):
+    """
+    Funkcja do wczytania archiwum z pliku bez kopiowania: rekordy są mapowane w pamięci
+    (copy-on-write - przygotowanie do wysłania nie zmienia pliku). Zwraca MissionStore.
+    """
+    with open(path, 'rb') as file:
+        header = file.read(ARCHIVE_HEADER.size)
+        size = file.seek(0, 2)
+    if len(header) < ARCHIVE_HEADER.size:
+        raise ValueError("Mission archive too short")
+    magic, count = ARCHIVE_HEADER.unpack(header)
+    _check_header(magic, count, size)
+    if count == 0:
+        return MissionStore.from_array(np.zeros(0, dtype=ITEM_DTYPE))
+    return MissionStore.from_array(np.memmap(path, dtype=ITEM_DTYPE, mode='c',
+                                             offset=ARCHIVE_HEADER.size, shape=(count,)))
+
+
+def read_archive(payload):
+    """
+    Jak load_archive, ale dla archiwum w pamięci (np. treść zapytania HTTP).
+    """
+    if len(payload) < ARCHIVE_HEADER.size:
+        raise ValueError("Mission archive too short")
+    magic, count = ARCHIVE_HEADER.unpack_from(payload)
+    _check_header(magic, count, len(payload))
+    records = np.frombuffer(payload, dtype=ITEM_DTYPE, count=count, offset=ARCHIVE_HEADER.size)
+    return MissionStore.from_array(records.copy())
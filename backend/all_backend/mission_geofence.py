@@ -0,0 +1,197 @@
+import numpy as np
+
+from mission_compiler import ROW_DROP, ROW_WAYPOINT
+
+# Liczba punktów/odcinków sprawdzanych naraz (ogranicza pamięć tablic punkty x krawędzie)
+CHUNK = 65536
+
+
+class PolygonIndex:
+    def __init__(self, polygon, grid=64):
+        """
+        Wielokąt [(lat, lon), ...] z indeksem przestrzennym: siatka grid x grid komórek na jego
+        prostokącie otaczającym. Dla komórek bez krawędzi wynik jest znany z góry, więc dokładny
+        test wykonywany jest tylko dla punktów i odcinków w pobliżu brzegu.
+        """
+        points = np.asarray(polygon, dtype=float)
+        if points.ndim != 2 or points.shape[1] != 2 or len(points) < 3:
+            raise ValueError("Polygon needs at least 3 (lat, lon) points")
+        if np.array_equal(points[0], points[-1]):
+            points = points[:-1]
+        self.polygon = points
+
+        # Krawędzie w układzie x = lon, y = lat
+        self.ay, self.ax = points[:, 0], points[:, 1]
+        self.by, self.bx = np.roll(self.ay, -1), np.roll(self.ax, -1)
+        dy = self.by - self.ay
+        self.slope = np.where(dy == 0, 0.0, (self.bx - self.ax) / np.where(dy == 0, 1.0, dy))
+
+        # Wielokąt wypukły: odcinek o obu końcach w środku nigdy nie przecina brzegu
+        turn = ((self.bx - self.ax) * (np.roll(self.by, -1) - self.by)
+                - (self.by - self.ay) * (np.roll(self.bx, -1) - self.bx))
+        self.convex = bool((turn >= 0).all() or (turn <= 0).all())
+
+        self.lat_min, self.lat_max = self.ay.min(), self.ay.max()
+        self.lon_min, self.lon_max = self.ax.min(), self.ax.max()
+        self.grid = grid
+        self.cell_lat = (self.lat_max - self.lat_min) / grid or 1.0
+        self.cell_lon = (self.lon_max - self.lon_min) / grid or 1.0
+
+        # Komórki, przez które przechodzi jakaś krawędź (kolumna po kolumnie, zakres y krawędzi w kolumnie)
+        self.boundary = np.zeros((grid, grid), dtype=bool)
+        for ay, ax, by, bx in zip(self.ay.tolist(), self.ax.tolist(), self.by.tolist(), self.bx.tolist()):
+            first, last = sorted((self._col(ax), self._col(bx)))
+            for col in range(first, last + 1):
+                if ax == bx:
+                    y1, y2 = ay, by
+                else:
+                    left = max(min(ax, bx), self.lon_min + col * self.cell_lon)
+                    right = min(max(ax, bx), self.lon_min + (col + 1) * self.cell_lon)
+                    y1 = ay + (left - ax) * (by - ay) / (bx - ax)
+                    y2 = ay + (right - ax) * (by - ay) / (bx - ax)
+                low, high = sorted((self._row(y1), self._row(y2)))
+                self.boundary[low:high + 1, col] = True
+
+        # Komórki bez krawędzi leżą w całości wewnątrz albo na zewnątrz - jak ich środek
+        rows, cols = np.indices((grid, grid))
+        centre_lat = self.lat_min + (rows.ravel() + 0.5) * self.cell_lat
+        centre_lon = self.lon_min + (cols.ravel() + 0.5) * self.cell_lon
+        self.cell_inside = self._ray_cast(centre_lat, centre_lon).reshape(grid, grid)
+
+    def _row(self, lat):
+        return np.clip(((lat - self.lat_min) / self.cell_lat).astype(np.intp), 0, self.grid - 1)
+
+    def _col(self, lon):
+        return np.clip(((lon - self.lon_min) / self.cell_lon).astype(np.intp), 0, self.grid - 1)
+
+    def _ray_cast(self, lat, lon):
+        # Test promienia względem wszystkich krawędzi, w porcjach
+        inside = np.zeros(len(lat), dtype=bool)
+        step = max(1, CHUNK // len(self.ax))
+        for start in range(0, len(lat), step):
+            py, px = lat[start:start + step, None], lon[start:start + step, None]
+            crossing = (((self.ay > py) != (self.by > py))
+                        & (px < self.ax + (py - self.ay) * self.slope))
+            inside[start:start + step] = crossing.sum(axis=1) % 2 == 1
+        return inside
+
+    def contains(self, lat, lon):
+        """
+        Maska punktów leżących wewnątrz wielokąta.
+        """
+        inside = np.zeros(len(lat), dtype=bool)
+        candidates = np.flatnonzero((lat >= self.lat_min) & (lat <= self.lat_max)
+                                    & (lon >= self.lon_min) & (lon <= self.lon_max))
+        row, col = self._row(lat[candidates]), self._col(lon[candidates])
+        inside[candidates] = self.cell_inside[row, col]
+        near = candidates[self.boundary[row, col]]
+        inside[near] = self._ray_cast(lat[near], lon[near])
+        return inside
+
+    def crosses(self, lat1, lon1, lat2, lon2):
+        """
+        Maska odcinków (lat1, lon1)-(lat2, lon2) przecinających brzeg wielokąta.
+        """
+        result = np.zeros(len(lat1), dtype=bool)
+        candidates = np.flatnonzero((np.maximum(lat1, lat2) >= self.lat_min)
+                                    & (np.minimum(lat1, lat2) <= self.lat_max)
+                                    & (np.maximum(lon1, lon2) >= self.lon_min)
+                                    & (np.minimum(lon1, lon2) <= self.lon_max))
+
+        # Odcinek mieszczący się w 2x2 komórkach bez krawędzi na pewno nie przecina brzegu
+        r1, r2 = self._row(lat1[candidates]), self._row(lat2[candidates])
+        c1, c2 = self._col(lon1[candidates]), self._col(lon2[candidates])
+        short = (np.abs(r1 - r2) <= 1) & (np.abs(c1 - c2) <= 1)
+        clear = short & ~(self.boundary[r1, c1] | self.boundary[r1, c2]
+                          | self.boundary[r2, c1] | self.boundary[r2, c2])
+        rows = candidates[~clear]
+
+        step = max(1, CHUNK // len(self.ax))
+        for start in range(0, len(rows), step):
+            part = rows[start:start + step]
+            result[part] = self._segments_cross(lat1[part], lon1[part], lat2[part], lon2[part])
+        return result
+
+    def _segments_cross(self, lat1, lon1, lat2, lon2):
+        # Przecięcie właściwe: końce każdego odcinka leżą po przeciwnych stronach drugiego
+        py1, px1, py2, px2 = lat1[:, None], lon1[:, None], lat2[:, None], lon2[:, None]
+        ax, ay, bx, by = self.ax, self.ay, self.bx, self.by
+        d1 = (bx - ax) * (py1 - ay) - (by - ay) * (px1 - ax)
+        d2 = (bx - ax) * (py2 - ay) - (by - ay) * (px2 - ax)
+        d3 = (px2 - px1) * (ay - py1) - (py2 - py1) * (ax - px1)
+        d4 = (px2 - px1) * (by - py1) - (py2 - py1) * (bx - px1)
+        return ((d1 * d2 < 0) & (d3 * d4 < 0)).any(axis=1)
+
+
+class Geofence:
+    def __init__(self, include=(), exclude=(), min_altitude=None, max_altitude=None):
+        """
+        Obszar lotu: wielokąty dozwolone (include), strefy zakazane (exclude) i limity wysokości (m).
+        Brak wielokątów include oznacza brak ograniczenia obszaru.
+        """
+        self.include = [PolygonIndex(polygon) for polygon in include]
+        self.exclude = [PolygonIndex(polygon) for polygon in exclude]
+        self.min_altitude = min_altitude
+        self.max_altitude = max_altitude
+
+    @classmethod
+    def from_dict(cls, config):
+        return cls(include=config.get("include", ()), exclude=config.get("exclude", ()),
+                   min_altitude=config.get("min_altitude"), max_altitude=config.get("max_altitude"))
+
+    def to_dict(self):
+        return {
+            "include": [p.polygon.tolist() for p in self.include],
+            "exclude": [p.polygon.tolist() for p in self.exclude],
+            "min_altitude": self.min_altitude,
+            "max_altitude": self.max_altitude,
+        }
+
+    def check(self, mission, height):
+        """
+        Funkcja do sprawdzenia skompilowanej misji (CompiledMission) przed wysłaniem do pojazdu.
+        Zwraca słownik z indeksami wierszy (z DataFrame): poza obszarem (outside), w strefie
+        zakazanej (excluded), z odcinkiem dolotu wychodzącym poza obszar lub przez strefę
+        zakazaną (legs) oraz poza limitem wysokości (altitude). Puste listy = misja poprawna.
+        """
+        kind = mission.kind
+        positioned = np.flatnonzero((kind == ROW_WAYPOINT) | (kind == ROW_DROP))
+        altitude = np.broadcast_to(np.asarray(height, dtype=float), kind.shape)[positioned]
+        lat = mission.latitude[positioned]
+        lon = mission.longitude[positioned]
+        index = mission.index[positioned]
+
+        outside = np.zeros(len(positioned), dtype=bool)
+        bad_leg = np.zeros(max(len(positioned) - 1, 0), dtype=bool)
+        lat1, lon1, lat2, lon2 = lat[:-1], lon[:-1], lat[1:], lon[1:]
+
+        if self.include:
+            # Punkt musi leżeć w którymkolwiek wielokącie, odcinek w całości w jednym z nich
+            inside = [polygon.contains(lat, lon) for polygon in self.include]
+            outside = ~np.logical_or.reduce(inside)
+            leg_ok = np.zeros(len(bad_leg), dtype=bool)
+            for polygon, mask in zip(self.include, inside):
+                both = np.flatnonzero(mask[:-1] & mask[1:] & ~leg_ok)
+                if not polygon.convex:
+                    both = both[~polygon.crosses(lat1[both], lon1[both], lat2[both], lon2[both])]
+                leg_ok[both] = True
+            bad_leg |= ~leg_ok
+
+        excluded = np.zeros(len(positioned), dtype=bool)
+        for polygon in self.exclude:
+            excluded |= polygon.contains(lat, lon)
+            bad_leg |= polygon.crosses(lat1, lon1, lat2, lon2)
+        bad_leg |= excluded[:-1] | excluded[1:]
+
+        bad_altitude = np.zeros(len(positioned), dtype=bool)
+        if self.min_altitude is not None:
+            bad_altitude |= altitude < self.min_altitude
+        if self.max_altitude is not None:
+            bad_altitude |= altitude > self.max_altitude
+
+        return {
+            "outside": index[outside].tolist(),
+            "excluded": index[excluded].tolist(),
+            "legs": index[1:][bad_leg].tolist(),
+            "altitude": index[bad_altitude].tolist(),
+        }
@@ -0,0 +1,60 @@
+import numpy as np
+
+from mission_compiler import ROW_DELAY, ROW_DROP, ROW_WAYPOINT
+
+EARTH_RADIUS = 6371000.0  # m
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    """
+    Odległość (m) po kole wielkim między punktami - działa na całych tablicach.
+    """
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = (np.sin((lat2 - lat1) / 2) ** 2
+         + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS * np.arcsin(np.sqrt(a))
+
+
+def mission_stats(mission, height, speed=5.0, climb_rate=2.5, home=None):
+    """
+    Funkcja do oszacowania geometrii i czasu lotu skompilowanej misji (CompiledMission).
+    speed - prędkość przelotowa (m/s), climb_rate - prędkość wznoszenia (m/s),
+    home - opcjonalnie (lat, lon) startu: doliczany jest dolot do 1. punktu i powrót (RTL).
+    Zwraca słownik z długościami odcinków, ETA każdego wiersza (koniec jego wykonania, s)
+    i liczbą zrzutów.
+    """
+    kind = mission.kind
+    has_position = (kind == ROW_WAYPOINT) | (kind == ROW_DROP)
+    lat = mission.latitude[has_position]
+    lon = mission.longitude[has_position]
+
+    if home is not None and len(lat):
+        path_lat = np.concatenate(([home[0]], lat))
+        path_lon = np.concatenate(([home[1]], lon))
+        legs = haversine(path_lat[:-1], path_lon[:-1], path_lat[1:], path_lon[1:])
+        return_leg = float(haversine(lat[-1], lon[-1], home[0], home[1]))
+    else:
+        legs = np.concatenate(([0.0], haversine(lat[:-1], lon[:-1], lat[1:], lon[1:]))) if len(lat) else lat
+        return_leg = 0.0
+
+    # Czas każdego wiersza: przelot do punktu + postoje (delay, drop_delay, NAV_DELAY)
+    row_time = np.zeros(len(kind))
+    row_time[has_position] = legs / speed
+    delay = np.nan_to_num(mission.delay)
+    row_time += np.where((kind == ROW_WAYPOINT) | (kind == ROW_DROP) | (kind == ROW_DELAY), delay, 0.0)
+    row_time += np.where(kind == ROW_DROP, np.nan_to_num(mission.drop_delay), 0.0)
+
+    climb_time = height / climb_rate
+    eta = climb_time + np.cumsum(row_time)
+    mission_time = float(eta[-1]) if len(eta) else climb_time
+
+    return {
+        "legs": legs,
+        "eta": eta,
+        "total_distance": float(legs.sum()) + return_leg,
+        "return_distance": return_leg,
+        "climb_time": climb_time,
+        "total_time": mission_time + return_leg / speed,
+        "waypoints": int(has_position.sum()),
+        "drops": int((kind == ROW_DROP).sum()),
+    }
@@ -0,0 +1,289 @@
+import csv
+import io
+from xml.parsers import expat
+
+import numpy as np
+
+from mission_export import ARCHIVE_EXTENSION, ARCHIVE_MAGIC, read_archive
+
+# Kolumny misji w kolejności krotek zwracanych przez parsery
+IMPORT_COLUMNS = ('latitude', 'longitude', 'altitude', 'delay', 'drop', 'servo', 'servo_value_octa', 'drop_delay')
+FORMATS = ('csv', 'gpx', 'kml', 'wpl', 'archive')
+
+# Liczba wierszy przenoszonych naraz z listy krotek do tablic numpy
+BATCH = 4096
+
+# Rozmiar porcji pliku XML podawanej do parsera
+READ_SIZE = 64 * 1024
+
+# Komendy MAVLink w plikach QGC WPL
+NAV_WAYPOINT = 16
+NAV_RETURN_TO_LAUNCH = 20
+NAV_TAKEOFF = 22
+NAV_SPLINE_WAYPOINT = 82
+NAV_DELAY = 93
+DO_SET_SERVO = 183
+
+# Nazwy kolumn CSV akceptowane zamiast nazw kolumn misji
+CSV_ALIASES = {'lat': 'latitude', 'lon': 'longitude', 'lng': 'longitude', 'long': 'longitude',
+               'alt': 'altitude', 'ele': 'altitude', 'elevation': 'altitude'}
+
+NAN = float('nan')
+
+
+class MissionColumns:
+    def __init__(self, capacity=BATCH):
+        """
+        Rosnące kolumny float64 zapełniane porcjami krotek (bez DataFrame i list dla całego pliku).
+        """
+        self._data = np.full((capacity, len(IMPORT_COLUMNS)), np.nan)
+        self._count = 0
+        self._batch = []
+
+    def append(self, row):
+        self._batch.append(row)
+        if len(self._batch) == BATCH:
+            self.flush()
+
+    def flush(self):
+        if not self._batch:
+            return
+        end = self._count + len(self._batch)
+        if end > len(self._data):
+            grown = np.full((max(end, 2 * len(self._data)), len(IMPORT_COLUMNS)), np.nan)
+            grown[:self._count] = self._data[:self._count]
+            self._data = grown
+        self._data[self._count:end] = self._batch
+        self._count = end
+        self._batch = []
+
+    def columns(self):
+        self.flush()
+        return {name: self._data[:self._count, i].copy() for i, name in enumerate(IMPORT_COLUMNS)}
+
+
+def _float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        # Kolumny logiczne (np. drop) zapisane przez pandas jako True/False
+        return {'true': 1.0, 'false': 0.0}.get(str(value).strip().lower(), NAN)
+
+
+def waypoint(lat, lon, alt=NAN, delay=0.0):
+    return (lat, lon, alt, delay, 0.0, NAN, NAN, NAN)
+
+
+def parse_csv(file):
+    """
+    Wiersze misji z CSV. Nagłówek z nazwami kolumn misji (lub lat/lon/alt), bez nagłówka
+    kolumny to kolejno latitude, longitude, altitude.
+    """
+    reader = csv.reader(io.TextIOWrapper(file, encoding='utf-8-sig', newline=''))
+    first = next(reader, None)
+    if first is None:
+        return
+    names = [CSV_ALIASES.get(name.strip().lower(), name.strip().lower()) for name in first]
+    if 'latitude' not in names:
+        names = ['latitude', 'longitude', 'altitude']
+        reader = _chain(first, reader)
+    positions = [names.index(name) if name in names else None for name in IMPORT_COLUMNS]
+
+    for line in reader:
+        if not line:
+            continue
+        row = [_float(line[i]) if i is not None and i < len(line) else NAN for i in positions]
+        # Domyślnie punkt bez zrzutu i bez opóźnienia (wiersz opóźnienia nie ma współrzędnych)
+        if row[0] == row[0] and row[1] == row[1]:
+            row[3] = 0.0 if row[3] != row[3] else row[3]
+            row[4] = 0.0 if row[4] != row[4] else row[4]
+        yield tuple(row)
+
+
+def _chain(first, reader):
+    yield first
+    yield from reader
+
+
+def _parse_xml(file, start, end, text):
+    # Parser expat zasilany porcjami pliku; handlery dopisują wiersze do listy opróżnianej po każdej porcji
+    rows = []
+    tags = {}  # nazwa z przestrzenią nazw -> nazwa znacznika
+
+    def tag(name):
+        local = tags.get(name)
+        if local is None:
+            local = tags[name] = name.rsplit('}', 1)[-1]
+        return local
+
+    parser = expat.ParserCreate(namespace_separator='}')
+    parser.buffer_text = True
+    parser.StartElementHandler = lambda name, attrs: start(tag(name), attrs, rows)
+    parser.EndElementHandler = lambda name: end(tag(name), rows)
+    parser.CharacterDataHandler = lambda data: text(data, rows)
+    while True:
+        chunk = file.read(READ_SIZE)
+        parser.Parse(chunk, not chunk)
+        yield from rows
+        rows.clear()
+        if not chunk:
+            return
+
+
+def parse_gpx(file):
+    """
+    Punkty trasy z GPX (wpt, rtept, trkpt) w kolejności w pliku; ele to wysokość.
+    """
+    point = {}  # lat, lon i tekst ele bieżącego punktu; 'text' tylko wewnątrz <ele>
+
+    def start(tag, attrs, rows):
+        if tag in ('wpt', 'rtept', 'trkpt'):
+            point.update(lat=_float(attrs.get('lat')), lon=_float(attrs.get('lon')), ele='')
+        elif tag == 'ele' and point:
+            point['text'] = []
+
+    def end(tag, rows):
+        if tag == 'ele' and 'text' in point:
+            point['ele'] = ''.join(point.pop('text'))
+        elif tag in ('wpt', 'rtept', 'trkpt'):
+            rows.append(waypoint(point['lat'], point['lon'], _float(point['ele']) if point['ele'] else NAN))
+            point.clear()
+
+    def text(data, rows):
+        if 'text' in point:
+            point['text'].append(data)
+
+    return _parse_xml(file, start, end, text)
+
+
+def parse_kml(file):
+    """
+    Punkty z elementów <coordinates> KML ("lon,lat[,alt]" rozdzielone białymi znakami).
+    Tekst jest przetwarzany w kawałkach, więc długie linie nie są trzymane w pamięci w całości.
+    """
+    state = {'inside': False, 'rest': ''}
+
+    def point(value, rows):
+        values = value.split(',')
+        if len(values) >= 2:
+            rows.append(waypoint(_float(values[1]), _float(values[0]),
+                                 _float(values[2]) if len(values) > 2 else NAN))
+
+    def start(tag, attrs, rows):
+        if tag == 'coordinates':
+            state['inside'], state['rest'] = True, ''
+
+    def end(tag, rows):
+        if tag == 'coordinates':
+            point(state['rest'], rows)
+            state['inside'], state['rest'] = False, ''
+
+    def text(data, rows):
+        if not state['inside']:
+            return
+        values = (state['rest'] + data).split()
+        # Ostatni punkt może być ucięty na granicy kawałka tekstu
+        state['rest'] = values.pop() if values and not data[-1:].isspace() else ''
+        for value in values:
+            point(value, rows)
+
+    return _parse_xml(file, start, end, text)
+
+
+def _mission_rows(commands):
+    # Wiersze misji z kolejnych komend (seq, command, param1, param2, lat, lon, alt) - wspólne dla WPL i archiwum
+    pending = None  # ostatni punkt trasy - może dostać jeszcze zrzut
+    servo_set = False
+    for seq, command, param1, param2, lat, lon, alt in commands:
+        if command == DO_SET_SERVO and pending is not None and not servo_set:
+            pending = pending[:4] + (1.0, param1, param2, 0.0)
+            servo_set = True
+            continue
+        if command == NAV_DELAY and servo_set:
+            pending = pending[:7] + (param1,)
+            yield pending
+            pending, servo_set = None, False
+            continue
+
+        if pending is not None:
+            yield pending
+            pending, servo_set = None, False
+        if seq == 0 or command in (NAV_TAKEOFF, NAV_RETURN_TO_LAUNCH):
+            continue
+        if command in (NAV_WAYPOINT, NAV_SPLINE_WAYPOINT):
+            pending = waypoint(lat, lon, alt, param1)
+        elif command == NAV_DELAY:
+            yield (NAN, NAN, NAN, param1, NAN, NAN, NAN, NAN)
+    if pending is not None:
+        yield pending
+
+
+def parse_wpl(file):
+    """
+    Misja z pliku QGroundControl WPL 110. Pomija punkt domowy (seq 0), start i RTL - dodaje je
+    wgrywanie misji. DO_SET_SERVO oznacza zrzut w poprzednim punkcie, a następujący po nim
+    NAV_DELAY to opóźnienie po zrzucie.
+    """
+    if file.read(len(ARCHIVE_MAGIC)) == ARCHIVE_MAGIC:
+        # Archiwum binarne pod rozszerzeniem WPL (starsze eksporty zapisywane jako .mission)
+        file.seek(0)
+        yield from parse_archive(file)
+        return
+    file.seek(0)
+
+    lines = io.TextIOWrapper(file, encoding='utf-8-sig')
+    header = next(lines, '')
+    if not header.startswith('QGC WPL'):
+        raise ValueError("Not a QGC WPL file")
+
+    def commands():
+        for line in lines:
+            fields = line.split()
+            if len(fields) < 12:
+                continue
+            yield (int(fields[0]), int(fields[3]), _float(fields[4]), _float(fields[5]),
+                   _float(fields[8]), _float(fields[9]), _float(fields[10]))
+
+    yield from _mission_rows(commands())
+
+
+def parse_archive(file):
+    """
+    Misja z archiwum binarnego (eksport /mission/export?format=binary) - te same zasady co parse_wpl.
+    """
+    items = read_archive(file.read()).items()
+    yield from _mission_rows(zip(items['seq'].tolist(), items['command'].tolist(), items['param1'].tolist(),
+                                 items['param2'].tolist(), (items['x'] / 1e7).tolist(), (items['y'] / 1e7).tolist(),
+                                 items['z'].tolist()))
+
+
+PARSERS = {'csv': parse_csv, 'gpx': parse_gpx, 'kml': parse_kml, 'wpl': parse_wpl, 'archive': parse_archive}
+
+
+def detect_format(filename):
+    extension = (filename or '').rsplit('.', 1)[-1].lower()
+    if extension in ('waypoints', 'mission', 'txt'):
+        return 'wpl'
+    if extension == ARCHIVE_EXTENSION:
+        return 'archive'
+    if extension in FORMATS:
+        return extension
+    raise ValueError(f"Unknown mission file format: {filename}")
+
+
+def import_mission(file, format):
+    """
+    Funkcja do wczytania pliku misji (obiekt binarny z read()) jednym przejściem.
+    Zwraca słownik kolumn float64 w układzie IMPORT_COLUMNS (NaN = brak wartości).
+    """
+    if format not in PARSERS:
+        raise ValueError(f"Unknown mission file format: {format}")
+    columns = MissionColumns()
+    try:
+        for row in PARSERS[format](file):
+            columns.append(row)
+    except expat.ExpatError as e:
+        raise ValueError(f"Invalid {format.upper()} file: {e}")
+    except UnicodeDecodeError as e:
+        raise ValueError(f"Invalid {format.upper()} file encoding: {e}")
+    return columns.columns()
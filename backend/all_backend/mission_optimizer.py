@@ -0,0 +1,81 @@
+from mission_store import MissionStore
+
+NAV_WAYPOINT = 16
+NAV_SPLINE_WAYPOINT = 82
+NAV_DELAY = 93
+NAV_LAST = 95  # komendy <= NAV_LAST są nawigacyjne, pozostałe to komendy DO
+DO_JUMP = 177
+DO_SET_SERVO = 183
+DO_REPEAT_SERVO = 184
+
+# Czas postoju w punkcie (param1) autopilot przechowuje jako 16-bitową liczbę całkowitą
+MAX_HOLD = 65535
+
+
+def _is_nav(command):
+    return command <= NAV_LAST
+
+
+def _simple_delay(item):
+    # NAV_DELAY z czasem w param1 (param1 = -1 oznacza godzinę z param2-4)
+    return item[1] == NAV_DELAY and item[4] >= 0
+
+
+def _can_fold(item, delay):
+    # Postój w punkcie trasy (nie w punkcie startowym seq 0) o całkowitej liczbie sekund
+    hold = item[4] + delay
+    return (item[1] in (NAV_WAYPOINT, NAV_SPLINE_WAYPOINT) and item[4] >= 0
+            and float(hold).is_integer() and hold <= MAX_HOLD)
+
+
+def optimize_items(items):
+    """
+    Funkcja do uproszczenia listy elementów misji (krotki jak w MissionStore.fields()) bez zmiany lotu:
+    - usuwa NAV_DELAY 0 s,
+    - łączy sąsiednie NAV_DELAY i dokleja NAV_DELAY do postoju poprzedniego punktu trasy,
+    - usuwa DO_SET_SERVO ustawiające serwo na wartość, którą już ma.
+    Komendy DO wykonują się w trakcie poprzedniej komendy nawigacyjnej, więc NAV_DELAY
+    jest usuwany lub łączony tylko wtedy, gdy po nim nie ma komend DO. Elementy, do których
+    skacze DO_JUMP, zostają, a cele skoków są przenumerowane po usunięciu elementów.
+    """
+    commands = [item[1] for item in items]
+    linear = DO_JUMP not in commands and DO_REPEAT_SERVO not in commands
+    targets = {int(item[4]) for item in items if item[1] == DO_JUMP}
+    servos = {}
+    result = []
+    new_seq = {}
+
+    for position, item in enumerate(items):
+        next_is_nav = position + 1 == len(items) or _is_nav(commands[position + 1])
+
+        if _simple_delay(item) and next_is_nav and position not in targets:
+            delay = item[4]
+            if delay == 0:
+                continue
+            previous = result[-1] if len(result) > 1 else None
+            if previous is not None and (_simple_delay(previous) or _can_fold(previous, delay)):
+                result[-1] = previous[:4] + (previous[4] + delay,) + previous[5:]
+                continue
+
+        if item[1] == DO_SET_SERVO and linear:
+            servo, pwm = item[4], item[5]
+            if servos.get(servo) == pwm:
+                continue
+            servos[servo] = pwm
+
+        new_seq[position] = len(result)
+        result.append(item)
+
+    # Cele DO_JUMP wskazują numery sekwencji sprzed usunięcia elementów
+    return [item[:4] + (float(new_seq.get(int(item[4]), item[4])),) + item[5:] if item[1] == DO_JUMP else item
+            for item in result]
+
+
+def optimize_mission(store):
+    """
+    Zwraca nowy MissionStore po optymalizacji optimize_items.
+    """
+    optimized = MissionStore(capacity=max(1, store.count()))
+    for item in optimize_items(store.fields()):
+        optimized.append(*item)
+    return optimized
@@ -0,0 +1,161 @@
+import inspect
+
+import numpy as np
+from pymavlink import mavutil
+
+_MESSAGE = mavutil.mavlink.MAVLink_mission_item_int_message
+
+# Typy numpy odpowiadające znakom formatu struct w definicjach wiadomości pymavlink
+_STRUCT_TYPES = {'f': '<f4', 'd': '<f8', 'b': 'i1', 'B': 'u1', 'h': '<i2', 'H': '<u2',
+                 'i': '<i4', 'I': '<u4', 'q': '<i8', 'Q': '<u8', 'c': 'S1'}
+
+
+def message_dtype(message_class):
+    """
+    Typ rekordu o układzie identycznym z ładunkiem wiadomości na łączu (little-endian, bez wyrównania),
+    zbudowany z formatu wiadomości - z polami rozszerzeń, jeśli dialekt je wysyła (MAVLink 2: mission_type).
+    """
+    codes = message_class.native_format.decode()[1:]
+    fields = [(name, _STRUCT_TYPES[code]) if length == 0 else (name, _STRUCT_TYPES[code], (length,))
+              for name, code, length in zip(message_class.ordered_fieldnames, codes, message_class.array_lengths)]
+    dtype = np.dtype(fields)
+    if dtype.itemsize != message_class.unpacker.size:
+        raise ImportError(f"{message_class.msgname} wire layout not supported by message_dtype")
+    return dtype
+
+
+# Rekord o układzie ładunku MISSION_ITEM_INT, więc bajty rekordu są gotowym ładunkiem wiadomości.
+ITEM_DTYPE = message_dtype(_MESSAGE)
+
+# Pola stałe rekordu (target_system, target_component) i pola rozszerzeń (mission_type = 0: misja)
+_BASE_FIELDS = 14
+_EXTENSIONS = (0,) * (len(ITEM_DTYPE.names) - _BASE_FIELDS)
+
+# Najwięcej elementów misji - liczba w MISSION_COUNT to uint16
+MAX_ITEMS = 0xFFFF
+
+# Pola w kolejności krotek MissionPlanner.mission_fields()
+FIELD_ORDER = ['frame', 'command', 'current', 'autocontinue',
+               'param1', 'param2', 'param3', 'param4', 'x', 'y', 'z']
+
+
+def _has_fast_pack():
+    # MAVLink_message._pack(mav, crc_extra, payload, force_mavlink1) jest prywatne - sprawdzamy sygnaturę
+    try:
+        parameters = list(inspect.signature(_MESSAGE._pack).parameters)
+    except (AttributeError, TypeError, ValueError):
+        return False
+    return parameters[:4] == ['self', 'mav', 'crc_extra', 'payload'] and 'force_mavlink1' in parameters
+
+
+FAST_PACK = _has_fast_pack()
+
+
+def pack_payload(mav, template, payload, force_mavlink1=False, fast=FAST_PACK):
+    """
+    Ramka MAVLink z gotowego ładunku (nagłówek + ładunek + CRC). Przez prywatne _pack pymavlink,
+    gdy ma znaną sygnaturę, inaczej przez publiczne msg.pack() na wiadomości odtworzonej z ładunku.
+    """
+    if fast:
+        return template._pack(mav, template.crc_extra, payload, force_mavlink1=force_mavlink1)
+    values = template.unpacker.unpack(payload)
+    msg = type(template)(**dict(zip(template.ordered_fieldnames, values)))
+    return msg.pack(mav, force_mavlink1=force_mavlink1)
+
+
+class PackedItem:
+    """
+    Element misji z gotowym ładunkiem - mav.send() dokłada tylko nagłówek i CRC.
+    """
+    __slots__ = ('template', 'payload')
+
+    def __init__(self, template, payload):
+        self.template = template
+        self.payload = payload
+
+    def pack(self, mav, force_mavlink1=False):
+        return pack_payload(mav, self.template, self.payload, force_mavlink1)
+
+
+class MissionStore:
+    def __init__(self, capacity=64):
+        """
+        Misja w tablicy numpy (zamiast listy obiektów MAVLink w MAVWPLoader).
+        """
+        self._items = np.zeros(capacity, dtype=ITEM_DTYPE)
+        self._count = 0
+        self._payloads = None
+        self._target = None
+        self._template = _MESSAGE(0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0)
+
+    @classmethod
+    def from_array(cls, items):
+        """
+        Misja z gotowej tablicy ITEM_DTYPE (np. zmapowanego archiwum) - bez kopiowania.
+        """
+        if len(items) > MAX_ITEMS:
+            raise ValueError(f"Mission cannot have more than {MAX_ITEMS} items")
+        store = cls(capacity=1)
+        seq = np.arange(len(items))
+        if not np.array_equal(items['seq'], seq):
+            items['seq'] = seq
+        store._items = items
+        store._count = len(items)
+        return store
+
+    def count(self):
+        return self._count
+
+    def append(self, frame, command, current, autocontinue, param1, param2, param3, param4, x, y, z):
+        """
+        Dodaje element misji; seq to kolejny numer.
+        """
+        if self._count >= MAX_ITEMS:
+            raise ValueError(f"Mission cannot have more than {MAX_ITEMS} items")
+        if self._count == len(self._items):
+            grown = np.zeros(max(1, 2 * len(self._items)), dtype=ITEM_DTYPE)
+            grown[:self._count] = self._items
+            self._items = grown
+        self._items[self._count] = (param1, param2, param3, param4, x, y, z, self._count, command,
+                                    0, 0, frame, current, autocontinue) + _EXTENSIONS
+        self._count += 1
+        self._payloads = None
+
+    def add(self, msg):
+        """
+        Dodaje element z wiadomości MISSION_ITEM_INT (seq jest nadawany od nowa).
+        """
+        self.append(msg.frame, msg.command, msg.current, msg.autocontinue,
+                    msg.param1, msg.param2, msg.param3, msg.param4, msg.x, msg.y, msg.z)
+
+    def items(self):
+        """
+        Widok tablicy z elementami misji.
+        """
+        return self._items[:self._count]
+
+    def fields(self):
+        """
+        Elementy jako lista krotek w kolejności FIELD_ORDER.
+        """
+        return self.items()[FIELD_ORDER].tolist()
+
+    def prepare(self, target_system, target_component):
+        """
+        Pakuje wszystkie elementy do bajtów ładunku dla danego pojazdu (raz na misję i cel).
+        """
+        if self._payloads is not None and self._target == (target_system, target_component):
+            return
+        items = self.items()
+        items['target_system'] = target_system
+        items['target_component'] = target_component
+        buffer = items.tobytes()
+        size = ITEM_DTYPE.itemsize
+        self._payloads = [buffer[offset:offset + size] for offset in range(0, len(buffer), size)]
+        self._target = (target_system, target_component)
+
+    def packed(self, seq):
+        """
+        Element gotowy do mav.send() - wymaga wcześniejszego prepare().
+        """
+        return PackedItem(self._template, self._payloads[seq])
@@ -0,0 +1,257 @@
+import argparse
+import heapq
+import math
+import random
+import select
+import socket
+import threading
+import time
+
+from pymavlink import mavutil
+
+mavlink = mavutil.mavlink
+
+
+class SimVehicle:
+    def __init__(self, port, host='127.0.0.1', latency=0.0, jitter=0.0, loss=0.0, duplicate=0.0,
+                 reorder=0.0, legacy=False, ack_result=mavlink.MAV_MISSION_ACCEPTED,
+                 request_timeout=0.5, request_retries=10, heartbeat_interval=1.0, telemetry=False,
+                 home=(53.019070, 20.880290), seed=None):
+        """
+        Symulowany pojazd MAVLink (protokół misji) na lokalnym UDP - do testów i benchmarków
+        MissionPlannera bez autopilota ani SITL. Wysyła do host:port (stacja nasłuchuje jako udpin).
+        Łącze w obie strony: latency + losowe jitter (s), prawdopodobieństwo utraty (loss),
+        powielenia (duplicate) i zamiany kolejności (reorder) pakietu.
+        legacy - pojazd prosi o elementy przez MISSION_REQUEST zamiast MISSION_REQUEST_INT,
+        ack_result - wynik MAV_MISSION_RESULT w MISSION_ACK po odebraniu misji,
+        request_timeout, request_retries - ponawianie żądania elementu, który nie dotarł,
+        telemetry - razem z HEARTBEAT wysyła pozycję (okrąg wokół home), stan baterii i bieżący element misji.
+        """
+        self.address = (host, port)
+        self.latency = latency
+        self.jitter = jitter
+        self.loss = loss
+        self.duplicate = duplicate
+        self.reorder = reorder
+        self.legacy = legacy
+        self.ack_result = ack_result
+        self.request_timeout = request_timeout
+        self.request_retries = request_retries
+        self.heartbeat_interval = heartbeat_interval
+        self.telemetry = telemetry
+        self.home = home
+        self.random = random.Random(seed)
+
+        self.mission = []  # odebrane wiadomości MISSION_ITEM(_INT) w kolejności seq
+        self.counters = {"sent": 0, "received": 0, "lost": 0, "duplicated": 0, "reordered": 0,
+                         "re_requests": 0, "uploads": 0, "downloads": 0}
+
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._socket.bind((host, 0))
+        self._mav = mavlink.MAVLink(None, srcSystem=1, srcComponent=1)
+        self._parser = mavlink.MAVLink(None)
+        self._parser.robust_parsing = True
+        self._queue = []  # (czas, numer, kierunek, bajty) - pakiety w drodze
+        self._order = 0
+        self._receiving = None  # [kolejne seq, ostatnie seq, termin ponowienia, ponowienia, elementy]
+        self._stop = threading.Event()
+        self._thread = None
+
+    # Łącze
+
+    def _link(self, direction, data):
+        # Opóźnienie, utrata, powielenie i zamiana kolejności pakietu
+        if self.random.random() < self.loss:
+            self.counters["lost"] += 1
+            return
+        copies = 1
+        if self.random.random() < self.duplicate:
+            copies = 2
+            self.counters["duplicated"] += 1
+        for _ in range(copies):
+            delay = self.latency + self.random.random() * self.jitter
+            if self.random.random() < self.reorder:
+                # Pakiet wyprzedzony przez następne - dostaje dodatkowe opóźnienie
+                delay += self.latency + self.jitter + 0.005
+                self.counters["reordered"] += 1
+            self._order += 1
+            heapq.heappush(self._queue, (time.monotonic() + delay, self._order, direction, data))
+
+    def _send(self, msg):
+        self._link('out', msg.pack(self._mav))
+
+    def _deliver_due(self):
+        now = time.monotonic()
+        while self._queue and self._queue[0][0] <= now:
+            _, _, direction, data = heapq.heappop(self._queue)
+            if direction == 'out':
+                self._socket.sendto(data, self.address)
+                self.counters["sent"] += 1
+            else:
+                self.counters["received"] += 1
+                for msg in self._parser.parse_buffer(data) or []:
+                    self._handle(msg)
+
+    # Protokół misji
+
+    def _request(self, seq):
+        if self.legacy:
+            self._send(self._mav.mission_request_encode(255, 0, seq))
+        else:
+            self._send(self._mav.mission_request_int_encode(255, 0, seq))
+        self._receiving[2] = time.monotonic() + self.request_timeout
+
+    def _handle(self, msg):
+        kind = msg.get_type()
+        if kind == 'MISSION_COUNT':
+            self._receiving = [0, msg.count - 1, 0.0, 0, [None] * msg.count]
+            if msg.count == 0:
+                self._finish_upload()
+            else:
+                self._request(0)
+        elif kind == 'MISSION_WRITE_PARTIAL_LIST':
+            items = list(self.mission)
+            if not 0 <= msg.start_index <= msg.end_index < len(items):
+                self._send(self._mav.mission_ack_encode(255, 0, mavlink.MAV_MISSION_ERROR))
+                return
+            self._receiving = [msg.start_index, msg.end_index, 0.0, 0, items]
+            self._request(msg.start_index)
+        elif kind in ('MISSION_ITEM_INT', 'MISSION_ITEM'):
+            if self._receiving is None:
+                return
+            if msg.seq != self._receiving[0]:
+                return  # powtórzony lub spóźniony element - czekamy na żądany
+            self._receiving[4][msg.seq] = msg
+            self._receiving[0] += 1
+            self._receiving[3] = 0
+            if msg.seq == self._receiving[1]:
+                self._finish_upload()
+            else:
+                self._request(self._receiving[0])
+        elif kind == 'MISSION_REQUEST_LIST':
+            self.counters["downloads"] += 1
+            self._send(self._mav.mission_count_encode(255, 0, len(self.mission)))
+        elif kind in ('MISSION_REQUEST_INT', 'MISSION_REQUEST'):
+            if 0 <= msg.seq < len(self.mission):
+                self._send(self._item(msg.seq, integer=kind == 'MISSION_REQUEST_INT'))
+        elif kind == 'MISSION_CLEAR_ALL':
+            self.mission = []
+            self._send(self._mav.mission_ack_encode(255, 0, mavlink.MAV_MISSION_ACCEPTED))
+
+    def _finish_upload(self):
+        if self.ack_result == mavlink.MAV_MISSION_ACCEPTED:
+            self.mission = self._receiving[4]
+            self.counters["uploads"] += 1
+        self._receiving = None
+        self._send(self._mav.mission_ack_encode(255, 0, self.ack_result))
+
+    def _item(self, seq, integer):
+        item = self.mission[seq]
+        x, y = item.x, item.y
+        if item.get_type() == 'MISSION_ITEM':
+            x, y = int(x * 1e7), int(y * 1e7)
+        if integer:
+            return self._mav.mission_item_int_encode(255, 0, seq, item.frame, item.command, 0, item.autocontinue,
+                                                     item.param1, item.param2, item.param3, item.param4,
+                                                     x, y, item.z)
+        return self._mav.mission_item_encode(255, 0, seq, item.frame, item.command, 0, item.autocontinue,
+                                             item.param1, item.param2, item.param3, item.param4,
+                                             x / 1e7, y / 1e7, item.z)
+
+    def replace_mission(self, items):
+        """
+        Podmienia misję na pojeździe z pominięciem stacji - jak wgranie z innej stacji naziemnej.
+        items - krotki w kolejności MissionPlanner.mission_fields (frame, command, current, autocontinue,
+        param1..param4, x, y, z).
+        """
+        self.mission = [self._mav.mission_item_int_encode(255, 0, seq, frame, command, current, autocontinue,
+                                                          p1, p2, p3, p4, x, y, z)
+                        for seq, (frame, command, current, autocontinue, p1, p2, p3, p4, x, y, z)
+                        in enumerate(items)]
+
+    def _check_request(self):
+        # Ponowienie żądania elementu, który nie dotarł (utrata w dowolnym kierunku)
+        if self._receiving is None or time.monotonic() < self._receiving[2]:
+            return
+        if self._receiving[3] >= self.request_retries:
+            self._receiving = None
+            return
+        self._receiving[3] += 1
+        self.counters["re_requests"] += 1
+        self._request(self._receiving[0])
+
+    # Telemetria
+
+    def _send_telemetry(self, now):
+        angle = now / 20.0  # pełny okrąg w ~2 minuty
+        lat = self.home[0] + 0.0005 * math.sin(angle)
+        lon = self.home[1] + 0.0008 * math.cos(angle)
+        self._send(self._mav.global_position_int_encode(int(now * 1000) & 0xFFFFFFFF, int(lat * 1e7), int(lon * 1e7),
+                                                        130000, 30000, 0, 0, 0, int(math.degrees(angle) * 100) % 36000))
+        self._send(self._mav.sys_status_encode(0, 0, 0, 500, 12600, 1500, 87, 0, 0, 0, 0, 0, 0))
+        if self.mission:
+            self._send(self._mav.mission_current_encode(int(angle) % len(self.mission)))
+
+    # Pętla
+
+    def run(self):
+        next_heartbeat = 0.0
+        while not self._stop.is_set():
+            now = time.monotonic()
+            if now >= next_heartbeat:
+                self._send(self._mav.heartbeat_encode(mavlink.MAV_TYPE_QUADROTOR, mavlink.MAV_AUTOPILOT_ARDUPILOTMEGA,
+                                                      0, 0, mavlink.MAV_STATE_STANDBY))
+                if self.telemetry:
+                    self._send_telemetry(now)
+                next_heartbeat = now + self.heartbeat_interval
+            self._check_request()
+
+            wake = next_heartbeat
+            if self._queue:
+                wake = min(wake, self._queue[0][0])
+            if self._receiving is not None:
+                wake = min(wake, self._receiving[2])
+            readable, _, _ = select.select([self._socket], [], [], max(0.0, min(wake - time.monotonic(), 0.05)))
+            if readable:
+                data, _ = self._socket.recvfrom(65536)
+                self._link('in', data)
+            self._deliver_due()
+
+    def start(self):
+        self._thread = threading.Thread(target=self.run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._socket.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Symulowany pojazd MAVLink (protokół misji) na UDP")
+    parser.add_argument("--port", type=int, default=14550, help="port stacji (udpin:127.0.0.1:PORT)")
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--loss", type=float, default=0.0)
+    parser.add_argument("--duplicate", type=float, default=0.0)
+    parser.add_argument("--reorder", type=float, default=0.0)
+    parser.add_argument("--legacy", action="store_true", help="żądania MISSION_REQUEST zamiast MISSION_REQUEST_INT")
+    parser.add_argument("--telemetry", action="store_true", help="pozycja, bateria i bieżący element misji")
+    args = parser.parse_args()
+
+    vehicle = SimVehicle(args.port, latency=args.latency, jitter=args.jitter, loss=args.loss,
+                         duplicate=args.duplicate, reorder=args.reorder, legacy=args.legacy,
+                         telemetry=args.telemetry)
+    print(f"Simulated vehicle sending to udp:127.0.0.1:{args.port}")
+    try:
+        vehicle.run()
+    except KeyboardInterrupt:
+        print(vehicle.counters)
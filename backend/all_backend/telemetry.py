@@ -0,0 +1,198 @@
+import asyncio
+import json
+import threading
+import time
+
+from pymavlink import mavutil
+
+from event_log import EventLogger
+
+log = EventLogger("telemetry")
+
+
+def vehicle_state(vehicle):
+    """
+    Funkcja do odczytania stanu pojazdu z ostatnich wiadomości mavutil (bez czekania na nowe).
+    """
+    messages = vehicle.messages
+    heartbeat = messages.get('HEARTBEAT')
+    position = messages.get('GLOBAL_POSITION_INT')
+    status = messages.get('SYS_STATUS')
+    current = messages.get('MISSION_CURRENT')
+    return {
+        "lat": position.lat / 1e7 if position else None,
+        "lon": position.lon / 1e7 if position else None,
+        "altitude": position.relative_alt / 1000 if position else None,  # m nad punktem startu
+        "heading": position.hdg / 100 if position and position.hdg != 65535 else None,
+        "mode": vehicle.flightmode if heartbeat else None,
+        "armed": bool(vehicle.motors_armed()) if heartbeat else None,
+        "mission_seq": current.seq if current else None,
+        "battery_voltage": status.voltage_battery / 1000 if status and status.voltage_battery != 65535 else None,
+        "battery_remaining": status.battery_remaining if status and status.battery_remaining >= 0 else None,
+    }
+
+
+class VehicleReader:
+    def __init__(self, connection_string, pool, interval=0.1, stale_after=3.0, stream_rate=4,
+                 reconnect_interval=2.0):
+        """
+        Wątek czytający telemetrię jednego pojazdu przez połączenie z puli (wspólne z wgrywaniem misji).
+        interval - odstęp (s) między odczytami,
+        stale_after - po ilu sekundach bez HEARTBEAT pojazd jest uznany za rozłączony,
+        stream_rate - częstotliwość (Hz) strumieni telemetrii, o które prosimy pojazd,
+        reconnect_interval - odstęp między próbami ponownego połączenia.
+        """
+        self.connection_string = connection_string
+        self.pool = pool
+        self.interval = interval
+        self.stale_after = stale_after
+        self.stream_rate = stream_rate
+        self.reconnect_interval = reconnect_interval
+        self.state = {"connected": False}
+        self.version = 0
+        self.updated = None
+        self._streams_for = None  # połączenie, dla którego wysłano REQUEST_DATA_STREAM
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _request_streams(self, vehicle):
+        # ArduPilot wysyła pozycję i stan baterii przez UDP dopiero na prośbę stacji
+        vehicle.mav.request_data_stream_send(vehicle.target_system, vehicle.target_component,
+                                             mavutil.mavlink.MAV_DATA_STREAM_ALL, self.stream_rate, 1)
+        self._streams_for = vehicle
+
+    def _update(self, state):
+        if state != self.state:
+            self.state = state
+            self.updated = time.time()
+            self.version += 1
+
+    def read(self):
+        """
+        Jeden odczyt: stan z połączenia w puli albo próba połączenia, gdy go nie ma.
+        """
+        vehicle = self.pool.poll(self.connection_string)
+        if vehicle is None:
+            try:
+                with self.pool.connection(self.connection_string):
+                    pass
+            except (TimeoutError, OSError) as e:
+                if self.state["connected"] or self.version == 0:
+                    log.warning("telemetry_connect_failed", connection=self.connection_string, error=str(e))
+                self._update({"connected": False})
+                return False
+            return True
+        if self._streams_for is not vehicle:
+            self.pool.poll(self.connection_string, self._request_streams)
+        connected = vehicle.time_since('HEARTBEAT') <= self.stale_after
+        self._update({"connected": connected, **vehicle_state(vehicle)})
+        return True
+
+    def run(self):
+        while not self._stop.is_set():
+            self._stop.wait(self.interval if self.read() else self.reconnect_interval)
+
+    def start(self):
+        self._thread = threading.Thread(target=self.run, daemon=True, name=f"telemetry {self.connection_string}")
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=1.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def to_dict(self):
+        return {"vehicle": self.connection_string, "version": self.version, "updated": self.updated, **self.state}
+
+
+class TelemetryHub:
+    def __init__(self, pool, rate=4.0, keepalive=15.0, **reader_settings):
+        """
+        Ostatni stan obserwowanych pojazdów i rozsyłanie zmian do klientów (WebSocket/SSE).
+        Stan jest serializowany raz na zmianę i najwyżej rate razy na sekundę na pojazd -
+        każdy klient dostaje ten sam gotowy tekst, wolny klient pomija stany pośrednie.
+        keepalive - co ile sekund bez zmian strumień dostaje pusty komunikat podtrzymujący.
+        """
+        self.pool = pool
+        self.rate = rate
+        self.keepalive = keepalive
+        self.reader_settings = reader_settings
+        self._readers = {}
+        self._messages = {}  # pojazd -> (wersja, JSON)
+        self._lock = threading.Lock()
+        self._changed = None
+        self._task = None
+
+    def watch(self, connection_string):
+        with self._lock:
+            reader = self._readers.get(connection_string)
+            if reader is None:
+                reader = self._readers[connection_string] = VehicleReader(
+                    connection_string, self.pool, **self.reader_settings).start()
+        return reader
+
+    def unwatch(self, connection_string):
+        with self._lock:
+            reader = self._readers.pop(connection_string, None)
+        if reader is not None:
+            reader.stop()
+            self._messages.pop(connection_string, None)
+        return reader
+
+    def snapshot(self):
+        with self._lock:
+            readers = list(self._readers.values())
+        return {reader.connection_string: reader.to_dict() for reader in readers}
+
+    def publish(self):
+        """
+        Serializuje stany zmienione od ostatniej publikacji i budzi oczekujących klientów.
+        """
+        changed = False
+        for connection_string, reader in self.snapshot().items():
+            published = self._messages.get(connection_string)
+            if published is None or published[0] != reader["version"]:
+                self._messages[connection_string] = (reader["version"], json.dumps(reader))
+                changed = True
+        if changed and self._changed is not None:
+            self._changed.set()
+            self._changed = asyncio.Event()
+
+    async def updates(self, vehicle=None):
+        """
+        Generator kolejnych stanów (JSON) - najpierw aktualne, potem zmiany; None co keepalive sekund bez zmian.
+        vehicle - tylko ten pojazd (connection string), None - wszystkie.
+        """
+        seen = {}
+        while True:
+            changed = self._changed  # pobrane przed przeglądem - publikacja w trakcie nie zostanie zgubiona
+            for connection_string, (version, text) in list(self._messages.items()):
+                if (vehicle is None or connection_string == vehicle) and seen.get(connection_string) != version:
+                    seen[connection_string] = version
+                    yield text
+            try:
+                await asyncio.wait_for(changed.wait(), self.keepalive)
+            except asyncio.TimeoutError:
+                yield None
+
+    async def _run(self):
+        while True:
+            self.publish()
+            await asyncio.sleep(1 / self.rate)
+
+    def start(self):
+        if self._task is None:
+            self._changed = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for connection_string in list(self._readers):
+            self.unwatch(connection_string)
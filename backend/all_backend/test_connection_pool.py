@@ -0,0 +1,32 @@
+import pytest
+
+from bench_mission_protocol import free_port
+from connection_pool import ConnectionPool
+from sim_vehicle import SimVehicle
+
+
+@pytest.fixture
+def pool():
+    port = free_port()
+    pool = ConnectionPool(connect_timeout=5.0)
+    with SimVehicle(port):
+        yield pool, f"udpin:127.0.0.1:{port}"
+        pool.drain()
+
+
+def test_error_discards_connection(pool):
+    pool, connection_string = pool
+    with pytest.raises(OSError):
+        with pool.connection(connection_string):
+            raise OSError("link lost")
+    assert not pool.is_open(connection_string)
+
+
+def test_interrupt_keeps_connection(pool):
+    pool, connection_string = pool
+    with pytest.raises(KeyboardInterrupt):
+        with pool.connection(connection_string) as vehicle:
+            raise KeyboardInterrupt
+    assert pool.is_open(connection_string)
+    with pool.connection(connection_string) as again:
+        assert again is vehicle
@@ -0,0 +1,31 @@
+import asyncio
+import ssl
+
+from device_registry import DeviceRegistry
+from esp32_client import DeviceClients
+
+
+def test_removed_device_client_is_closed():
+    async def scenario():
+        clients = DeviceClients(port=80)
+        registry = DeviceRegistry(clients)
+        registry.register("map1", "192.0.2.1")
+        registry.register("map2", "192.0.2.1")
+        shared = clients.get("192.0.2.1")
+
+        # Adres nadal używany przez map2 - klient zostaje
+        await registry.remove("map1")
+        assert not shared.client.is_closed
+        assert clients.get("192.0.2.1") is shared
+
+        await registry.remove("map2")
+        assert shared.client.is_closed
+        assert clients.get("192.0.2.1") is not shared
+        await clients.aclose()
+
+    asyncio.run(scenario())
+
+
+def test_tls_verification_is_on_by_default():
+    assert DeviceClients().client_options["verify"].verify_mode == ssl.CERT_REQUIRED
+    assert DeviceClients(verify=False).client_options["verify"].verify_mode == ssl.CERT_NONE
@@ -0,0 +1,96 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import backend
+from bench_mission_compiler import make_mission
+from bench_mission_protocol import free_port
+from sim_vehicle import SimVehicle
+
+
+@pytest.fixture
+def vehicle():
+    port = free_port()
+    with TestClient(backend.app) as client, SimVehicle(port) as sim:
+        yield client, sim, port
+        backend.connection_pool.drain()
+        backend.mission_cache.invalidate(f"udpin:127.0.0.1:{port}")
+
+
+def upload(client, port, df):
+    request = {"data": df.to_json(orient='split'), "ip": "127.0.0.1", "port": port, "height": 30, "force": False}
+    job_id = client.post("/upload", json=request).json()["job_id"]
+    backend.upload_jobs.get(job_id).future.result()
+    status = client.get(f"/upload/{job_id}").json()
+    assert status["error"] is None
+    return status["result"]
+
+
+def onboard_items(sim):
+    return [(item.seq, item.command, item.x, item.y) for item in sim.mission]
+
+
+def test_changed_point_is_written_partially(vehicle):
+    client, sim, port = vehicle
+    df = make_mission(20)
+    assert upload(client, port, df)["write"] == "full"
+    assert upload(client, port, df)["write"] == "skipped"
+
+    row = df.index[df["latitude"].notna()][5]
+    df.loc[row, "latitude"] += 1e-4
+    result = upload(client, port, df)
+    assert result["write"] == "partial"
+
+
+def test_mission_changed_by_another_station_is_uploaded_in_full(vehicle):
+    client, sim, port = vehicle
+    df = make_mission(20)
+    upload(client, port, df)
+    expected = onboard_items(sim)
+
+    # Inna stacja wgrywa krótszą misję - pamięć podręczna o tym nie wie
+    sim.replace_mission([(item.frame, item.command, 0, item.autocontinue, item.param1, item.param2,
+                          item.param3, item.param4, item.x, item.y, item.z) for item in sim.mission[:-3]])
+
+    assert upload(client, port, df)["write"] == "full"
+    assert onboard_items(sim) == expected
+
+
+def test_same_length_mission_from_another_station_is_not_skipped(vehicle):
+    client, sim, port = vehicle
+    df = make_mission(20)
+    upload(client, port, df)
+    expected = onboard_items(sim)
+
+    # Inna stacja wgrywa misję tej samej długości z przesuniętymi punktami
+    sim.replace_mission([(item.frame, item.command, 0, item.autocontinue, item.param1, item.param2,
+                          item.param3, item.param4, item.x + 1000 if item.x else 0, item.y, item.z)
+                         for item in sim.mission])
+
+    assert upload(client, port, df)["write"] == "full"
+    assert onboard_items(sim) == expected
+
+
+def test_onboard_mission_is_revalidated(vehicle):
+    client, sim, port = vehicle
+    upload(client, port, make_mission(20))
+    count = len(sim.mission)
+    assert client.get(f"/vehicles/127.0.0.1:{port}/mission").json()["count"] == count
+
+    sim.replace_mission([])
+    assert client.get(f"/vehicles/127.0.0.1:{port}/mission").json()["count"] == 0
+
+
+def test_onboard_mission_edited_without_count_change_is_downloaded(vehicle):
+    client, sim, port = vehicle
+    upload(client, port, make_mission(20))
+    client.get(f"/vehicles/127.0.0.1:{port}/mission")
+
+    # Inna stacja przesuwa jeden punkt - liczba elementów bez zmian
+    items = [(item.frame, item.command, 0, item.autocontinue, item.param1, item.param2,
+              item.param3, item.param4, item.x, item.y, item.z) for item in sim.mission]
+    items[3] = items[3][:8] + (items[3][8] + 1000,) + items[3][9:]
+    sim.replace_mission(items)
+
+    response = client.get(f"/vehicles/127.0.0.1:{port}/mission").json()
+    assert response["cached"] is False
+    assert response["columns"]["latitude"][3] == pytest.approx(items[3][8] / 1e7)
@@ -0,0 +1,43 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import backend
+from mission_export import iter_archive
+from mission_geofence import Geofence
+from mission_store import MissionStore
+
+# Obszar lotu wokół lotniska (lat, lon) i limit wysokości
+AREA = [(53.0, 20.85), (53.0, 20.9), (53.05, 20.9), (53.05, 20.85)]
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(backend, "geofence", Geofence(include=[AREA], max_altitude=100))
+    with TestClient(backend.app) as client:
+        yield client
+
+
+def archive(points):
+    store = MissionStore()
+    store.append(0, 16, 0, 1, 0, 0, 0, 0, 0, 0, 30.0)  # punkt domowy
+    store.append(3, 22, 0, 1, 0, 0, 0, 0, 0, 0, 30.0)  # start
+    for lat, lon, altitude in points:
+        store.append(3, 16, 0, 1, 0, 0, 0, 0, int(lat * 1e7), int(lon * 1e7), altitude)
+    store.append(0, 20, 0, 1, 0, 0, 0, 0, 0, 0, 0)  # RTL
+    return b"".join(iter_archive(store.items()))
+
+
+def upload_archive(client, payload):
+    return client.post("/upload/archive", content=payload, params={"ip": "127.0.0.1", "port": 9})
+
+
+def test_archive_outside_geofence_is_rejected(client):
+    response = upload_archive(client, archive([(53.02, 20.88, 30), (53.2, 20.88, 30), (53.03, 20.88, 30)]))
+    assert response.status_code == 400
+    assert response.json()["detail"]["outside"] == [3]
+
+
+def test_archive_above_altitude_limit_is_rejected(client):
+    response = upload_archive(client, archive([(53.02, 20.88, 30), (53.03, 20.88, 150)]))
+    assert response.status_code == 400
+    assert response.json()["detail"]["altitude"] == [3]
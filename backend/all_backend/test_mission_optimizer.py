@@ -0,0 +1,88 @@
+from mission_optimizer import optimize_items, optimize_mission
+from mission_store import MissionStore
+
+HOME = (0, 16, 0, 1, 0.0, 0.0, 0.0, 0.0, 0, 0, 30.0)
+
+
+def waypoint(hold=0.0, lat=530190000):
+    return (3, 16, 0, 1, hold, 0.0, 0.0, 0.0, lat, 208800000, 30.0)
+
+
+def delay(seconds):
+    return (0, 93, 0, 1, seconds, -1.0, -1.0, -1.0, 0, 0, 0.0)
+
+
+def servo(number, pwm):
+    return (0, 183, 0, 1, number, pwm, 0.0, 0.0, 0, 0, 0.0)
+
+
+def jump(target, repeat=1.0):
+    return (0, 177, 0, 1, target, repeat, 0.0, 0.0, 0, 0, 0.0)
+
+
+def test_zero_delay_is_removed():
+    assert optimize_items([HOME, waypoint(), delay(0.0), waypoint(lat=1)]) == [HOME, waypoint(), waypoint(lat=1)]
+
+
+def test_adjacent_delays_are_merged():
+    items = [HOME, (3, 22, 0, 1, 0.0, 0.0, 0.0, 0.0, 0, 0, 30.0), delay(2.5), delay(1.5), waypoint()]
+    assert optimize_items(items) == [HOME, items[1], delay(4.0), waypoint()]
+
+
+def test_delay_is_folded_into_waypoint_hold():
+    assert optimize_items([HOME, waypoint(2.0), delay(3.0), waypoint(lat=1)]) == [HOME, waypoint(5.0),
+                                                                                waypoint(lat=1)]
+
+
+def test_repeated_servo_value_is_removed():
+    items = [HOME, waypoint(), servo(9, 1900.0), servo(9, 1900.0), servo(10, 1900.0), servo(9, 1100.0)]
+    assert optimize_items(items) == [HOME, waypoint(), servo(9, 1900.0), servo(10, 1900.0), servo(9, 1100.0)]
+
+
+def test_repeated_servo_value_is_removed_across_nav_item():
+    items = [HOME, waypoint(), servo(9, 1900.0), waypoint(lat=1), servo(9, 1900.0), waypoint(lat=2)]
+    assert optimize_items(items) == [HOME, waypoint(), servo(9, 1900.0), waypoint(lat=1), waypoint(lat=2)]
+
+
+def test_delay_followed_by_do_command_is_kept():
+    # Serwo działa w trakcie drugiego NAV_DELAY - połączenie skróciłoby czas przed zrzutem
+    items = [HOME, waypoint(), delay(2.0), delay(3.0), servo(9, 1900.0), waypoint(lat=1)]
+    assert optimize_items(items) == [HOME, waypoint(2.0), delay(3.0), servo(9, 1900.0), waypoint(lat=1)]
+
+
+def test_do_command_between_delays_blocks_merge():
+    items = [HOME, (3, 22, 0, 1, 0.0, 0.0, 0.0, 0.0, 0, 0, 30.0), delay(2.0), servo(9, 1900.0), delay(3.0),
+             waypoint()]
+    assert optimize_items(items) == items
+
+
+def test_delay_is_not_folded_into_home():
+    assert optimize_items([HOME, delay(3.0), waypoint()]) == [HOME, delay(3.0), waypoint()]
+
+
+def test_non_integer_hold_is_not_folded():
+    items = [HOME, waypoint(2.0), delay(1.5), waypoint(lat=1)]
+    assert optimize_items(items) == items
+
+
+def test_do_jump_target_is_renumbered():
+    items = [HOME, waypoint(), delay(0.0), waypoint(lat=1), servo(9, 1900.0), jump(3.0), waypoint(lat=2)]
+    assert optimize_items(items) == [HOME, waypoint(), waypoint(lat=1), servo(9, 1900.0), jump(2.0),
+                                     waypoint(lat=2)]
+
+
+def test_do_jump_target_delay_is_kept():
+    items = [HOME, waypoint(2.0), delay(3.0), waypoint(lat=1), jump(2.0), waypoint(lat=2)]
+    assert optimize_items(items) == items
+
+
+def test_servo_is_kept_when_mission_has_do_jump():
+    items = [HOME, waypoint(), servo(9, 1900.0), waypoint(lat=1), servo(9, 1900.0), jump(1.0)]
+    assert optimize_items(items) == items
+
+
+def test_optimize_mission_returns_store():
+    store = MissionStore()
+    for item in [HOME, waypoint(2.0), delay(3.0), waypoint(lat=1)]:
+        store.append(*item)
+    assert optimize_mission(store).fields() == [HOME, waypoint(5.0), waypoint(lat=1)]
@@ -0,0 +1,15 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import backend
+from bench_mission_compiler import make_mission
+
+
+@pytest.mark.parametrize("field", ["speed", "climb_rate"])
+@pytest.mark.parametrize("value", [0, -1.5])
+def test_non_positive_rates_are_rejected(field, value):
+    payload = {"data": make_mission(10).to_json(orient='split'), "height": 30, field: value}
+    with TestClient(backend.app) as client:
+        assert client.post("/mission/stats", json=payload).status_code == 422
+        assert client.post("/mission/stats", content=b"", params={"height": 30, field: value},
+                           headers={"Content-Type": backend.MISSION_CONTENT_TYPE}).status_code == 422
@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+from pymavlink import mavutil
+
+import backend
+from mission_store import FAST_PACK, ITEM_DTYPE, MAX_ITEMS, MissionStore, pack_payload
+
+mavlink = mavutil.mavlink
+
+
+def test_item_dtype_matches_wire_layout():
+    message = mavlink.MAVLink_mission_item_int_message
+    assert ITEM_DTYPE.itemsize == message.unpacker.size
+    assert ITEM_DTYPE.names == tuple(message.ordered_fieldnames[:len(ITEM_DTYPE.names)])
+
+
+@pytest.mark.parametrize("fast", [FAST_PACK, False])
+def test_packed_item_matches_encoded_message(fast):
+    store = MissionStore()
+    store.append(mavlink.MAV_FRAME_GLOBAL_RELATIVE_ALT, 16, 0, 1, 2.5, 0, 0, 0, 530191234, 208801234, 30.0)
+    store.append(0, 183, 0, 1, 1.0, 1500.0, 0.0, 0.0, 0, 0, 0)
+    store.prepare(1, 1)
+
+    for seq, (frame, command, current, autocontinue, p1, p2, p3, p4, x, y, z) in enumerate(store.fields()):
+        expected = mavlink.MAVLink(None, srcSystem=255, srcComponent=0).mission_item_int_encode(
+            1, 1, seq, frame, command, current, autocontinue, p1, p2, p3, p4, x, y, z)
+        packed = store.packed(seq)
+        assert pack_payload(mavlink.MAVLink(None, srcSystem=255, srcComponent=0), packed.template, packed.payload,
+                            fast=fast) == expected.pack(mavlink.MAVLink(None, srcSystem=255, srcComponent=0))
+
+
+def test_store_rejects_more_than_max_items():
+    store = MissionStore.from_array(np.zeros(MAX_ITEMS, dtype=ITEM_DTYPE))
+    with pytest.raises(ValueError):
+        store.append(0, 93, 0, 1, 1.0, 0, 0, 0, 0, 0, 0)
+    with pytest.raises(ValueError):
+        MissionStore.from_array(np.zeros(MAX_ITEMS + 1, dtype=ITEM_DTYPE))
+
+
+def test_upload_rejects_too_long_mission():
+    rows = MAX_ITEMS - 2
+    df = pd.DataFrame({"latitude": np.full(rows, 53.019), "longitude": np.full(rows, 20.880),
+                       "delay": np.zeros(rows), "drop": np.zeros(rows)})
+    with TestClient(backend.app) as client:
+        response = client.post("/upload", json={"data": df.to_json(orient='split'), "ip": "127.0.0.1",
+                                                "port": 14550, "height": 30})
+    assert response.status_code == 400
+    assert "too long" in response.json()["detail"]
+
+
+@pytest.mark.parametrize("path", ["/upload", "/mission/export"])
+def test_coordinates_out_of_range_are_rejected(path):
+    df = pd.DataFrame({"latitude": [53.019, 530.19], "longitude": [20.88, 20.88], "delay": [0.0, 0.0],
+                       "drop": [0.0, 0.0]})
+    with TestClient(backend.app) as client:
+        response = client.post(path, json={"data": df.to_json(orient='split'), "ip": "127.0.0.1",
+                                           "port": 14550, "height": 30})
+    assert response.status_code == 400
+    assert "rows: [1]" in response.json()["detail"]
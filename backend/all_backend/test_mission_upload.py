@@ -0,0 +1,21 @@
+from fastapi.testclient import TestClient
+
+import backend
+from bench_mission_compiler import make_mission
+from bench_mission_protocol import free_port
+from sim_vehicle import SimVehicle
+
+
+def test_unknown_rejection_code_is_reported_by_number():
+    port = free_port()
+    vehicle = f"udpin:127.0.0.1:{port}"
+    with TestClient(backend.app) as client, SimVehicle(port, ack_result=200):
+        request = {"data": make_mission(5).to_json(orient='split'), "ip": "127.0.0.1", "port": port,
+                   "height": 30, "force": True}
+        job_id = client.post("/upload", json=request).json()["job_id"]
+        backend.upload_jobs.get(job_id).future.result()
+        status = client.get(f"/upload/{job_id}").json()
+        backend.connection_pool.drain()
+
+    assert "MAV_MISSION_RESULT_200" in status["error"]
+    assert backend.upload_errors_total._values[(vehicle, "mav_mission_result_200")] == 1
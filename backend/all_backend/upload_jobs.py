@@ -0,0 +1,122 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from event_log import EventLogger, EventTrace
+
+# Stany zadania wgrywania misji
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+log = EventLogger("jobs")
+
+
+class UploadJob:
+    def __init__(self, connection_string):
+        """
+        Zadanie wgrania misji wykonywane w tle.
+        """
+        self.id = uuid.uuid4().hex
+        self.connection_string = connection_string
+        self.state = QUEUED
+        self.seq = None
+        self.count = None
+        self.result = None
+        self.error = None
+        self.timings = {}
+        self.trace = EventTrace()  # oś czasu zadania (GET /upload/{id}/trace)
+        self.future = None
+        self._last_mark = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+
+    def report_progress(self, seq, count):
+        """
+        Wywoływane przez MissionPlanner po wysłaniu elementu misji.
+        """
+        self.seq = seq
+        self.count = count
+
+    def mark(self, stage):
+        """
+        Zapisuje czas etapu (w sekundach) liczony od poprzedniego etapu.
+        """
+        now = time.perf_counter()
+        self.timings[stage] = now - self._last_mark
+        self._last_mark = now
+        self.trace.add(stage, seconds=self.timings[stage])
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "connection": self.connection_string,
+            "state": self.state,
+            "progress": {"seq": self.seq, "count": self.count},
+            "result": self.result,
+            "error": self.error,
+            "timings": self.timings,
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished,
+        }
+
+
+class UploadJobQueue:
+    def __init__(self, max_workers=4, history=100):
+        """
+        Kolejka zadań na ograniczonej puli wątków.
+        history - ile zakończonych zadań trzymamy do odpytywania.
+        """
+        self.history = history
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="upload")
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, connection_string, fn, *args):
+        """
+        Dodaje zadanie fn(job, *args); wynik fn trafia do job.result.
+        """
+        job = UploadJob(connection_string)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._forget_finished()
+        job.future = self._executor.submit(self._run, job, fn, args)
+        return job
+
+    def _run(self, job, fn, args):
+        job.state = RUNNING
+        job.started = time.time()
+        job.timings["queued"] = job.started - job.created
+        job._last_mark = time.perf_counter()
+        job.trace.add("started", queued=job.timings["queued"])
+        try:
+            job.result = fn(job, *args)
+            job.state = DONE
+        except Exception as e:
+            job.error = str(e)
+            job.state = FAILED
+        finally:
+            job.finished = time.time()
+            job.trace.add(job.state, error=job.error)
+        if job.error is None:
+            log.info("job_done", job_id=job.id, connection=job.connection_string, seconds=job.finished - job.started)
+        else:
+            log.error("job_failed", job_id=job.id, connection=job.connection_string, error=job.error)
+
+    def _forget_finished(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.state in (DONE, FAILED)]
+        for job_id in finished[:max(0, len(finished) - self.history)]:
+            del self._jobs[job_id]
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self):
+        with self._lock:
+            return list(self._jobs.values())
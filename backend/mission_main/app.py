@@ -1,30 +1,15 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
+import os
+import sys
 import pandas as pd
 import uvicorn
 from createmission import MissionPlanner
 
+# Wspólny kompilator misji z backend/all_backend (obraz Dockera kopiuje go obok app.py)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'all_backend'))
+from mission_compiler import compile_dataframe, emit_mission
 
-def parse_row(row):
-    if pd.notna(row['latitude']) and pd.notna(row['longitude']):
-        if row['drop'] == 0:
-            return {"add_waypoint": [row['latitude'], row['longitude']], "delay": row['delay']}
-        elif row['drop'] == 1 and pd.notna(row['servo']):
-            if pd.notna(row['drop_delay']):
-                return {"add_waypoint": [row['latitude'], row['longitude']], "delay": row['delay'], 
-                        "set_servo": row['servo'], "drop_delay": row['drop_delay']}
-            
-    elif pd.isna(row['latitude']) and pd.isna(row['longitude']) and pd.notna(row['delay']):
-        return {"delay": row['delay']}
-    return None
-
-def parse_dataframe(df):
-    results = []
-    for _, row in df.iterrows():
-        result = parse_row(row)
-        if result:
-            results.append(result)
-    return results
 
 app = FastAPI()
 
@@ -44,7 +29,9 @@ async def upload(payload: DataFramePayload):
         ip, port = payload.ip, payload.port
         
         height = payload.height
-        parsed_data = parse_dataframe(df)
+        mission = compile_dataframe(df)
+        if mission.invalid_rows:
+            raise HTTPException(status_code=400, detail=f"Invalid rows: {mission.invalid_rows}")
         try:
             planner = MissionPlanner(f'udpin:{ip}:{port}')
         except Exception as e:
@@ -53,25 +40,7 @@ async def upload(payload: DataFramePayload):
         try:
             planner.add_takeoff(altitude=height)
             
-            
-            for command in parsed_data:
-                
-                if ('add_waypoint' in command and 'delay' in command 
-                      and 'set_servo' in command and 'drop_delay' in command):
-                    planner.add_waypoint(lat=command['add_waypoint'][0], lon=command['add_waypoint'][1], 
-                                         altitude=height, delay=command['delay'])
-                    
-                    planner.set_servo(servo_number=command['set_servo'], pwm=1500)
-                    planner.set_delay(delay_seconds=command['drop_delay'])
-                    
-                elif 'add_waypoint' in command and 'delay' in command:
-                    planner.add_waypoint(lat=command['add_waypoint'][0], lon=command['add_waypoint'][1], 
-                                         altitude=height, delay=command['delay'])
-                    
-                elif 'delay' in command:
-                    planner.set_delay(delay_seconds=command['delay'])
-                else:
-                    return {"message": f"Invalid data received {command} "}, 400
+            emit_mission(mission, planner, height, servo_pwm=1500)
             planner.add_return_to_launch()
             
             mission_upload_status = planner.upload_mission()
@@ -0,0 +1,72 @@
+import argparse
+import time
+
+import folium
+import numpy as np
+import pandas as pd
+
+from mission_map import build_map, mission_key
+
+
+def make_gps_data(points, seed=0):
+    # Mission table like st.session_state.gps_data, ~10% drops
+    rng = np.random.default_rng(seed)
+    drop = rng.random(points) < 0.1
+    return pd.DataFrame({
+        "latitude": 53.019 + rng.random(points) * 0.01,
+        "longitude": 20.880 + rng.random(points) * 0.01,
+        "altitude": 10.0,
+        "timestamp": "2024-06-01 12:00:00",
+        "delay": rng.integers(0, 10, points),
+        "drop": drop,
+        "servo": np.where(drop, 1, np.nan),
+        "servo_value_octa": np.where(drop, 1500, np.nan),
+        "drop_delay": np.where(drop, 2, np.nan),
+    })
+
+
+def legacy_map(gps_data):
+    # Previous show_map: one folium.Marker per row via iterrows() and a PolyLine
+    data = gps_data.dropna(subset=['latitude', 'longitude'])
+    map_ = folium.Map(location=[data['latitude'].mean(), data['longitude'].mean()], zoom_start=12)
+    for _, row in data.iterrows():
+        popup_text = f"Lat: {row['latitude']}<br>Lon: {row['longitude']}<br>Alt: {row['altitude']}m"
+        if row['delay']:
+            popup_text += f"<br>Delay after match: {row['delay']}s"
+        if row['drop']:
+            popup_text += f"<br>Servo {row['servo']}, Delay after servo: {row['drop_delay']}s"
+        folium.Marker(location=[row['latitude'], row['longitude']], popup=popup_text).add_to(map_)
+    folium.PolyLine(locations=data[['latitude', 'longitude']].values.tolist(), color='blue').add_to(map_)
+    map_.add_child(folium.LatLngPopup())
+    return map_
+
+
+def render(build, gps_data):
+    # Build the map and render it to the HTML that st_folium sends to the browser
+    start = time.perf_counter()
+    html = build(gps_data).get_root().render()
+    return time.perf_counter() - start, len(html)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Map rendering benchmark for GPSDataViewer.show_map")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1_000, 10_000])
+    args = parser.parse_args()
+
+    print(f"{'points':>8} {'legacy ms':>10} {'legacy kB':>10} {'new ms':>8} {'new kB':>8} {'cached ms':>10}")
+    for points in args.sizes:
+        gps_data = make_gps_data(points)
+        legacy_time, legacy_size = render(legacy_map, gps_data)
+        new_time, new_size = render(build_map, gps_data)
+
+        # Unchanged mission on a rerun: only the content hash is computed
+        start = time.perf_counter()
+        mission_key(gps_data)
+        cached_time = time.perf_counter() - start
+
+        print(f"{points:>8} {legacy_time * 1e3:>10.1f} {legacy_size / 1e3:>10.0f} "
+              f"{new_time * 1e3:>8.1f} {new_size / 1e3:>8.0f} {cached_time * 1e3:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
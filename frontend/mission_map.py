@@ -0,0 +1,85 @@
+import hashlib
+
+import folium
+import pandas as pd
+from folium.plugins import FastMarkerCluster
+
+# Default map center (Przasnysz)
+DEFAULT_CENTER = (53.0190701, 20.8802902)
+
+# Up to this many points each one gets its own marker, above that markers are clustered
+MARKER_LIMIT = 100
+
+# Marker with popup created in the browser from a [lat, lon, alt, delay, servo, drop_delay] row,
+# so only numbers (not popup HTML) are embedded in the page
+CLUSTER_CALLBACK = """
+function (row) {
+    var marker = L.marker(new L.LatLng(row[0], row[1]));
+    var text = "Lat: " + row[0] + "<br>Lon: " + row[1] + "<br>Alt: " + row[2] + "m";
+    if (row[3] !== 0) {
+        text += "<br>Delay after match: " + row[3] + "s";
+    }
+    if (row[4] !== null) {
+        text += "<br>Servo " + row[4] + ", Delay after servo: " + row[5] + "s";
+    }
+    marker.bindPopup(text);
+    return marker;
+};
+"""
+
+
+def mission_key(gps_data):
+    # Content hash of the mission table - unchanged missions reuse the rendered map
+    hashed = pd.util.hash_pandas_object(gps_data, index=True).to_numpy()
+    return hashlib.sha1(hashed.tobytes() + ",".join(gps_data.columns).encode()).hexdigest()
+
+
+def popup_texts(data):
+    # Same popup text as the per-row markers, built for whole columns at once
+    text = ("Lat: " + data['latitude'].astype(str) + "<br>Lon: " + data['longitude'].astype(str)
+            + "<br>Alt: " + data['altitude'].astype(str) + "m")
+    delay = "<br>Delay after match: " + data['delay'].astype(str) + "s"
+    drop = ("<br>Servo " + data['servo'].astype(str) + ", Delay after servo: "
+            + data['drop_delay'].astype(str) + "s")
+    text = text + delay.where(data['delay'] != 0, "")
+    text = text + drop.where(data['drop'].fillna(True).astype(bool), "")
+    return text.tolist()
+
+
+def _numbers(column):
+    # Column as a list of floats with None for missing values (JSON null)
+    values = pd.to_numeric(column, errors='coerce')
+    return values.astype(object).where(values.notna(), None).tolist()
+
+
+def cluster_rows(data):
+    drop = data['drop'].fillna(True).astype(bool)
+    servo = data['servo'].where(drop, None)
+    return [list(row) for row in zip(_numbers(data['latitude']), _numbers(data['longitude']),
+                                      _numbers(data['altitude']), _numbers(data['delay']),
+                                      _numbers(servo), _numbers(data['drop_delay']))]
+
+
+def build_map(gps_data, marker_limit=MARKER_LIMIT):
+    data = gps_data.dropna(subset=['latitude', 'longitude'])
+    latitude = pd.to_numeric(data['latitude']).to_numpy(dtype=float)
+    longitude = pd.to_numeric(data['longitude']).to_numpy(dtype=float)
+    center = (latitude.mean(), longitude.mean()) if len(data) else DEFAULT_CENTER
+
+    map_ = folium.Map(location=list(center), zoom_start=12)
+
+    if len(data) <= marker_limit:
+        for lat, lon, text in zip(latitude.tolist(), longitude.tolist(), popup_texts(data)):
+            folium.Marker(location=[lat, lon], popup=text).add_to(map_)
+    else:
+        FastMarkerCluster(cluster_rows(data), callback=CLUSTER_CALLBACK).add_to(map_)
+
+    if len(data):
+        # Whole route as a single GeoJSON line (GeoJSON uses lon, lat order)
+        route = {"type": "Feature", "properties": {},
+                 "geometry": {"type": "LineString",
+                              "coordinates": [[lon, lat] for lat, lon in zip(latitude.tolist(), longitude.tolist())]}}
+        folium.GeoJson(route, style_function=lambda feature: {"color": "blue"}).add_to(map_)
+
+    map_.add_child(folium.LatLngPopup())
+    return map_
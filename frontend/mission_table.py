@@ -0,0 +1,112 @@
+import numpy as np
+import pandas as pd
+
+# Columns of the mission table and their types (NaN = no value)
+COLUMNS = {
+    "latitude": "f8",
+    "longitude": "f8",
+    "altitude": "f8",
+    "timestamp": "datetime64[s]",
+    "delay": "f8",
+    "drop": "f8",
+    "servo": "f8",
+    "servo_value_octa": "f8",
+    "drop_delay": "f8",
+}
+
+
+def _empty(dtype, size):
+    return np.full(size, np.datetime64("NaT") if dtype.startswith("datetime") else np.nan, dtype=dtype)
+
+
+class MissionTable:
+    """Mission points kept in preallocated typed columns.
+
+    Appends are amortized O(1) (capacity doubles when full), edits are in place and
+    deletes only shift the tail of each column. A DataFrame is built only in to_frame(),
+    and reused until the next change.
+    """
+
+    def __init__(self, capacity=64):
+        self._columns = {name: _empty(dtype, capacity) for name, dtype in COLUMNS.items()}
+        self._count = 0
+        self._frame = None
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def empty(self):
+        return self._count == 0
+
+    def _set_row(self, index, values):
+        for name, dtype in COLUMNS.items():
+            value = values.get(name)
+            if name == "timestamp":
+                value = np.datetime64(value or "now", "s")
+            elif value is None:
+                value = np.nan
+            self._columns[name][index] = value
+        self._frame = None
+
+    def _reserve(self, size):
+        capacity = len(self._columns["latitude"])
+        if size <= capacity:
+            return
+        while capacity < size:
+            capacity *= 2
+        for name, dtype in COLUMNS.items():
+            grown = _empty(dtype, capacity)
+            grown[:self._count] = self._columns[name][:self._count]
+            self._columns[name] = grown
+
+    def append(self, **values):
+        self._reserve(self._count + 1)
+        self._set_row(self._count, values)
+        self._count += 1
+
+    def extend(self, frame):
+        # Bulk append of a DataFrame or dict of arrays with (a subset of) the mission columns
+        size = self._count + len(frame["latitude"])
+        self._reserve(size)
+        for name in COLUMNS:
+            target = self._columns[name][self._count:size]
+            if name == "timestamp":
+                target[:] = (pd.to_datetime(frame[name]).to_numpy("datetime64[s]") if name in frame
+                             else np.datetime64("now", "s"))
+            elif name in frame:
+                values = pd.to_numeric(pd.Series(frame[name], copy=False), errors="coerce")
+                target[:] = values.to_numpy(dtype=float, na_value=np.nan)
+            else:
+                target[:] = np.nan
+        self._count = size
+        self._frame = None
+
+    def set(self, index, **values):
+        if not 0 <= index < self._count:
+            raise IndexError(f"Point {index} does not exist")
+        self._set_row(index, values)
+
+    def delete(self, index):
+        if not 0 <= index < self._count:
+            raise IndexError(f"Point {index} does not exist")
+        for column in self._columns.values():
+            column[index:self._count - 1] = column[index + 1:self._count]
+        self._count -= 1
+        self._frame = None
+
+    def clear(self):
+        self._count = 0
+        self._frame = None
+
+    def column(self, name):
+        # Read-only view of one column (no copy)
+        view = self._columns[name][:self._count]
+        view.flags.writeable = False
+        return view
+
+    def to_frame(self):
+        if self._frame is None:
+            self._frame = pd.DataFrame({name: column[:self._count].copy()
+                                        for name, column in self._columns.items()})
+        return self._frame
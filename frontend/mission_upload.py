@@ -1,11 +1,21 @@
+import json
+import os
+import sys
 import streamlit as st
 import folium
 from streamlit_folium import st_folium
 import requests
-import pandas as pd
 import numpy as np
+import time
 from datetime import datetime
 
+# Shared mission codec from backend/all_backend (the Docker image copies it next to this file)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend', 'all_backend'))
+from mission_codec import MISSION_CONTENT_TYPE, decode_mission, encode_mission
+from mission_map import build_map, mission_key
+from mission_table import MissionTable
+from vehicle_telemetry import show_vehicle_telemetry
+
 # Page configuration
 st.set_page_config(layout="wide", page_title="Real-Time Map Updates with Panels")
 
@@ -30,15 +40,20 @@ if 'points' not in st.session_state:
         "map3": [53.01907010, 20.88029020, 10.0],  # Przasnysz
         "map4": [53.01907010, 20.88029020, 10.0]   # Przasnysz
     }
-    st.session_state.gps_data = pd.DataFrame(columns=["latitude", "longitude", "altitude", "timestamp", "delay", "drop", "servo", "servo_value_octa", "drop_delay"])  # Placeholder for GPS data
+    st.session_state.gps_table = MissionTable()  # GPS data, turned into a DataFrame only for display/upload
+
+# Default beacon IP addresses for each map, shared with the backend device registry
+# (SZTAFETA_BEACONS_FILE overrides the path; the Docker image sets it to the copy next to this file)
+BEACONS_FILE = os.environ.get("SZTAFETA_BEACONS_FILE", os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), '..', 'backend', 'all_backend', 'beacons.json'))
+with open(BEACONS_FILE) as f:
+    default_settings = json.load(f)
+
+@st.cache_resource(max_entries=4)
+def cached_map(key, _gps_data):
+    # Cached on the content hash only - the DataFrame itself is not hashed by Streamlit
+    return build_map(_gps_data)
 
-# Define default IP addresses and ports for each map
-default_settings = {
-    "map1": ("192.168.69.90"),
-    "map2": ("192.168.69.2"),
-    "map3": ("192.168.1.3"),
-    "map4": ("192.168.1.4"),
-}
 
 class GPSDataViewer:
     def __init__(self):
@@ -51,53 +66,90 @@ class GPSDataViewer:
             st.session_state.edit_index = None
 
     def add_gps_point(self, lat, lon, alt, delay, drop, servo, servo_value_octa, drop_delay, index=None):
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        new_point = pd.DataFrame({
-            'latitude': [lat], 
-            'longitude': [lon], 
-            'altitude': [alt],
-            'timestamp': [timestamp],
-            'delay': [delay],
-            'drop': [drop],
-            'servo': [servo],
-            'servo_value_octa': [servo_value_octa],
-            'drop_delay': [drop_delay]
-        })
-
+        point = dict(latitude=lat, longitude=lon, altitude=alt, timestamp=datetime.now(), delay=delay,
+                     drop=drop, servo=servo, servo_value_octa=servo_value_octa, drop_delay=drop_delay)
         if index is not None:
-            st.session_state.gps_data.iloc[index] = new_point.iloc[0]
+            st.session_state.gps_table.set(index, **point)
         else:
-            st.session_state.gps_data = pd.concat([st.session_state.gps_data, new_point], ignore_index=True)
+            st.session_state.gps_table.append(**point)
 
     def remove_gps_point(self, index):
-        st.session_state.gps_data = st.session_state.gps_data.drop(index).reset_index(drop=True)
+        st.session_state.gps_table.delete(index)
 
     def show_map(self):
-        data = st.session_state.gps_data.dropna(subset=['latitude', 'longitude'])
-        if not data.empty:
-            center_lat = data['latitude'].mean()
-            center_lon = data['longitude'].mean()
-        else:
-            center_lat = 53.0190701
-            center_lon = 20.8802902
-        
-        map_ = folium.Map(location=[center_lat, center_lon], zoom_start=12)
-        
-        if not data.empty:
-            for _, row in data.iterrows():
-                popup_text = f"Lat: {row['latitude']}<br>Lon: {row['longitude']}<br>Alt: {row['altitude']}m"
-                if row['delay']:
-                    popup_text += f"<br>Delay after match: {row['delay']}s"
-                if row['drop']:
-                    popup_text += f"<br>Servo {row['servo']}, Delay after servo: {row['drop_delay']}s"
-                folium.Marker(location=[row['latitude'], row['longitude']], 
-                              popup=popup_text).add_to(map_)
-            
-            folium.PolyLine(locations=data[['latitude', 'longitude']].values.tolist(), color='blue').add_to(map_)
-        
-        map_.add_child(folium.LatLngPopup())
+        # Map is rebuilt only when the mission table changes
+        gps_data = st.session_state.gps_table.to_frame()
+        map_ = cached_map(mission_key(gps_data), gps_data)
         st_folium(map_, width=700, height=500)
 
+    def wait_for_upload(self, url, job_id):
+        # Upload runs as a background job on the server - poll its progress
+        progress_bar = st.progress(0.0, text="Waiting for vehicle...")
+        while True:
+            job = requests.get(f"{url}/{job_id}", timeout=5).json()
+            seq, count = job["progress"]["seq"], job["progress"]["count"]
+            if seq is not None and count:
+                progress_bar.progress((seq + 1) / count, text=f"Sent item {seq + 1} of {count}")
+            if job["state"] in ("done", "failed"):
+                return job
+            time.sleep(0.5)
+
+    def show_mission_estimate(self, height):
+        # Path length and flight time estimate computed by the backend
+        try:
+            response = requests.post("http://localhost:8001/mission/stats",
+                                     data=encode_mission(st.session_state.gps_table.to_frame()),
+                                     headers={"Content-Type": MISSION_CONTENT_TYPE},
+                                     params={"height": height, "per_item": False}, timeout=5)
+        except (requests.exceptions.RequestException, ValueError) as e:
+            # ValueError: a table value outside the binary format's range (e.g. latitude 530)
+            st.caption(f"Mission estimate unavailable: {str(e)}")
+            return
+        if response.status_code != 200:
+            st.warning(f"Mission estimate unavailable: {response.json().get('detail')}")
+            return
+        stats = response.json()
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Path length", f"{stats['total_distance'] / 1000:.2f} km")
+        col2.metric("Flight time", f"{stats['total_time'] / 60:.1f} min")
+        col3.metric("Drops", stats['drops'])
+
+    def show_mission_export(self, height):
+        # Mission items exactly as they would be uploaded, as a QGC .waypoints file or a binary archive
+        export_format = st.selectbox("Export format", ("wpl", "binary"),
+                                     format_func={"wpl": "QGroundControl .waypoints", "binary": "Binary archive"}.get)
+        if not st.button("Prepare Export"):
+            return
+        try:
+            response = requests.post("http://localhost:8001/mission/export",
+                                     data=encode_mission(st.session_state.gps_table.to_frame()),
+                                     headers={"Content-Type": MISSION_CONTENT_TYPE},
+                                     params={"height": height, "format": export_format}, timeout=30)
+        except (requests.exceptions.RequestException, ValueError) as e:
+            st.error(f"Failed to export mission. Error: {str(e)}")
+            return
+        if response.status_code != 200:
+            st.error(f"Failed to export mission: {response.json().get('detail')}")
+            return
+        file_name = "mission.waypoints" if export_format == "wpl" else "mission.msnpk"
+        st.download_button("Download mission", response.content, file_name=file_name,
+                           mime=response.headers.get("content-type"))
+
+    def import_mission_file(self, mission_file):
+        # The file is streamed to the backend, parsed there in one pass and returned as a binary mission
+        try:
+            response = requests.post("http://localhost:8001/mission/import", data=mission_file,
+                                     params={"filename": mission_file.name}, timeout=60)
+        except requests.exceptions.RequestException as e:
+            st.error(f"Failed to import mission. Error: {str(e)}")
+            return
+        if response.status_code != 200:
+            st.error(f"Failed to import mission: {response.json().get('detail')}")
+            return
+        columns = decode_mission(response.content)
+        st.session_state.gps_table.extend(columns)
+        st.success(f"Imported {len(columns['latitude'])} points from {mission_file.name}.")
+
     def main(self):
         st.title("GPS Data Viewer")
         
@@ -123,15 +175,21 @@ class GPSDataViewer:
         elif action == 'Add Delay':
             delay = st.number_input("Enter Delay (seconds)", min_value=1, step=1)
             if st.button("Add Delay"):
-                self.add_gps_point(np.nan, np.nan, np.nan, delay, np.nan, np.nan, np.nan)
+                self.add_gps_point(np.nan, np.nan, np.nan, delay, np.nan, np.nan, np.nan, np.nan)
                 st.success(f"Delay added: {delay} seconds at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
 
+        st.subheader("Import Mission")
+        mission_file = st.file_uploader("CSV, GPX, KML, QGroundControl .waypoints or binary archive file",
+                                        type=["csv", "gpx", "kml", "waypoints", "txt", "msnpk", "mission"])
+        if mission_file is not None and st.button("Import Points"):
+            self.import_mission_file(mission_file)
+
         st.subheader("Data Preview")
-        st.write(st.session_state.gps_data)
+        st.write(st.session_state.gps_table.to_frame())
         
-        if not st.session_state.gps_data.empty:
+        if not st.session_state.gps_table.empty:
             st.subheader("Manage Points")
-            point_to_remove = st.selectbox("Select a point to remove", st.session_state.gps_data.index)
+            point_to_remove = st.selectbox("Select a point to remove", range(len(st.session_state.gps_table)))
             if st.button("Remove Selected Point"):
                 self.remove_gps_point(point_to_remove)
                 st.success(f"Point {point_to_remove} removed.")
@@ -144,20 +202,42 @@ class GPSDataViewer:
         ip_address = st.text_input("Enter server IP address", value="127.0.0.1")
         port = st.text_input("Enter server port", value="14550")
         height = st.number_input("Height Operation", key="height", step=1, value=60)
+        force_upload = st.checkbox("Force full upload (ignore mission already on vehicle)")
+        simplify = st.number_input("Simplify route tolerance (m, 0 = off)", min_value=0.0, step=0.5, value=0.0)
+
+        if not st.session_state.gps_table.empty:
+            self.show_mission_estimate(height)
+            self.show_mission_export(height)
             
         if st.button("Upload Mission"):
-            if not st.session_state.gps_data.empty:
+            if not st.session_state.gps_table.empty:
                 url = "http://localhost:8001/upload"  # Adres serwera FastAPI
-                # Konwersja do JSON z zaokrągleniem do 8 miejsc po przecinku
-                data_json = st.session_state.gps_data.round(8).to_json(orient='split')
                 try:
-                    response = requests.post(url, json={"data": data_json, "ip": ip_address, 
-                                                        "port": port, "height": height})
+                    # Compact binary mission (lat/lon as int32 in 1e7 degrees, like MAVLink)
+                    data = encode_mission(st.session_state.gps_table.to_frame())
+                    response = requests.post(url, data=data, headers={"Content-Type": MISSION_CONTENT_TYPE},
+                                             params={"ip": ip_address, "port": port, "height": height,
+                                                     "force": force_upload, "simplify": simplify or None})
                     if response.status_code == 200:
-                        st.success("Mission uploaded successfully.")
+                        simplified = response.json()["simplified"]
+                        if simplified:
+                            st.info(f"Removed {simplified['removed']} waypoints "
+                                    f"(max deviation {simplified['max_deviation']:.2f} m).")
+                        job = self.wait_for_upload(url, response.json()["job_id"])
+                        if job["state"] == "done":
+                            st.success(f"Mission uploaded successfully ({job['result']['write']} write).")
+                        else:
+                            st.error(f"Failed to upload mission: {job['error']}")
+                    elif response.status_code == 400 and isinstance(response.json().get("detail"), dict):
+                        # Geofence violations come back as row indices of the mission table
+                        detail = response.json()["detail"]
+                        st.error(detail["message"])
+                        for check in ("outside", "excluded", "legs", "altitude"):
+                            if detail[check]:
+                                st.write(f"{check}: rows {detail[check]}")
                     else:
                         st.error(f"Failed to upload data. Server responded with status code {response.status_code}.")
-                except requests.exceptions.RequestException as e:
+                except (requests.exceptions.RequestException, ValueError) as e:
                     st.error(f"Failed to upload data. Error: {str(e)}")
             else:
                 st.warning("No points to upload.")
@@ -186,7 +266,7 @@ def create_map(map_key, location):
 
 # Main app logic
 st.sidebar.title("Map Selection")
-page = st.sidebar.radio("Select a Map", ["GPS Data Viewer", "Map 1", "Map 2", "Map 3", "Map 4"])
+page = st.sidebar.radio("Select a Map", ["GPS Data Viewer", "Live Telemetry", "Map 1", "Map 2", "Map 3", "Map 4"])
 
 # Determine which map is selected
 selected_map_key = {
@@ -200,6 +280,23 @@ selected_map_key = {
 if page == "GPS Data Viewer":
     gps_viewer = GPSDataViewer()
     gps_viewer.main()
+elif page == "Live Telemetry":
+    st.subheader("Live Telemetry")
+    col1, col2 = st.columns([3, 1])
+    with col2:
+        vehicle = st.text_input("Vehicle (ip:port)", value="127.0.0.1:14550")
+        if st.button("Watch vehicle"):
+            # The backend keeps one reader per vehicle, shared by every open tab
+            try:
+                response = requests.post(f"http://localhost:8001/vehicles/{vehicle}/telemetry", timeout=5)
+                if response.status_code == 200:
+                    st.success(f"Watching {vehicle}.")
+                else:
+                    st.error(f"Cannot watch vehicle: {response.json().get('detail')}")
+            except requests.exceptions.RequestException as e:
+                st.error(f"Cannot watch vehicle. Error: {str(e)}")
+    with col1:
+        show_vehicle_telemetry()
 else:
     # Create the map and input fields for the selected map page
     st.subheader(f"Real-Time Map Updates - {page}")
@@ -0,0 +1,110 @@
+import json
+import os
+
+import folium
+import streamlit.components.v1 as components
+
+# Backend address as seen by the browser (e.g. https://ground-station.example:8001). When unset, the page
+# connects to BACKEND_PORT on the host the browser loaded Streamlit from.
+PUBLIC_API_URL = os.environ.get("SZTAFETA_PUBLIC_API_URL")
+BACKEND_PORT = 8001
+
+# Directory with leaflet.js and leaflet.css to inline for offline use; by default the page loads
+# the same Leaflet build folium uses for the mission maps
+LEAFLET_DIR = os.environ.get("SZTAFETA_LEAFLET_DIR")
+
+# Live map and table fed by the backend telemetry WebSocket. The browser keeps the socket open and
+# reconnects on its own, so Streamlit reruns never poll the backend (or the vehicles) for telemetry.
+TELEMETRY_TEMPLATE = """
+__LEAFLET__
+<style>
+  body { font-family: sans-serif; font-size: 14px; margin: 0; }
+  #telemetry-map { height: __MAP_HEIGHT__px; }
+  table { border-collapse: collapse; width: 100%; margin-top: 8px; }
+  th, td { border-bottom: 1px solid #ddd; padding: 4px 8px; text-align: left; }
+  .stale { color: #999; }
+</style>
+<div id="telemetry-map"></div>
+<div id="telemetry-status">Connecting...</div>
+<table id="telemetry-table">
+  <tr><th>Vehicle</th><th>Link</th><th>Mode</th><th>Armed</th><th>Lat</th><th>Lon</th>
+      <th>Alt (m)</th><th>Mission item</th><th>Battery</th></tr>
+</table>
+<script>
+// Without Leaflet (offline, no local copy) the table still updates
+const map = window.L ? L.map('telemetry-map').setView(__CENTER__, 15) : null;
+if (map) {
+  L.tileLayer('https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png', {maxZoom: 19}).addTo(map);
+} else {
+  document.getElementById('telemetry-map').style.display = 'none';
+}
+const markers = {};
+const rows = {};
+
+function fmt(value, digits) {
+  if (value === null || value === undefined) return '-';
+  return typeof value === 'number' ? value.toFixed(digits) : String(value);
+}
+
+function update(state) {
+  let row = rows[state.vehicle];
+  if (!row) {
+    row = rows[state.vehicle] = document.getElementById('telemetry-table').insertRow();
+    for (let i = 0; i < 9; i++) row.insertCell();
+  }
+  const battery = state.battery_voltage === undefined ? '-' :
+    fmt(state.battery_voltage, 1) + ' V / ' + fmt(state.battery_remaining, 0) + ' %';
+  const cells = [state.vehicle, state.connected ? 'ok' : 'lost', fmt(state.mode),
+                 state.armed === undefined || state.armed === null ? '-' : (state.armed ? 'yes' : 'no'),
+                 fmt(state.lat, 7), fmt(state.lon, 7), fmt(state.altitude, 1), fmt(state.mission_seq, 0), battery];
+  cells.forEach((text, i) => { row.cells[i].textContent = text; });
+  row.className = state.connected ? '' : 'stale';
+
+  if (map && state.lat !== null && state.lat !== undefined) {
+    if (!markers[state.vehicle]) {
+      markers[state.vehicle] = L.marker([state.lat, state.lon]).addTo(map).bindTooltip(state.vehicle);
+    } else {
+      markers[state.vehicle].setLatLng([state.lat, state.lon]);
+    }
+    markers[state.vehicle].setOpacity(state.connected ? 1.0 : 0.4);
+  }
+}
+
+function socketUrl() {
+  const configured = __API_URL__;
+  if (configured) return configured.replace(/^http/, 'ws') + '/telemetry/ws';
+  // The component runs in a srcdoc iframe - the page address is the parent's
+  const page = window.parent.location;
+  return (page.protocol === 'https:' ? 'wss://' : 'ws://') + page.hostname + ':__BACKEND_PORT__/telemetry/ws';
+}
+
+function connect() {
+  const status = document.getElementById('telemetry-status');
+  const socket = new WebSocket(socketUrl());
+  socket.onopen = () => { status.textContent = 'Live'; };
+  socket.onmessage = (event) => update(JSON.parse(event.data));
+  socket.onclose = () => { status.textContent = 'Disconnected, retrying...'; setTimeout(connect, 2000); };
+}
+connect();
+</script>
+"""
+
+
+def leaflet_head():
+    # Leaflet inlined from LEAFLET_DIR, or linked from folium's asset URLs
+    if LEAFLET_DIR:
+        with open(os.path.join(LEAFLET_DIR, "leaflet.css")) as css, open(os.path.join(LEAFLET_DIR, "leaflet.js")) as js:
+            return f"<style>{css.read()}</style>\n<script>{js.read()}</script>"
+    js = dict(folium.folium._default_js)["leaflet"]
+    css = dict(folium.folium._default_css)["leaflet_css"]
+    return f'<link rel="stylesheet" href="{css}"/>\n<script src="{js}"></script>'
+
+
+def show_vehicle_telemetry(api_url=PUBLIC_API_URL, center=(53.01907010, 20.88029020), height=560):
+    # Render the live telemetry panel; api_url is the backend address as seen by the browser
+    html = (TELEMETRY_TEMPLATE.replace("__API_URL__", json.dumps(api_url))
+            .replace("__BACKEND_PORT__", str(BACKEND_PORT))
+            .replace("__CENTER__", json.dumps(list(center)))
+            .replace("__MAP_HEIGHT__", str(height - 200))
+            .replace("__LEAFLET__", leaflet_head()))
+    components.html(html, height=height)